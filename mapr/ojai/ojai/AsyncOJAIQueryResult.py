@@ -0,0 +1,72 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+from builtins import *
+from builtins import object
+
+import grpc.aio
+from grpc.aio import AioRpcError
+
+from mapr.ojai.exceptions.InvalidStreamResponseError import InvalidStreamResponseError
+from mapr.ojai.ojai.OJAIDocumentStream import OJAIDocumentStream
+from mapr.ojai.ojai_utils.ojai_document_creator import OJAIDocumentCreator
+from mapr.ojai.proto.gen.maprdb_server_pb2 import FindResponseType
+
+
+class AsyncOJAIQueryResult(object):
+    """Async iterator over the Find server stream of a grpc.aio call.
+    Usage:
+    result = await store.find(query)
+    async for doc in result:
+        ...
+    """
+
+    def __init__(self, call, results_as_document=False, include_query_plan=False,
+                 json_codec=None):
+        self.__call = call
+        self.__json_codec = json_codec
+        self.__results_as_document = results_as_document
+        self.__include_query_plan = include_query_plan
+        self.__query_plan = None
+        self.__first_response = None
+
+    async def prefetch(self):
+        """Reads the query plan and the first response, so errors raised before
+        any document was delivered surface from find() and can be retried."""
+        if self.__include_query_plan:
+            response = await self.__call.read()
+            if response is grpc.aio.EOF:
+                raise InvalidStreamResponseError('Query plan is missing in the response.')
+            from mapr.ojai.storage.OJAIDocumentStore import OJAIDocumentStore
+            OJAIDocumentStore.validate_response(response)
+            if response.type != FindResponseType.Value('QUERY_PLAN'):
+                raise InvalidStreamResponseError('Invalid response type. Query plan expected.')
+            self.__query_plan = response.json_response
+        self.__first_response = await self.__call.read()
+
+    def get_query_plan(self):
+        return self.__query_plan
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.__first_response is not None:
+            response, self.__first_response = self.__first_response, None
+        else:
+            try:
+                response = await self.__call.read()
+            except AioRpcError:
+                from mapr.ojai.exceptions.ConnectionLostError import ConnectionLostError
+                raise ConnectionLostError(m="Connection lost during operation.")
+        if response is grpc.aio.EOF:
+            raise StopAsyncIteration
+        doc_response = OJAIDocumentCreator.create_document(
+            OJAIDocumentStream.parse_find_response(response), json_codec=self.__json_codec)
+        return doc_response if self.__results_as_document else doc_response.as_dictionary()
+
+    def close(self):
+        self.__call.cancel()
@@ -0,0 +1,47 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+from builtins import *
+from builtins import object
+
+
+class OJAIBulkWriteResult(object):
+    """Outcome of a pipelined doc_stream write.
+    Failures are kept per document instead of aborting the whole stream,
+    in the order the server replies arrived."""
+
+    def __init__(self):
+        self.__success_count = 0
+        self.__failures = []
+
+    def add_success(self):
+        self.__success_count += 1
+
+    def add_failure(self, _id, error):
+        self.__failures.append((_id, error))
+
+    def get_success_count(self):
+        return self.__success_count
+
+    def get_failure_count(self):
+        return len(self.__failures)
+
+    def get_failed_ids(self):
+        return [_id for _id, _ in self.__failures]
+
+    def get_failures(self):
+        """:return: list of (_id, exception) tuples"""
+        return list(self.__failures)
+
+    def has_failures(self):
+        return len(self.__failures) > 0
+
+    def __len__(self):
+        return self.__success_count + len(self.__failures)
+
+    def __repr__(self):
+        return 'OJAIBulkWriteResult(success={0}, failed={1})'.format(self.__success_count,
+                                                                     len(self.__failures))
@@ -7,7 +7,6 @@ from past.builtins import *
 standard_library.install_aliases()
 from builtins import *
 import json
-import re
 
 from ojai.Document import Document
 
@@ -19,13 +18,12 @@ from ojai.types.OTimestamp import OTimestamp
 from mapr.ojai.ojai import document_utils
 from mapr.ojai.ojai_utils.ojai_dict import OJAIDict
 from mapr.ojai.ojai_utils.ojai_list import OJAIList
-from mapr.ojai.ojai.document_utils import merge_two_dicts, parse_field_path, replacer
+from mapr.ojai.ojai.OJAIFieldPath import OJAIFieldPath
+from mapr.ojai.ojai.document_utils import set_field_path
 
 
 class OJAIDocument(Document):
     __json_stream_document_reader = None
-    __regex = re.compile(r"""(["']).*?\1|(?P<dot>\.)""")
-    __list_regex = re.compile(r"\[(\w+)\]")
 
     def __init__(self, json_value=None):
         self.__internal_dict = {}
@@ -52,9 +50,10 @@ class OJAIDocument(Document):
         self.__internal_dict = {}
 
     def set(self, field_path, value):
-        if field_path == '_id' and isinstance(value, (basestring, bytearray)):
-            self.__internal_dict[field_path] = value
-        elif self.__list_regex.search(field_path):
+        field_path = OJAIFieldPath.parse(field_path)
+        if field_path.path == '_id' and isinstance(value, (basestring, bytearray)):
+            self.__internal_dict[field_path.path] = value
+        elif field_path.index is not None:
             self.__set_list_element(field_path=field_path, value=value)
         elif isinstance(value, OJAIDocument):
             self.__set_document(field_path=field_path, value=value)
@@ -66,9 +65,7 @@ class OJAIDocument(Document):
         return self
 
     def __get_index_and_stored_value(self, field_path):
-        index = int(self.__list_regex.search(field_path).group(1))
-        stored_value = self.get(re.sub(self.__list_regex, '', field_path))
-        return index, stored_value
+        return field_path.index, self.__get_segments_value(field_path.segments)
 
     def __set_list_element(self, field_path, value):
         index, stored_value = self.__get_index_and_stored_value(field_path=field_path)
@@ -91,82 +88,75 @@ class OJAIDocument(Document):
         return self.__internal_dict
 
     def __set_str(self, field_path, value):
-        self.__internal_dict = merge_two_dicts(self.__internal_dict,
-                                               parse_field_path(field_path=field_path,
-                                                                value=value))
+        self.__internal_dict = set_field_path(self.__internal_dict,
+                                              field_path=field_path,
+                                              value=value)
 
     def __set_boolean(self, field_path, value):
-        self.__internal_dict = merge_two_dicts(self.__internal_dict,
-                                               parse_field_path(field_path=field_path,
-                                                                value=value))
+        self.__internal_dict = set_field_path(self.__internal_dict,
+                                              field_path=field_path,
+                                              value=value)
 
     def __set_long(self, field_path, value):
-        self.__internal_dict = merge_two_dicts(self.__internal_dict,
-                                               parse_field_path(field_path=field_path,
-                                                                value=value,
-                                                                ))
+        self.__internal_dict = set_field_path(self.__internal_dict,
+                                              field_path=field_path,
+                                              value=value)
 
     def __set_float(self, field_path, value):
-        self.__internal_dict = merge_two_dicts(self.__internal_dict,
-                                               parse_field_path(field_path=field_path,
-                                                                value=value,
-                                                                ))
+        self.__internal_dict = set_field_path(self.__internal_dict,
+                                              field_path=field_path,
+                                              value=value)
 
     def __set_time(self, field_path, value):
-        self.__internal_dict = merge_two_dicts(self.__internal_dict,
-                                               parse_field_path(field_path=field_path,
-                                                                value=value,
-                                                                ))
+        self.__internal_dict = set_field_path(self.__internal_dict,
+                                              field_path=field_path,
+                                              value=value)
 
     def __set_date(self, field_path, value):
-        self.__internal_dict = merge_two_dicts(self.__internal_dict,
-                                               parse_field_path(field_path=field_path,
-                                                                value=value,
-                                                                ))
+        self.__internal_dict = set_field_path(self.__internal_dict,
+                                              field_path=field_path,
+                                              value=value)
 
     def __set_timestamp(self, field_path, value):
-        self.__internal_dict = merge_two_dicts(self.__internal_dict,
-                                               parse_field_path(field_path=field_path,
-                                                                value=value,
-                                                                ))
+        self.__internal_dict = set_field_path(self.__internal_dict,
+                                              field_path=field_path,
+                                              value=value)
 
     def __set_interval(self, field_path, value):
-        self.__internal_dict = merge_two_dicts(self.__internal_dict,
-                                               parse_field_path(field_path=field_path,
-                                                                value=value,
-                                                                ))
+        self.__internal_dict = set_field_path(self.__internal_dict,
+                                              field_path=field_path,
+                                              value=value)
 
     def __set_byte_array(self, field_path, value):
-        self.__internal_dict = merge_two_dicts(self.__internal_dict,
-                                               parse_field_path(field_path=field_path,
-                                                                value=value,
-                                                                ))
+        self.__internal_dict = set_field_path(self.__internal_dict,
+                                              field_path=field_path,
+                                              value=value)
 
     def __set_dict(self, field_path, value):
         value = OJAIDict.parse_dict(value)
         if self.get(field_path) is not None:
             self.delete(field_path)
-        self.__internal_dict = merge_two_dicts(self.__internal_dict,
-                                               parse_field_path(field_path=field_path,
-                                                                value=value))
+        self.__internal_dict = set_field_path(self.__internal_dict,
+                                              field_path=field_path,
+                                              value=value)
 
     def __set_document(self, field_path, value):
-        self.__internal_dict = merge_two_dicts(self.__internal_dict,
-                                               parse_field_path(field_path=field_path,
-                                                                value=value.as_dictionary()))
+        self.__internal_dict = set_field_path(self.__internal_dict,
+                                              field_path=field_path,
+                                              value=value.as_dictionary())
 
     def __set_array(self, field_path, value):
         list_value = OJAIList.set_list(value=value)
         if self.get(field_path) is not None:
             self.delete(field_path)
-        self.__internal_dict = merge_two_dicts(self.__internal_dict,
-                                               parse_field_path(field_path=field_path,
-                                                                value=list_value))
+        self.__internal_dict = set_field_path(self.__internal_dict,
+                                              field_path=field_path,
+                                              value=list_value)
 
     def __set_none(self, field_path):
-        self.__internal_dict = merge_two_dicts(self.__internal_dict,
-                                               parse_field_path(field_path=field_path,
-                                                                value=None))
+        self.__internal_dict = set_field_path(self.__internal_dict,
+                                              field_path=field_path,
+                                              value=None)
 
     __dispatcher = (
         (basestring, __set_str),
@@ -189,15 +179,13 @@ class OJAIDocument(Document):
                 return m(self, field_path, value)
 
     def delete(self, field_path):
-        if self.__list_regex.search(field_path):
+        field_path = OJAIFieldPath.parse(field_path)
+        if field_path.index is not None:
             index, stored_value = \
                 self.__get_index_and_stored_value(field_path=field_path)
             del stored_value[index]
         else:
-            split_path = [part.strip("'").strip('"')
-                          for part in self.__regex.sub(replacer,
-                                                       field_path)
-                              .split("pass") if part]
+            split_path = field_path.segments
             try:
                 e = self.__internal_dict
                 for k in split_path[:-1]:
@@ -208,14 +196,18 @@ class OJAIDocument(Document):
         return self
 
     def get(self, field_path):
-        value = None
-        index = None
-        if self.__list_regex.search(field_path):
-            index = int(self.__list_regex.search(field_path).group(1))
-            field_path = re.sub(self.__list_regex, '', field_path)
+        field_path = OJAIFieldPath.parse(field_path)
+        index = field_path.index
+        value = self.__get_segments_value(field_path.segments)
+        if index is not None and value is not None and isinstance(value, list):
+            try:
+                value = value[index]
+            except IndexError:
+                value = None
+        return value
 
-        split_path = [part.strip("'").strip('"') for part in self.__regex.sub(replacer,
-                                                                              field_path).split("pass") if part]
+    def __get_segments_value(self, split_path):
+        value = None
         try:
             tmp_dict = self.__internal_dict
             for k in split_path[:-1]:
@@ -223,11 +215,6 @@ class OJAIDocument(Document):
             value = tmp_dict[split_path[-1]]
         except KeyError:
             pass
-        if index is not None and value is not None and isinstance(value, list):
-            try:
-                value = value[index]
-            except IndexError:
-                value = None
         return value
 
     def get_str(self, field_path):
@@ -322,8 +309,7 @@ class OJAIDocument(Document):
 
     def as_json_str(self, with_tags=True):
         if with_tags:
-            from mapr.ojai.ojai.OJAITagsBuilder import OJAITagsBuilder
-            return json.dumps(OJAITagsBuilder().set('tmp', self.__internal_dict).as_dictionary()['tmp'],
-                              default=document_utils.type_serializer)
+            from mapr.ojai.ojai.OJAITagsEncoder import OJAITagsEncoder
+            return OJAITagsEncoder.dumps(self.__internal_dict)
         else:
             return json.dumps(self.__internal_dict, default=document_utils.type_serializer)
@@ -14,17 +14,24 @@ from grpc._channel import _Rendezvous
 from ojai.DocumentStream import DocumentStream
 
 from mapr.ojai.exceptions.InvalidStreamResponseError import InvalidStreamResponseError
+from mapr.ojai.ojai.OJAIStreamPrefetcher import OJAIStreamPrefetcher
 from mapr.ojai.ojai_utils.ojai_document_creator import OJAIDocumentCreator
 
+DEFAULT_FETCH_SIZE = 10
+
 
 class OJAIDocumentStream(DocumentStream):
 
-    def __init__(self, input_stream, results_as_document=False, init_cache=None):
+    def __init__(self, input_stream, results_as_document=False, init_cache=None,
+                 fetch_size=DEFAULT_FETCH_SIZE, max_buffer_bytes=None, json_codec=None):
         if init_cache is None or not isinstance(init_cache, deque):
             init_cache = deque()
         self.__results_as_document = results_as_document
         self.__input_stream = iter(input_stream)
         self.__init_cache = init_cache
+        self.__fetch_size = fetch_size
+        self.__max_buffer_bytes = max_buffer_bytes
+        self.__json_codec = json_codec
 
     @staticmethod
     def parse_find_response(response):
@@ -37,6 +44,23 @@ class OJAIDocumentStream(DocumentStream):
         else:
             raise InvalidStreamResponseError('Invalid stream response.')
 
+    @staticmethod
+    def read_batch(input_stream, cache, fetch_size=DEFAULT_FETCH_SIZE, max_buffer_bytes=None):
+        """Appends up to fetch_size documents from input_stream to cache.
+        When max_buffer_bytes is set, stops as soon as the UTF-8 size of the buffered
+        json reaches it, at least one document is always read."""
+        buffered_bytes = 0
+        for _ in range(fetch_size):
+            try:
+                json_response = OJAIDocumentStream.parse_find_response(next(input_stream))
+            except StopIteration:
+                break
+            cache.append(json_response)
+            if max_buffer_bytes is not None:
+                buffered_bytes += len(json_response.encode('utf-8'))
+                if buffered_bytes >= max_buffer_bytes:
+                    break
+
     def __iter__(self):
         return self
 
@@ -46,19 +70,17 @@ class OJAIDocumentStream(DocumentStream):
             if not self.__init_cache:
                 raise StopIteration
         doc_response = OJAIDocumentCreator \
-            .create_document(self.__init_cache.popleft())
+            .create_document(self.__init_cache.popleft(), json_codec=self.__json_codec)
         return doc_response if self.__results_as_document else doc_response.as_dictionary()
 
     next = __next__
 
     def __fill_cache(self):
         try:
-            for _ in range(10):
-                try:
-                    self.__init_cache.append(OJAIDocumentStream.
-                                             parse_find_response(next(self.__input_stream)))
-                except StopIteration:
-                    break
+            OJAIDocumentStream.read_batch(input_stream=self.__input_stream,
+                                          cache=self.__init_cache,
+                                          fetch_size=self.__fetch_size,
+                                          max_buffer_bytes=self.__max_buffer_bytes)
         except _Rendezvous:
             from mapr.ojai.exceptions.ConnectionLostError import ConnectionLostError
             raise ConnectionLostError(m="Connection lost during operation.")
@@ -67,4 +89,6 @@ class OJAIDocumentStream(DocumentStream):
         return self.__iter__()
 
     def close(self):
+        if isinstance(self.__input_stream, OJAIStreamPrefetcher):
+            self.__input_stream.close()
         raise StopIteration
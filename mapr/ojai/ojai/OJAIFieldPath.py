@@ -0,0 +1,87 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+from builtins import *
+from past.builtins import *
+from builtins import object
+import re
+
+try:
+    from functools import lru_cache
+except ImportError:
+    lru_cache = None
+
+FIELD_PATH_CACHE_SIZE = 4096
+
+
+class OJAIFieldPath(object):
+    """Parsed field path: dot separated segments with quotes stripped
+    and the optional list index, e.g. a."b.c"[2] -> ('a', 'b.c'), 2.
+    Paths used in hot loops can be parsed once with OJAIFieldPath.parse
+    and passed to OJAIDocument get/set/delete instead of the str."""
+
+    __regex = re.compile(r"""(["']).*?\1|(?P<dot>\.)""")
+    __list_regex = re.compile(r"\[(\w+)\]")
+
+    def __init__(self, field_path):
+        if not isinstance(field_path, basestring):
+            raise TypeError('Field path must be str.')
+        self.__path = field_path
+        self.__index = None
+        list_match = OJAIFieldPath.__list_regex.search(field_path)
+        if list_match:
+            self.__index = int(list_match.group(1))
+            field_path = OJAIFieldPath.__list_regex.sub('', field_path)
+        self.__segments = tuple(part.strip("'").strip('"')
+                                for part in OJAIFieldPath.__regex.sub(OJAIFieldPath.__replacer,
+                                                                      field_path).split('pass')
+                                if part)
+
+    @staticmethod
+    def __replacer(match):
+        if match.group('dot') is not None:
+            return 'pass'
+        else:
+            return match.group(0)
+
+    @staticmethod
+    def parse(field_path):
+        """Returns OJAIFieldPath for str field path, parsed paths are cached."""
+        if isinstance(field_path, OJAIFieldPath):
+            return field_path
+        return _parse_field_path(field_path)
+
+    @property
+    def path(self):
+        return self.__path
+
+    @property
+    def segments(self):
+        return self.__segments
+
+    @property
+    def index(self):
+        return self.__index
+
+    def __eq__(self, other):
+        return isinstance(other, OJAIFieldPath) and self.__path == other.path
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(self.__path)
+
+    def __str__(self):
+        return self.__path
+
+    def __repr__(self):
+        return 'OJAIFieldPath({0!r})'.format(self.__path)
+
+
+_parse_field_path = OJAIFieldPath
+if lru_cache is not None:
+    _parse_field_path = lru_cache(maxsize=FIELD_PATH_CACHE_SIZE)(OJAIFieldPath)
@@ -0,0 +1,153 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+from builtins import *
+from builtins import object
+import queue
+import string
+import threading
+
+DEFAULT_PARTITION_BUFFER_SIZE = 1000
+_END_OF_PARTITION = object()
+
+
+class OJAIParallelQueryResult(object):
+    """Documents of several partition queries read concurrently, one thread per partition.
+    Unordered results are yielded as they arrive from any partition. Ordered results
+    are yielded partition after partition, so with ascending disjoint _id ranges
+    ordered by _id the output is ordered by _id; partitions not yet being consumed
+    are read ahead into their buffers. Errors are re-raised from the iterator,
+    close() or leaving the iteration early cancels the remaining partitions."""
+
+    def __init__(self, partition_queries, ordered=False, limit=None,
+                 buffer_size=DEFAULT_PARTITION_BUFFER_SIZE):
+        """:param partition_queries: callables returning document iterables, one per partition.
+        :param limit: stop after limit documents."""
+        self.__stop = threading.Event()
+        self.__ordered = ordered
+        self.__limit = limit
+        if ordered:
+            self.__queues = [queue.Queue(maxsize=buffer_size) for _ in partition_queries]
+        else:
+            self.__queues = [queue.Queue(maxsize=buffer_size)] * len(partition_queries)
+        self.__threads = []
+        for index, partition_query in enumerate(partition_queries):
+            thread = threading.Thread(target=OJAIParallelQueryResult.__drain,
+                                      args=(partition_query, self.__queues[index], self.__stop),
+                                      name='ojai-parallel-find-{0}'.format(index))
+            thread.daemon = True
+            thread.start()
+            self.__threads.append(thread)
+
+    @staticmethod
+    def interpolate_split_points(first_id, last_id, partitions):
+        """Returns up to partitions - 1 sorted _id values that split the _id range
+        from first_id to last_id into partitions of about equal size.
+        After the common prefix the ids are read as numbers with one digit per character
+        of an alphabet: the characters seen in the ids, completed to the whole class of
+        digits, lower case or upper case letters they belong to, so that e.g. hex ids
+        use 16 digits."""
+        prefix_length = 0
+        while prefix_length < min(len(first_id), len(last_id)) \
+                and first_id[prefix_length] == last_id[prefix_length]:
+            prefix_length += 1
+        prefix = first_id[:prefix_length]
+        first_suffix, last_suffix = first_id[prefix_length:], last_id[prefix_length:]
+        seen = set(first_suffix + last_suffix)
+        alphabet = set(seen)
+        for char_class in (string.digits, string.ascii_lowercase, string.ascii_uppercase):
+            if seen & set(char_class):
+                alphabet |= set(char_class)
+        alphabet = sorted(alphabet)
+        base = len(alphabet)
+        if base < 2:
+            return []
+        digits = dict((char, digit) for digit, char in enumerate(alphabet))
+        length = max(len(first_suffix), len(last_suffix))
+
+        def to_number(suffix):
+            number = 0
+            for i in range(length):
+                number = number * base + (digits[suffix[i]] if i < len(suffix) else 0)
+            return number
+
+        first, last = to_number(first_suffix), to_number(last_suffix)
+        split_points = []
+        for i in range(1, partitions):
+            number = first + (last - first) * i // partitions
+            chars = []
+            for _ in range(length):
+                number, digit = divmod(number, base)
+                chars.append(alphabet[digit])
+            point = prefix + ''.join(reversed(chars)).rstrip(alphabet[0])
+            if point > (split_points[-1] if split_points else first_id) \
+                    and not any(0xD800 <= ord(c) <= 0xDFFF for c in point):
+                split_points.append(point)
+        return split_points
+
+    @staticmethod
+    def __drain(partition_query, documents, stop):
+        result = None
+        try:
+            result = partition_query()
+            for document in result:
+                if not OJAIParallelQueryResult.__put(documents, stop, (document, None)):
+                    return
+            OJAIParallelQueryResult.__put(documents, stop, (_END_OF_PARTITION, None))
+        except Exception as e:
+            OJAIParallelQueryResult.__put(documents, stop, (None, e))
+        finally:
+            if stop.is_set() and result is not None and hasattr(result, 'close'):
+                try:
+                    result.close()
+                except Exception:
+                    pass
+
+    @staticmethod
+    def __put(documents, stop, item):
+        while not stop.is_set():
+            try:
+                documents.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def __iter__(self):
+        count = 0
+        try:
+            for document in self.__documents():
+                if self.__limit is not None and count >= self.__limit:
+                    return
+                count += 1
+                yield document
+        finally:
+            self.close()
+
+    def __documents(self):
+        if self.__ordered:
+            for documents in self.__queues:
+                for document in OJAIParallelQueryResult.__read(documents, 1):
+                    yield document
+        elif self.__queues:
+            for document in OJAIParallelQueryResult.__read(self.__queues[0],
+                                                           len(self.__queues)):
+                yield document
+
+    @staticmethod
+    def __read(documents, partitions):
+        finished = 0
+        while finished < partitions:
+            document, error = documents.get()
+            if error is not None:
+                raise error
+            if document is _END_OF_PARTITION:
+                finished += 1
+            else:
+                yield document
+
+    def close(self):
+        self.__stop.set()
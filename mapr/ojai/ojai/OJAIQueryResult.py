@@ -6,7 +6,6 @@ from future import standard_library
 standard_library.install_aliases()
 from builtins import *
 from builtins import next
-from builtins import range
 from collections import deque
 
 from grpc._channel import _Rendezvous
@@ -14,14 +13,20 @@ from ojai.store.QueryResult import QueryResult
 
 from mapr.ojai.exceptions.InvalidStreamResponseError import InvalidStreamResponseError
 from mapr.ojai.exceptions.UnknownServerError import UnknownServerError
-from mapr.ojai.ojai.OJAIDocumentStream import OJAIDocumentStream
+from mapr.ojai.ojai.OJAIDocumentStream import OJAIDocumentStream, DEFAULT_FETCH_SIZE
+from mapr.ojai.ojai.OJAIStreamPrefetcher import OJAIStreamPrefetcher
 from mapr.ojai.proto.gen.maprdb_server_pb2 import FindResponseType
 
 
 class OJAIQueryResult(QueryResult):
 
-    def __init__(self, document_stream, results_as_document=False, include_query_plan=False):
+    def __init__(self, document_stream, results_as_document=False, include_query_plan=False,
+                 prefetch_depth=None, fetch_size=DEFAULT_FETCH_SIZE, max_buffer_bytes=None,
+                 json_codec=None):
         self.__query_plan = None
+        self.__json_codec = json_codec
+        self.__fetch_size = fetch_size
+        self.__max_buffer_bytes = max_buffer_bytes
         self.__doc_stream = document_stream
         self.__include_query_plan = include_query_plan
         self.__results_as_document = results_as_document
@@ -29,13 +34,14 @@ class OJAIQueryResult(QueryResult):
         if self.__include_query_plan:
             json_response = self.__parse_find_response(next(self.__doc_stream))
             self.__query_plan = json_response
+        if prefetch_depth is not None:
+            self.__doc_stream = OJAIStreamPrefetcher(response_stream=self.__doc_stream,
+                                                     depth=prefetch_depth)
         try:
-            for _ in range(10):
-                try:
-                    self.__init_cache.append(OJAIDocumentStream.
-                                             parse_find_response(next(self.__doc_stream)))
-                except StopIteration:
-                    break
+            OJAIDocumentStream.read_batch(input_stream=self.__doc_stream,
+                                          cache=self.__init_cache,
+                                          fetch_size=fetch_size,
+                                          max_buffer_bytes=max_buffer_bytes)
         except _Rendezvous as e:
             if not self.__init_cache:
                 raise e
@@ -63,8 +69,18 @@ class OJAIQueryResult(QueryResult):
     def get_query_plan(self):
         return self.__query_plan
 
+    def close(self):
+        """Cancels the Find RPC, e.g. when the consumer stops before the end of the stream."""
+        if isinstance(self.__doc_stream, OJAIStreamPrefetcher):
+            self.__doc_stream.close()
+        else:
+            self.__doc_stream.cancel()
+
     def __iter__(self):
         return OJAIDocumentStream(input_stream=self.__doc_stream,
                                   results_as_document=self.__results_as_document,
-                                  init_cache=self.__init_cache)
+                                  init_cache=self.__init_cache,
+                                  fetch_size=self.__fetch_size,
+                                  max_buffer_bytes=self.__max_buffer_bytes,
+                                  json_codec=self.__json_codec)
 
@@ -0,0 +1,138 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+from builtins import *
+import base64
+import json
+import time
+
+import grpc
+from ojai.store.QueryResult import QueryResult
+
+from mapr.ojai.exceptions.ConnectionLostError import ConnectionLostError
+from mapr.ojai.exceptions.IllegalArgumentError import IllegalArgumentError
+from mapr.ojai.ojai.OJAIDocument import OJAIDocument
+from mapr.ojai.ojai.document_utils import type_serializer
+import logging
+
+LOG = logging.getLogger(__name__)
+DEFAULT_RESUME_ATTEMPTS = 3
+# seconds before the first resume, doubled for every further attempt without progress
+RESUME_BACKOFF = 0.1
+RESUMABLE_STATUS_CODES = (grpc.StatusCode.UNAVAILABLE,
+                          grpc.StatusCode.RESOURCE_EXHAUSTED)
+
+
+class OJAIResumableQueryResult(QueryResult):
+    """Query result of a find ordered by _id which survives connection loss.
+    The _id of the last delivered document is kept, when the stream fails with
+    ConnectionLostError or UNAVAILABLE the Find is sent again for the documents
+    with greater _id, at most max_resumes times in a row without progress.
+    cursor is a string from which find can continue in another process."""
+
+    def __init__(self, query, find, max_resumes=DEFAULT_RESUME_ATTEMPTS, after=None,
+                 delivered=0):
+        """:param query: query dict ordered by _id
+        :param find: callable(query dict) returning OJAIQueryResult
+        :param after: _id of the last document already delivered
+        :param delivered: number of documents already delivered"""
+        self.__query = query
+        self.__find = find
+        self.__max_resumes = max_resumes
+        self.__after = after
+        self.__delivered = delivered
+        self.__closed = False
+        self.__result = self.__open()
+
+    @staticmethod
+    def ordered_by_id(query):
+        """Returns copy of query dict ordered by _id, with _id in the projection."""
+        order = query.get('$orderby')
+        if order is not None and order not in ({'_id': 'asc'}, [{'_id': 'asc'}]):
+            raise IllegalArgumentError(m='Resumable find must be ordered by _id ascending.')
+        query = dict(query)
+        query['$orderby'] = {'_id': 'asc'}
+        if '$select' in query and '_id' not in query['$select']:
+            query['$select'] = list(query['$select']) + ['_id']
+        return query
+
+    @staticmethod
+    def parse_cursor(cursor):
+        """:return: query, _id of the last delivered document, number of delivered documents"""
+        try:
+            state = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf8'))
+            return state['query'], state['after'], state['delivered']
+        except (ValueError, TypeError, KeyError, AttributeError):
+            raise IllegalArgumentError(m='Invalid find cursor.')
+
+    @property
+    def cursor(self):
+        """Token to pass as ojai.mapr.query.cursor option of find to continue after
+        the last document delivered by this result."""
+        state = json.dumps({'query': self.__query, 'after': self.__after,
+                            'delivered': self.__delivered},
+                           default=type_serializer, sort_keys=True)
+        return base64.urlsafe_b64encode(state.encode('utf8')).decode('ascii')
+
+    def __remaining_query(self):
+        query = dict(self.__query)
+        if self.__after is not None:
+            after_condition = {'$gt': {'_id': self.__after}}
+            query['$where'] = {'$and': [query['$where'], after_condition]} \
+                if query.get('$where') else after_condition
+            # offset was applied to the documents already delivered
+            query.pop('$offset', None)
+        if '$limit' in query:
+            query['$limit'] = max(query['$limit'] - self.__delivered, 0)
+        return query
+
+    def __open(self):
+        attempt = 0
+        while True:
+            try:
+                return self.__find(self.__remaining_query())
+            except (ConnectionLostError, grpc.RpcError) as e:
+                if not OJAIResumableQueryResult.__resumable(e):
+                    raise
+                attempt = self.__backoff(attempt, e)
+
+    @staticmethod
+    def __resumable(error):
+        return not isinstance(error, grpc.RpcError) or error.code() in RESUMABLE_STATUS_CODES
+
+    def __backoff(self, attempt, error):
+        if attempt >= self.__max_resumes:
+            raise error
+        LOG.debug('Resuming find after _id %s: %s', self.__after, error)
+        time.sleep(RESUME_BACKOFF * 2 ** attempt)
+        return attempt + 1
+
+    def __documents(self):
+        attempt = 0
+        while not self.__closed:
+            try:
+                for document in self.__result:
+                    self.__after = document.get_id() if isinstance(document, OJAIDocument) \
+                        else document['_id']
+                    self.__delivered += 1
+                    attempt = 0
+                    yield document
+                return
+            except (ConnectionLostError, grpc.RpcError) as e:
+                if not OJAIResumableQueryResult.__resumable(e):
+                    raise
+                attempt = self.__backoff(attempt, e)
+                self.__result = self.__open()
+
+    def __iter__(self):
+        return self.__documents()
+
+    def get_query_plan(self):
+        return self.__result.get_query_plan()
+
+    def close(self):
+        self.__closed = True
+        self.__result.close()
@@ -0,0 +1,80 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+from builtins import *
+from builtins import object
+import queue
+import threading
+
+DEFAULT_PREFETCH_DEPTH = 100
+_END_OF_STREAM = object()
+
+
+class OJAIStreamPrefetcher(object):
+    """Drains a Find response stream on a background thread into a bounded queue,
+    so network receive overlaps with document decoding in the consumer.
+    The producer blocks when the queue is full. Errors raised by the stream
+    are re-raised unchanged from __next__, close() cancels the RPC."""
+
+    def __init__(self, response_stream, depth=DEFAULT_PREFETCH_DEPTH):
+        self.__response_stream = response_stream
+        self.__queue = queue.Queue(maxsize=depth)
+        self.__stop = threading.Event()
+        self.__done = False
+        # thread gets only the queue and the event, so the prefetcher
+        # can be garbage collected and cancel the RPC when consumer drops it
+        thread = threading.Thread(target=OJAIStreamPrefetcher.__drain,
+                                  args=(response_stream, self.__queue, self.__stop),
+                                  name='ojai-find-prefetch')
+        thread.daemon = True
+        thread.start()
+
+    @staticmethod
+    def __drain(response_stream, response_queue, stop):
+        try:
+            for response in response_stream:
+                if not OJAIStreamPrefetcher.__put(response_queue, stop, (response, None)):
+                    return
+            OJAIStreamPrefetcher.__put(response_queue, stop, (_END_OF_STREAM, None))
+        except Exception as e:
+            if not stop.is_set():
+                OJAIStreamPrefetcher.__put(response_queue, stop, (None, e))
+
+    @staticmethod
+    def __put(response_queue, stop, item):
+        while not stop.is_set():
+            try:
+                response_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.__done:
+            raise StopIteration
+        response, error = self.__queue.get()
+        if error is not None:
+            self.__done = True
+            raise error
+        if response is _END_OF_STREAM:
+            self.__done = True
+            raise StopIteration
+        return response
+
+    next = __next__
+
+    def close(self):
+        if not self.__stop.is_set():
+            self.__stop.set()
+            self.__done = True
+            self.__response_stream.cancel()
+
+    def __del__(self):
+        self.close()
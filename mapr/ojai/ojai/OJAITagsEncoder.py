@@ -0,0 +1,134 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+from builtins import *
+from past.builtins import *
+from builtins import object
+import base64
+import json
+
+from ojai.types.ODate import ODate
+from ojai.types.OInterval import OInterval
+from ojai.types.OTime import OTime
+from ojai.types.OTimestamp import OTimestamp
+
+from mapr.ojai.exceptions.EncodingError import EncodingError
+from mapr.ojai.ojai import document_utils
+from mapr.ojai.ojai.OJAIDocument import OJAIDocument
+
+
+class OJAITagsEncoder(object):
+    """Converts a document dict into OJAI extended JSON ($numberLong, $numberFloat,
+    $date, $dateDay, $time, $interval, $binary) in a single walk.
+    Output is the same as OJAITagsBuilder().set(path, value) produces."""
+
+    __raw_keys = ('$numberLong', '$numberFloat')
+    # exact value type -> encoder, filled from __dispatcher on first use of a type
+    __encoders = {}
+
+    @staticmethod
+    def encode(value):
+        return OJAITagsEncoder.__encode_value(value)
+
+    @staticmethod
+    def dumps(value, json_codec=None):
+        """:param json_codec: codec from mapr.ojai.utils.json_codec, stdlib json if None."""
+        if json_codec is not None:
+            return json_codec.dumps(OJAITagsEncoder.__encode_value(value))
+        return json.dumps(OJAITagsEncoder.__encode_value(value),
+                          default=document_utils.type_serializer)
+
+    @staticmethod
+    def __encode_value(value):
+        encoder = OJAITagsEncoder.__encoders.get(type(value))
+        if encoder is None:
+            encoder = OJAITagsEncoder.__find_encoder(value)
+        return encoder(value)
+
+    @staticmethod
+    def __find_encoder(value):
+        for (t, m) in OJAITagsEncoder.__dispatcher:
+            if isinstance(value, t):
+                OJAITagsEncoder.__encoders[type(value)] = m
+                return m
+        raise EncodingError(m='Unsupported type {0} of the document value.'
+                            .format(type(value).__name__))
+
+    @staticmethod
+    def __encode_dict(value):
+        encoded = {}
+        for k, v in list(value.items()):
+            if k in OJAITagsEncoder.__raw_keys:
+                encoded[k] = v
+            else:
+                encoded[k] = OJAITagsEncoder.__encode_value(v)
+        return encoded
+
+    @staticmethod
+    def __encode_list(value):
+        encoded = []
+        for elem in value:
+            if isinstance(elem, list):
+                encoded.append(OJAITagsEncoder.__encode_list(elem))
+            elif isinstance(elem, dict) and elem:
+                # lists inside dict elements of a list are sent untagged
+                encoded.append(dict((k, OJAITagsEncoder.__plain_list(v)
+                                     if isinstance(v, list)
+                                     else OJAITagsEncoder.__encode_value(v))
+                                    for k, v in list(elem.items())))
+            else:
+                encoded.append(OJAITagsEncoder.__encode_value(elem))
+        return encoded
+
+    @staticmethod
+    def __plain_value(value):
+        if value is None:
+            return None
+        if isinstance(value, OJAIDocument):
+            return value.as_dictionary()
+        if isinstance(value, list):
+            return OJAITagsEncoder.__plain_list(value)
+        if isinstance(value, dict):
+            return dict((k, v if k in OJAITagsEncoder.__raw_keys
+                         else OJAITagsEncoder.__plain_value(v))
+                        for k, v in list(value.items()))
+        if isinstance(value, OJAITagsEncoder.__plain_types):
+            return value
+        raise EncodingError(m='Unsupported type {0} of the document value.'
+                            .format(type(value).__name__))
+
+    @staticmethod
+    def __plain_list(value):
+        plain = []
+        for elem in value:
+            if isinstance(elem, list):
+                plain.append(OJAITagsEncoder.__plain_list(elem))
+            elif isinstance(elem, dict) and elem:
+                plain.append(dict((k, OJAITagsEncoder.__plain_list(v)
+                                   if isinstance(v, list)
+                                   else OJAITagsEncoder.__plain_value(v))
+                                  for k, v in list(elem.items())))
+            else:
+                plain.append(OJAITagsEncoder.__plain_value(elem))
+        return plain
+
+    __plain_types = (basestring, bool, int, float, OTime, OTimestamp, ODate, OInterval, bytearray)
+
+    __dispatcher = (
+        (type(None), lambda value: None),
+        (OJAIDocument, lambda value: value.as_dictionary()),
+        (basestring, lambda value: value),
+        (bool, lambda value: value),
+        (int, lambda value: {'$numberLong': value}),
+        (float, lambda value: {'$numberFloat': value}),
+        (OTime, lambda value: {'$time': value.time_to_str()}),
+        (OTimestamp, lambda value: {'$date': value.__str__()}),
+        (ODate, lambda value: {'$dateDay': value.to_date_str()}),
+        (OInterval, lambda value: {'$interval': value.time_duration}),
+        (list, lambda value: OJAITagsEncoder.__encode_list(value)),
+        (dict, lambda value: OJAITagsEncoder.__encode_dict(value)),
+        (bytearray, lambda value: {'$binary': base64.b64encode(value)}),
+    )
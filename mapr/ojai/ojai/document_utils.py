@@ -7,14 +7,15 @@ standard_library.install_aliases()
 from builtins import *
 from copy import deepcopy
 
-import re
-
 from ojai.types.ODate import ODate
 from ojai.types.OInterval import OInterval
 from ojai.types.OTime import OTime
 from ojai.types.OTimestamp import OTimestamp
 
-__regex = re.compile(r"""(["']).*?\1|(?P<dot>\.)""")
+from mapr.ojai.ojai.OJAIFieldPath import OJAIFieldPath
+
+__tag_keys = ('$numberLong', '$numberFloat', '$numberShort', '$binary',
+              '$interval', '$date', '$dateDay', '$time')
 
 
 def parse_list(values_list):
@@ -29,8 +30,7 @@ def parse_list(values_list):
 
 
 def parse_field_path(field_path, value, oja_type=None):
-    split_path = [part.strip("'").strip('"') for part in __regex.sub(replacer,
-                                                                     field_path).split("pass") if part]
+    split_path = OJAIFieldPath.parse(field_path).segments
     tmp_dict = {}
 
     for i in reversed(split_path):
@@ -80,14 +80,47 @@ def merge_two_dicts(dict1, dict2):
         elif k in merged_dict and isinstance(merged_dict[k], list):
             merged_dict = merge_list_value(merged_dict=merged_dict, k=k, v=v)
         else:
-            if k in ('$numberLong', '$numberFloat', '$numberShort', '$binary',
-                     '$interval', '$date', '$dateDay', '$time') and len(merged_dict) == 1:
+            if k in __tag_keys and len(merged_dict) == 1:
                 merged_dict = dict2
             else:
                 merged_dict[k] = deepcopy(v)
     return merged_dict
 
 
+def set_field_path(document_dict, field_path, value, oja_type=None):
+    """In-place equivalent of
+    merge_two_dicts(document_dict, parse_field_path(field_path, value, oja_type)).
+    Only the dicts along the path are touched, returns the new root dict."""
+    split_path = OJAIFieldPath.parse(field_path).segments
+    if not split_path:
+        return document_dict
+    if oja_type is not None:
+        value = {oja_type: value}
+    return __set_split_path(document_dict, split_path, 0, value)
+
+
+def __set_split_path(current_dict, split_path, position, value):
+    if position == len(split_path):
+        return merge_two_dicts(current_dict, value)
+    k = split_path[position]
+    if k in current_dict and isinstance(current_dict[k], dict):
+        current_dict[k] = __set_split_path(current_dict[k], split_path, position + 1, value)
+    elif k in current_dict and isinstance(current_dict[k], list):
+        current_dict = merge_list_value(merged_dict=current_dict, k=k,
+                                        v=__wrap_value(split_path, position + 1, value))
+    elif k in __tag_keys and len(current_dict) == 1:
+        return __wrap_value(split_path, position, value)
+    else:
+        current_dict[k] = __wrap_value(split_path, position + 1, deepcopy(value))
+    return current_dict
+
+
+def __wrap_value(split_path, position, value):
+    for k in reversed(split_path[position:]):
+        value = {k: value}
+    return value
+
+
 def replacer(match):
     if match.group('dot') is not None:
         return "pass"
@@ -18,9 +18,24 @@ class OJAIDocumentCreator(object):
         pass
 
     @staticmethod
-    def create_document(json_string):
-        parsed_dict = json.loads(json_string)
-        return OJAIDocument().from_dict(OJAIDocumentCreator.remove_tags(parsed_dict))
+    def create_document(json_string, json_codec=None):
+        """:param json_codec: codec from mapr.ojai.utils.json_codec, stdlib json if None."""
+        if json_codec is not None:
+            return OJAIDocument().from_dict(json_codec.loads(json_string,
+                                                             object_hook=OJAIDocumentCreator.decode_tags))
+        return OJAIDocument().from_dict(json.loads(json_string,
+                                                   object_hook=OJAIDocumentCreator.decode_tags))
+
+    @staticmethod
+    def decode_tags(tags_dict):
+        """json.loads object_hook, converts tagged value into python/OJAI type
+        while parsing. Nested dicts and lists are already decoded at this point."""
+        for key in tags_dict:
+            if key in OJAIDocumentCreator.__tag_decoders:
+                value = tags_dict[key]
+                if not isinstance(value, (dict, list)):
+                    return OJAIDocumentCreator.__tag_decoders[key](value)
+        return tags_dict
 
     @staticmethod
     def remove_tags(tags_dict):
@@ -67,3 +82,14 @@ class OJAIDocumentCreator(object):
         else:
             from ojai.types.OTime import OTime
             return OTime.parse(str_value)
+
+    __tag_decoders = {
+        '$numberLong': lambda value: value,
+        '$numberFloat': lambda value: value,
+        '$numberShort': lambda value: value,
+        '$binary': lambda value: bytearray(base64.b64decode(value)),
+        '$interval': lambda value: OJAIDocumentCreator.generate_o_types('$interval', value),
+        '$date': lambda value: OJAIDocumentCreator.generate_o_types('$date', value),
+        '$dateDay': lambda value: OJAIDocumentCreator.generate_o_types('$dateDay', value),
+        '$time': lambda value: OJAIDocumentCreator.generate_o_types('$time', value),
+    }
@@ -0,0 +1,214 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+from builtins import *
+from past.builtins import *
+import json
+
+import grpc
+import grpc.aio
+from grpc.aio import AioRpcError
+from ojai.store.Connection import Connection
+
+from mapr.ojai.document.OJAIDocumentMutation import OJAIDocumentMutation
+from mapr.ojai.exceptions.ConnectionError import ConnectionError
+from mapr.ojai.exceptions.IllegalArgumentError import IllegalArgumentError
+from mapr.ojai.exceptions.StoreNotFoundError import StoreNotFoundError
+from mapr.ojai.ojai.OJAIDocument import OJAIDocument
+from mapr.ojai.ojai_query.OJAIQuery import OJAIQuery
+from mapr.ojai.ojai_query.OJAIQueryCondition import OJAIQueryCondition
+from mapr.ojai.proto.gen.maprdb_server_pb2 import CreateTableRequest, \
+    TableExistsRequest, DeleteTableRequest, PingRequest
+from mapr.ojai.proto.gen.maprdb_server_pb2_grpc import MapRDbServerStub
+from mapr.ojai.storage import aio_auth_interceptor
+from mapr.ojai.storage.AsyncOJAIDocumentStore import AsyncOJAIDocumentStore
+from mapr.ojai.storage.OJAIConnection import OJAIConnection
+from mapr.ojai.utils.aio_retry_utils import aio_retry
+from mapr.ojai.utils.channel_utils import get_channel_options, ChannelOptions
+from mapr.ojai.utils.json_codec import get_json_codec, DEFAULT_JSON_CODEC
+from mapr.ojai.utils.retry_utils import get_retry_policy
+import logging
+
+LOG = logging.getLogger(__name__)
+
+
+class AsyncOJAIConnection(Connection):
+    """asyncio connection to the MapR Data Access Gateway built on grpc.aio.
+    Accepts the same connection string and options as OJAIConnection.
+    Example:
+    connection = await AsyncOJAIConnection.connect(connection_str, options)
+    store = await connection.get_store('/test-store')
+    doc = await store.find_by_id('id001')
+    await connection.close()
+    """
+
+    def __init__(self, connection_str, options=None):
+
+        if options is None:
+            options = {}
+
+        if not isinstance(options, dict):
+            raise TypeError('Options type must be dict.')
+        self.__retry_config = get_retry_policy(options)
+        self.__json_codec = get_json_codec(options.get('ojai.mapr.json-codec',
+                                                       DEFAULT_JSON_CODEC))
+        self.__channel_options = get_channel_options(options)
+        self.__url, self.__auth, self.__encoded_user_metadata, self.__ssl, \
+        self.__ssl_ca, self.__ssl_target_name_override = OJAIConnection.parse_connection_url(
+            connection_str=connection_str)
+
+        self.__channel = AsyncOJAIConnection.__get_channel(self.__url,
+                                                           self.__ssl,
+                                                           self.__ssl_ca,
+                                                           self.__ssl_target_name_override,
+                                                           self.__encoded_user_metadata,
+                                                           self.__channel_options)
+        self.__connection = MapRDbServerStub(self.__channel)
+        self.__configure_retry(self.__retry_config)
+
+    @staticmethod
+    async def connect(connection_str, options=None):
+        """Creates AsyncOJAIConnection and pings the gateway."""
+        connection = AsyncOJAIConnection(connection_str=connection_str, options=options)
+        await connection.ping()
+        LOG.debug('Async connection was created'
+                  ' for %s with options auth:%s, ssl:%s, sslTargetNameOverride:%s',
+                  connection.__url,
+                  connection.__auth,
+                  connection.__ssl,
+                  connection.__ssl_target_name_override)
+        return connection
+
+    def __configure_retry(self, retry_config):
+        retry_dec = aio_retry(retry_config)
+        self.ping = retry_dec(self.ping)
+        self.create_store = retry_dec(self.create_store)
+        self.is_store_exists = retry_dec(self.is_store_exists)
+        self.delete_store = retry_dec(self.delete_store)
+
+    async def ping(self):
+        try:
+            await self.__connection.Ping(PingRequest(), timeout=10)
+        except AioRpcError as e:
+            if e.code() == grpc.StatusCode.UNAUTHENTICATED:
+                raise ConnectionError(e.details())
+            elif e.code() == grpc.StatusCode.UNAVAILABLE:
+                raise e
+
+    @staticmethod
+    def __get_channel(url,
+                      ssl,
+                      ssl_ca,
+                      ssl_target_name_override,
+                      encoded_user_metadata,
+                      channel_options=None):
+        interceptors = [aio_auth_interceptor.client_auth_interceptor(encoded_user_metadata)]
+        if channel_options is None:
+            channel_options = ChannelOptions()
+        arguments = list(channel_options.arguments)
+        if ssl:
+            ssl_credentials = OJAIConnection.get_ssl_credentials(ssl_ca)
+            if ssl_target_name_override:
+                arguments.append(('grpc.ssl_target_name_override',
+                                  ssl_target_name_override))
+            return grpc.aio.secure_channel(url,
+                                           ssl_credentials,
+                                           tuple(arguments) or None,
+                                           compression=channel_options.compression,
+                                           interceptors=interceptors)
+        return grpc.aio.insecure_channel(url,
+                                         tuple(arguments) or None,
+                                         compression=channel_options.compression,
+                                         interceptors=interceptors)
+
+    @staticmethod
+    def __validate_store_path(store_path):
+        if not isinstance(store_path, basestring):
+            raise TypeError
+
+    async def create_store(self, store_path):
+        AsyncOJAIConnection.__validate_store_path(store_path=store_path)
+        request = CreateTableRequest(table_path=store_path)
+        LOG.debug('Sending CREATE STORE request to the server. Request body: %s', request)
+        response = await self.__connection.CreateTable(request)
+        LOG.debug('Got CREATE STORE response from the server. Response body: %s', response)
+
+        if OJAIConnection.validate_response(response=response):
+            return self.__new_store(store_path=store_path)
+
+    async def is_store_exists(self, store_path):
+        AsyncOJAIConnection.__validate_store_path(store_path=store_path)
+        request = TableExistsRequest(table_path=store_path)
+        LOG.debug('Sending IS STORE EXISTS request to the server. Request body: %s', request)
+        response = await self.__connection.TableExists(request)
+        LOG.debug('Got IS STORE EXISTS response from the server. Response body: %s', response)
+        return OJAIConnection.validate_response(response=response)
+
+    async def delete_store(self, store_path):
+        AsyncOJAIConnection.__validate_store_path(store_path=store_path)
+        request = DeleteTableRequest(table_path=store_path)
+        LOG.debug('Sending DELETE STORE request to the server. Request body: %s', request)
+        response = await self.__connection.DeleteTable(request)
+        LOG.debug('Got DELETE STORE response from the server. Response body: %s', response)
+        return OJAIConnection.validate_response(response=response)
+
+    async def get_or_create_store(self, store_path):
+        if await self.is_store_exists(store_path=store_path):
+            return self.__new_store(store_path=store_path)
+        else:
+            return await self.create_store(store_path=store_path)
+
+    async def get_store(self, store_path):
+        LOG.debug('Trying to get store %s from the server.', store_path)
+        if await self.is_store_exists(store_path=store_path):
+            return self.__new_store(store_path=store_path)
+        else:
+            raise StoreNotFoundError(m='Store {0} not found.'.format(store_path))
+
+    def __new_store(self, store_path):
+        return AsyncOJAIDocumentStore(url=self.__url,
+                                      store_path=store_path,
+                                      connection=self.__connection,
+                                      retry_config=self.__retry_config,
+                                      json_codec=self.__json_codec)
+
+    def new_document(self, json_string=None, dictionary=None):
+        doc = OJAIDocument()
+
+        if json_string is None and dictionary is None:
+            return doc
+        elif dictionary is not None and isinstance(dictionary, dict):
+            doc.from_dict(dictionary)
+        elif json_string is not None \
+                and isinstance(json_string, basestring):
+            doc.from_dict(json.loads(json_string))
+        else:
+            raise IllegalArgumentError(
+                m='Optional parameters for document can be only string or dictionary.')
+
+        return doc
+
+    def new_mutation(self):
+        return OJAIDocumentMutation()
+
+    def new_condition(self):
+        return OJAIQueryCondition()
+
+    def new_query(self, query_json=None):
+        ojai_query = OJAIQuery()
+        if query_json is not None:
+            ojai_query.from_json(query_json)
+        return ojai_query
+
+    async def close(self):
+        await self.__channel.close()
+
+    async def __aenter__(self):
+        await self.ping()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
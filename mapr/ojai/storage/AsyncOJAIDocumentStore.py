@@ -0,0 +1,195 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+from builtins import *
+from past.builtins import *
+
+from ojai.store.DocumentStore import DocumentStore
+
+from mapr.ojai.exceptions.DocumentNotFoundError import DocumentNotFoundError
+from mapr.ojai.exceptions.IllegalArgumentError import IllegalArgumentError
+from mapr.ojai.ojai.AsyncOJAIQueryResult import AsyncOJAIQueryResult
+from mapr.ojai.ojai.OJAIDocument import OJAIDocument
+from mapr.ojai.storage.OJAIDocumentStore import OJAIDocumentStore
+from mapr.ojai.storage.OJAIRequestBuilder import OJAIRequestBuilder
+from mapr.ojai.utils.aio_retry_utils import aio_retry
+import logging
+
+LOG = logging.getLogger(__name__)
+
+
+class AsyncOJAIDocumentStore(DocumentStore):
+    """asyncio version of OJAIDocumentStore built on a grpc.aio channel.
+    All operations are coroutines, find returns AsyncOJAIQueryResult."""
+
+    def __init__(self, url, store_path, connection, retry_config, json_codec=None):
+        self.__url = url
+        self.__store_path = store_path
+        self.__json_codec = json_codec
+        self.__request_builder = OJAIRequestBuilder(store_path=store_path,
+                                                    json_codec=json_codec)
+        self.__connection = connection
+        self.__retry_config = retry_config
+        self.__configure_retry(self.__retry_config)
+
+    def __configure_retry(self, retry_config):
+        retry_dec = aio_retry(retry_config)
+        self.find_by_id = retry_dec(self.find_by_id)
+        self.find = retry_dec(self.find)
+        # insert_or_replace, insert, replace, check_and_replace, delete and check_and_delete
+        # send every document through these, a failed document is retried alone
+        self.__evaluate_doc = retry_dec(self.__evaluate_doc)
+        self.__evaluate_delete = retry_dec(self.__evaluate_delete)
+        self.update = retry_dec(self.update)
+        self.check_and_update = retry_dec(self.check_and_update)
+        self.increment = retry_dec(self.increment)
+
+    async def find_by_id(self, _id, field_paths=None, condition=None,
+                         results_as_document=False, timeout=None):
+        request = self.__request_builder.find_by_id_request(_id=_id,
+                                                            field_paths=field_paths,
+                                                            condition=condition)
+        LOG.debug('Sending FIND BY ID request to the server. Request body: %s', request)
+        response = await self.__connection.FindById(request, timeout=timeout)
+        LOG.debug('Got FIND BY ID response from the server. Response body: %s', response)
+        return OJAIDocumentStore.build_find_by_id_result(response=response,
+                                                         results_as_document=results_as_document,
+                                                         json_codec=self.__json_codec)
+
+    async def find(self, query=None, options=None):
+        if options is None:
+            options = {}
+        query_str = self.__request_builder.get_query_str(query)
+        include_query_plan, timeout, result_as_document = \
+            OJAIRequestBuilder.parse_find_options(options)
+        request = self.__request_builder.find_request(query_str=query_str,
+                                                      include_query_plan=include_query_plan)
+        LOG.debug('Sending FIND request to the server. Request body: %s',
+                  request)
+        call = self.__connection.Find(request, timeout=timeout)
+        query_result = AsyncOJAIQueryResult(call=call,
+                                            results_as_document=result_as_document,
+                                            include_query_plan=include_query_plan,
+                                            json_codec=self.__json_codec)
+        await query_result.prefetch()
+        return query_result
+
+    async def __evaluate_doc_stream(self, doc_stream, operation_type):
+        LOG.debug('Start sending documents on the server.')
+        for doc in doc_stream:
+            await self.__evaluate_doc(doc_str=self.__request_builder.get_stream_doc_str(doc),
+                                      operation_type=operation_type)
+
+    async def __evaluate_doc(self, doc_str, operation_type, condition=None):
+        request = self.__request_builder.insert_or_replace_request(doc_str=doc_str,
+                                                                   operation_type=operation_type,
+                                                                   condition=condition)
+        LOG.debug('Sending %s request to the server. Request body: %s',
+                  operation_type,
+                  request)
+        response = await self.__connection.InsertOrReplace(request)
+        LOG.debug('Got %s response from the server. Response body: %s',
+                  operation_type,
+                  response)
+        OJAIDocumentStore.validate_response(response=response)
+
+    async def insert_or_replace(self, doc=None, _id=None, field_as_key=None,
+                                doc_stream=None):
+        if doc_stream is None:
+            doc_str = self.__request_builder.get_doc_str(doc=doc, _id=_id)
+            await self.__evaluate_doc(doc_str=doc_str,
+                                      operation_type='INSERT_OR_REPLACE')
+        else:
+            await self.__evaluate_doc_stream(doc_stream, 'INSERT_OR_REPLACE')
+
+    async def insert(self, doc=None, _id=None, field_as_key=None, doc_stream=None):
+        if doc_stream is None:
+            doc_str = self.__request_builder.get_doc_str(doc=doc, _id=_id)
+            await self.__evaluate_doc(doc_str=doc_str, operation_type='INSERT')
+        else:
+            await self.__evaluate_doc_stream(doc_stream, 'INSERT')
+
+    async def replace(self, doc=None, _id=None, field_as_key=None, doc_stream=None):
+        if doc_stream is None:
+            doc_str = self.__request_builder.get_doc_str(doc=doc, _id=_id)
+            await self.__evaluate_doc(doc_str=doc_str, operation_type='REPLACE')
+        else:
+            await self.__evaluate_doc_stream(doc_stream, 'REPLACE')
+
+    async def __evaluate_delete(self, doc_string, condition=None):
+        request = self.__request_builder.delete_request(doc_str=doc_string,
+                                                        condition=condition)
+        LOG.debug('Sending DELETE request to the server. Request body: %s', request)
+        response = await self.__connection.Delete(request)
+        LOG.debug('Got DELETE response from the server. Response body: %s', response)
+        OJAIDocumentStore.validate_response(response)
+
+    async def delete(self, doc=None, _id=None, field_as_key=None, doc_stream=None):
+        if doc is not None:
+            await self.__evaluate_delete(self.__request_builder.get_delete_doc_str(doc))
+        elif _id is not None:
+            if not isinstance(_id, (basestring, bytearray)):
+                raise IllegalArgumentError(m="Invalid type of the _id parameter.")
+            await self.__evaluate_delete(self.__request_builder.get_id_str(_id))
+        elif doc_stream is not None:
+            if not isinstance(doc_stream, list):
+                raise IllegalArgumentError(
+                    m="Invalid type of the doc_stream parameter.")
+            for stream_doc in doc_stream:
+                await self.__evaluate_delete(self.__request_builder.get_delete_doc_str(stream_doc))
+        else:
+            raise IllegalArgumentError(m="Invalid set of the parameters.")
+
+    async def __execute_update(self, _id, mutation, condition=None):
+        request = self.__request_builder.update_request(doc_str=_id,
+                                                        mutation=mutation,
+                                                        condition=condition)
+        LOG.debug('Sending UPDATE request to the server. Request body: %s', request)
+        response = await self.__connection.Update(request)
+        LOG.debug('Got UPDATE response from the server. Response body: %s', response)
+        OJAIDocumentStore.validate_response(response=response)
+
+    async def update(self, _id, mutation):
+        await self.__execute_update(_id=self.__request_builder.get_id_str(_id),
+                                    mutation=self.__request_builder.get_str_mutation(mutation))
+
+    async def increment(self, _id, field, inc):
+        from mapr.ojai.document.OJAIDocumentMutation import \
+            OJAIDocumentMutation
+        str_mutation = self.__request_builder.get_str_mutation(OJAIDocumentMutation()
+                                                               .increment(field_path=field,
+                                                                          inc=inc))
+        await self.__execute_update(_id=self.__request_builder.get_id_str(_id),
+                                    mutation=str_mutation)
+
+    async def check_and_update(self, _id, query_condition, mutation):
+        str_condition = self.__request_builder.get_str_condition(query_condition)
+        try:
+            await self.__execute_update(_id=self.__request_builder.get_id_str(_id),
+                                        mutation=self.__request_builder.get_str_mutation(mutation),
+                                        condition=str_condition)
+        except DocumentNotFoundError:
+            return False
+        return True
+
+    async def check_and_delete(self, _id, condition):
+        str_condition = self.__request_builder.get_str_condition(
+            condition=condition)
+        await self.__evaluate_delete(self.__request_builder.get_id_str(_id),
+                                     condition=str_condition)
+
+    async def check_and_replace(self, doc, condition, _id=None):
+        if _id is not None and isinstance(doc, OJAIDocument):
+            doc.set_id(_id=_id)
+        doc_str = self.__request_builder.get_doc_str(doc=doc, _id=_id)
+        str_condition = self.__request_builder.get_str_condition(
+            condition=condition)
+        try:
+            await self.__evaluate_doc(doc_str=doc_str, operation_type='REPLACE',
+                                      condition=str_condition)
+        except DocumentNotFoundError:
+            return False
+        return True
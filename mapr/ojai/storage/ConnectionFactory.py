@@ -7,15 +7,20 @@ standard_library.install_aliases()
 from builtins import *
 from builtins import object
 from mapr.ojai.storage.OJAIConnection import OJAIConnection
+from mapr.ojai.storage.OJAIConnectionCache import OJAIConnectionCache
 
 
 class ConnectionFactory(object):
 
+    __cache = OJAIConnectionCache(
+        connection_factory=lambda connection_str, options: OJAIConnection(
+            connection_str=connection_str, options=options))
+
     def __init__(self):
         pass
 
     @staticmethod
-    def get_connection(connection_str, options=None):
+    def get_connection(connection_str, options=None, cached=False):
         """
         Connection factory for OJAIConnection.
         Example:
@@ -32,6 +37,18 @@ class ConnectionFactory(object):
                                           options=options)
         :param connection_str: connection string
         :param options: options as dict
+        :param cached: if True, share one connection per connection string and options
+        within the process. close() of the returned connection releases it, a
+        connection unused for 5 minutes is closed by the next cached get_connection
+        or close().
         :return: OJAIConnection instance
         """
+        if cached:
+            return ConnectionFactory.__cache.get(connection_str=connection_str,
+                                                 options=options)
         return OJAIConnection(connection_str=connection_str, options=options)
+
+    @staticmethod
+    def clear_cache():
+        """Closes all connections created with cached=True."""
+        ConnectionFactory.__cache.clear()
@@ -0,0 +1,196 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+from builtins import *
+from builtins import object
+import threading
+import time
+
+import grpc
+
+from mapr.ojai.exceptions.IllegalArgumentError import IllegalArgumentError
+from mapr.ojai.proto.gen.maprdb_server_pb2_grpc import MapRDbServerStub
+import logging
+
+LOG = logging.getLogger(__name__)
+DEFAULT_CHANNEL_POOL_SIZE = 1
+# seconds a gateway is skipped after a call to it failed with UNAVAILABLE
+DEFAULT_UNHEALTHY_INTERVAL = 5.0
+# weight of the last call in the latency moving average
+LATENCY_SMOOTHING = 0.3
+
+# Load balancing policies accepted by the ojai.mapr.rpc.load-balancing option
+LOAD_BALANCING_LEAST_IN_FLIGHT = 'least-in-flight'
+LOAD_BALANCING_ROUND_ROBIN = 'round-robin'
+LOAD_BALANCING_PICK_FIRST = 'pick-first'
+LOAD_BALANCING_LATENCY = 'latency'
+LOAD_BALANCING_POLICIES = (LOAD_BALANCING_LEAST_IN_FLIGHT,
+                           LOAD_BALANCING_ROUND_ROBIN,
+                           LOAD_BALANCING_PICK_FIRST,
+                           LOAD_BALANCING_LATENCY)
+DEFAULT_LOAD_BALANCING = LOAD_BALANCING_LEAST_IN_FLIGHT
+
+
+class OJAIChannelPool(object):
+    """Pool of gRPC channels with a MapRDbServerStub each, used in place of a single stub.
+    size channels are opened to every target (gateway host:port) and each call
+    goes to a channel chosen by the load balancing policy:
+    least-in-flight - fewest calls in flight, round-robin on ties;
+    round-robin - next channel in turn;
+    pick-first - first healthy target in the list, others are standby;
+    latency - lowest moving average call latency multiplied by calls in flight.
+    A target whose call failed with UNAVAILABLE is ejected for unhealthy_interval
+    seconds, so the retry of the call by the retry policy goes to another target."""
+
+    def __init__(self, channel_factory, targets, size=DEFAULT_CHANNEL_POOL_SIZE,
+                 load_balancing=DEFAULT_LOAD_BALANCING,
+                 unhealthy_interval=DEFAULT_UNHEALTHY_INTERVAL):
+        """:param channel_factory: callable returning new intercepted channel for a target."""
+        if load_balancing not in LOAD_BALANCING_POLICIES:
+            raise IllegalArgumentError(m='Unknown load balancing policy {0}, supported: {1}.'
+                                       .format(load_balancing, ', '.join(LOAD_BALANCING_POLICIES)))
+        self.__targets = [target for target in targets for _ in range(size)]
+        self.__channels = [channel_factory(target) for target in self.__targets]
+        self.__stubs = [MapRDbServerStub(channel) for channel in self.__channels]
+        self.__in_flight = [0] * len(self.__stubs)
+        self.__latency = [0.0] * len(self.__stubs)
+        self.__unhealthy_until = dict((target, 0.0) for target in targets)
+        self.__unhealthy_interval = unhealthy_interval
+        self.__select = {
+            LOAD_BALANCING_LEAST_IN_FLIGHT: self.__least_in_flight,
+            LOAD_BALANCING_ROUND_ROBIN: self.__round_robin,
+            LOAD_BALANCING_PICK_FIRST: self.__pick_first,
+            LOAD_BALANCING_LATENCY: self.__lowest_latency,
+        }[load_balancing]
+        self.__next = 0
+        self.__lock = threading.Lock()
+        self.__methods = {}
+
+    @property
+    def size(self):
+        return len(self.__stubs)
+
+    @property
+    def channels(self):
+        return list(self.__channels)
+
+    @property
+    def targets(self):
+        return list(self.__unhealthy_until)
+
+    def in_flight(self):
+        with self.__lock:
+            return list(self.__in_flight)
+
+    def is_healthy(self, target):
+        return self.__unhealthy_until[target] <= time.time()
+
+    def __getattr__(self, name):
+        # stub methods, e.g. pool.FindById(request, timeout=timeout)
+        if name.startswith('_'):
+            raise AttributeError(name)
+        method = self.__methods.get(name)
+        if method is None:
+            if not hasattr(self.__stubs[0], name):
+                raise AttributeError(name)
+            method = lambda *args, **kwargs: self.__invoke(name, args, kwargs)
+            # non-blocking unary calls, e.g. pool.FindById.future(request, timeout=timeout)
+            method.future = lambda *args, **kwargs: self.__invoke(name, args, kwargs, True)
+            self.__methods[name] = method
+        return method
+
+    def probe(self, ping):
+        """Calls ping(stub) once per target and ejects targets where it raised UNAVAILABLE.
+        :raises grpc.RpcError: ping failed on every target."""
+        error = None
+        healthy = 0
+        for target in self.targets:
+            index = self.__targets.index(target)
+            try:
+                ping(self.__stubs[index])
+                self.__mark(target, grpc.StatusCode.OK)
+                healthy += 1
+            except grpc.RpcError as e:
+                self.__mark(target, e.code())
+                error = e
+        if healthy == 0 and error is not None:
+            raise error
+        return healthy
+
+    def __least_in_flight(self, candidates):
+        size = len(self.__stubs)
+        start = self.__next
+        return min(candidates, key=lambda i: (self.__in_flight[i], (i - start) % size))
+
+    def __round_robin(self, candidates):
+        size = len(self.__stubs)
+        start = self.__next
+        return min(candidates, key=lambda i: (i - start) % size)
+
+    def __pick_first(self, candidates):
+        first_target = self.__targets[candidates[0]]
+        return self.__least_in_flight([i for i in candidates
+                                       if self.__targets[i] == first_target])
+
+    def __lowest_latency(self, candidates):
+        # channels without measured calls have zero latency and are tried first
+        size = len(self.__stubs)
+        start = self.__next
+        return min(candidates, key=lambda i: (self.__latency[i] * (self.__in_flight[i] + 1),
+                                              (i - start) % size))
+
+    def __acquire(self):
+        with self.__lock:
+            now = time.time()
+            indexes = list(range(len(self.__stubs)))
+            candidates = [i for i in indexes
+                          if self.__unhealthy_until[self.__targets[i]] <= now]
+            index = self.__select(candidates or indexes)
+            self.__next = (index + 1) % len(self.__stubs)
+            self.__in_flight[index] += 1
+            return index
+
+    def __mark(self, target, code):
+        if code == grpc.StatusCode.UNAVAILABLE:
+            LOG.debug('Gateway %s is unavailable.', target)
+            self.__unhealthy_until[target] = time.time() + self.__unhealthy_interval
+        elif code == grpc.StatusCode.OK:
+            self.__unhealthy_until[target] = 0.0
+
+    def __release(self, index, code=None, started=None):
+        with self.__lock:
+            self.__in_flight[index] -= 1
+            if started is not None:
+                self.__latency[index] += \
+                    LATENCY_SMOOTHING * (time.time() - started - self.__latency[index])
+            self.__mark(self.__targets[index], code)
+
+    def __invoke(self, name, args, kwargs, future=False):
+        # failed calls are not repeated here, the retry policy counts every attempt
+        # against its attempts, budget and deadline
+        index = self.__acquire()
+        started = time.time()
+        try:
+            method = getattr(self.__stubs[index], name)
+            response = (method.future if future else method)(*args, **kwargs)
+        except grpc.RpcError as e:
+            self.__release(index, e.code())
+            raise
+        except Exception:
+            self.__release(index)
+            raise
+        if isinstance(response, grpc.Future) and hasattr(response, 'add_callback'):
+            # Find streams and future() calls stay in flight until they complete
+            started = started if future else None
+            if not response.add_callback(lambda: self.__release(index, response.code(), started)):
+                self.__release(index, response.code(), started)
+        else:
+            self.__release(index, grpc.StatusCode.OK, started)
+        return response
+
+    def close(self):
+        for channel in self.__channels:
+            channel.close()
@@ -0,0 +1,147 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+from builtins import *
+from builtins import object
+import threading
+import time
+
+import grpc
+
+from mapr.ojai.exceptions.CircuitBreakerOpenError import CircuitBreakerOpenError
+import logging
+
+LOG = logging.getLogger(__name__)
+# consecutive failed calls that open the circuit, 0 disables the circuit breaker
+DEFAULT_FAILURE_THRESHOLD = 0
+# status codes of the calls counted as failures
+DEFAULT_FAILURE_CODES = (grpc.StatusCode.UNAVAILABLE,)
+# seconds the circuit stays open before the gateway is probed
+DEFAULT_OPEN_INTERVAL = 10.0
+
+CIRCUIT_CLOSED = 'closed'
+CIRCUIT_OPEN = 'open'
+CIRCUIT_HALF_OPEN = 'half-open'
+
+
+class OJAICircuitBreaker(object):
+    """Circuit breaker used in place of the stub, fails calls fast while the gateway is down.
+    closed - calls go to the stub, failure_threshold consecutive calls failed with
+    one of failure_codes (UNAVAILABLE by default) open the circuit;
+    open - calls raise CircuitBreakerOpenError without reaching the gateway,
+    the first call open_interval seconds after the circuit opened half-opens it;
+    half-open - that call runs probe() (Ping), the circuit closes and the call is sent
+    if it succeeds, otherwise the circuit opens again. Other calls fail fast meanwhile.
+    Listeners are called with the old and the new state on every change."""
+
+    def __init__(self, stub, probe, failure_threshold,
+                 open_interval=DEFAULT_OPEN_INTERVAL, listeners=(),
+                 failure_codes=DEFAULT_FAILURE_CODES):
+        """:param stub: MapRDbServerStub or OJAIChannelPool
+        :param probe: callable raising an error if the gateway is not available
+        :param failure_codes: grpc.StatusCode of the calls counted as failures"""
+        self.__stub = stub
+        self.__probe = probe
+        self.__failure_threshold = failure_threshold
+        self.__open_interval = open_interval
+        self.__listeners = list(listeners)
+        self.__failure_codes = frozenset(failure_codes)
+        self.__state = CIRCUIT_CLOSED
+        self.__failures = 0
+        self.__opened_at = 0.0
+        self.__lock = threading.Lock()
+        self.__methods = {}
+
+    @property
+    def state(self):
+        return self.__state
+
+    def add_listener(self, listener):
+        """:param listener: callable(old_state, new_state)"""
+        self.__listeners.append(listener)
+
+    def __getattr__(self, name):
+        # stub methods, e.g. breaker.FindById(request, timeout=timeout)
+        if name.startswith('_'):
+            raise AttributeError(name)
+        method = self.__methods.get(name)
+        if method is None:
+            if not hasattr(self.__stub, name):
+                raise AttributeError(name)
+            method = lambda *args, **kwargs: self.__invoke(name, args, kwargs)
+            # non-blocking unary calls, e.g. breaker.FindById.future(request, timeout=timeout)
+            method.future = lambda *args, **kwargs: self.__invoke(name, args, kwargs, True)
+            self.__methods[name] = method
+        return method
+
+    def __change_state(self, state):
+        """Must be called with the lock held, returns the change for __notify."""
+        old_state, self.__state = self.__state, state
+        if state == CIRCUIT_OPEN:
+            self.__opened_at = time.time()
+        elif state == CIRCUIT_CLOSED:
+            self.__failures = 0
+        LOG.debug('Circuit breaker changed from %s to %s.', old_state, state)
+        return old_state, state
+
+    def __notify(self, change):
+        if change is None or change[0] == change[1]:
+            return
+        for listener in self.__listeners:
+            try:
+                listener(*change)
+            except Exception:
+                LOG.exception('Circuit breaker listener failed.')
+
+    def __before_call(self):
+        with self.__lock:
+            if self.__state == CIRCUIT_CLOSED:
+                return
+            if self.__state == CIRCUIT_HALF_OPEN \
+                    or time.time() < self.__opened_at + self.__open_interval:
+                raise CircuitBreakerOpenError(m='Circuit breaker is open, gateway is unavailable.')
+            change = self.__change_state(CIRCUIT_HALF_OPEN)
+        self.__notify(change)
+        try:
+            self.__probe()
+        except Exception as e:
+            with self.__lock:
+                change = self.__change_state(CIRCUIT_OPEN)
+            self.__notify(change)
+            raise CircuitBreakerOpenError(m='Circuit breaker is open, gateway is unavailable: {0}'
+                                          .format(e))
+        with self.__lock:
+            change = self.__change_state(CIRCUIT_CLOSED)
+        self.__notify(change)
+
+    def __record(self, code):
+        if code == grpc.StatusCode.CANCELLED:
+            return
+        change = None
+        with self.__lock:
+            if code not in self.__failure_codes:
+                self.__failures = 0
+                return
+            self.__failures += 1
+            if self.__state == CIRCUIT_CLOSED and self.__failures >= self.__failure_threshold:
+                change = self.__change_state(CIRCUIT_OPEN)
+        self.__notify(change)
+
+    def __invoke(self, name, args, kwargs, future=False):
+        self.__before_call()
+        try:
+            method = getattr(self.__stub, name)
+            response = (method.future if future else method)(*args, **kwargs)
+        except grpc.RpcError as e:
+            self.__record(e.code())
+            raise
+        if isinstance(response, grpc.Future) and hasattr(response, 'add_callback'):
+            # outcome of a Find stream or a future() call is known when it completes
+            if not response.add_callback(lambda: self.__record(response.code())):
+                self.__record(response.code())
+        else:
+            self.__record(grpc.StatusCode.OK)
+        return response
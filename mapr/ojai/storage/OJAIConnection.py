@@ -4,6 +4,8 @@ from __future__ import division
 from __future__ import absolute_import
 
 import re
+import threading
+import time
 
 from builtins import *
 from past.builtins import *
@@ -13,9 +15,7 @@ import base64
 import json
 
 import grpc
-from grpc._channel import _Rendezvous
 from ojai.store.Connection import Connection
-from retrying import retry
 
 from mapr.ojai.document.OJAIDocumentMutation import OJAIDocumentMutation
 from mapr.ojai.exceptions.ClusterNotFoundError import ClusterNotFoundError
@@ -26,19 +26,33 @@ from mapr.ojai.exceptions.StoreAlreadyExistsError import StoreAlreadyExistsError
 from mapr.ojai.exceptions.StoreNotFoundError import StoreNotFoundError
 from mapr.ojai.exceptions.UnknownServerError import UnknownServerError
 from mapr.ojai.ojai.OJAIDocument import OJAIDocument
+from mapr.ojai.storage.OJAIDocumentCache import OJAIDocumentCache, \
+    DEFAULT_DOCUMENT_CACHE_MAX_ENTRIES, DEFAULT_DOCUMENT_CACHE_MAX_BYTES, DEFAULT_DOCUMENT_CACHE_TTL
 from mapr.ojai.storage.OJAIDocumentStore import OJAIDocumentStore
+from mapr.ojai.storage.OJAIHedgingPolicy import OJAIHedgingPolicy, DEFAULT_HEDGE_PERCENTILE
+from mapr.ojai.storage.OJAISingleFlight import OJAISingleFlight
 from mapr.ojai.ojai_query.OJAIQuery import OJAIQuery
 from mapr.ojai.ojai_query.OJAIQueryCondition import OJAIQueryCondition
 from mapr.ojai.proto.gen.maprdb_server_pb2 import CreateTableRequest, \
     ErrorCode, TableExistsRequest, DeleteTableRequest, PingRequest
 from mapr.ojai.proto.gen.maprdb_server_pb2_grpc import MapRDbServerStub
 from mapr.ojai.storage import auth_interceptor
-from mapr.ojai.utils.retry_utils import retry_if_connection_not_established, RetryOptions, \
-    DEFAULT_WAIT_EXPONENTIAL_MULTIPLIER, DEFAULT_WAIT_EXPONENTIAL_MAX, DEFAULT_STOP_MAX_ATTEMPT
+from mapr.ojai.storage.OJAIChannelPool import OJAIChannelPool, DEFAULT_CHANNEL_POOL_SIZE, \
+    DEFAULT_LOAD_BALANCING
+from mapr.ojai.storage.OJAICircuitBreaker import OJAICircuitBreaker, \
+    DEFAULT_FAILURE_THRESHOLD, DEFAULT_OPEN_INTERVAL, DEFAULT_FAILURE_CODES
+from mapr.ojai.utils.channel_utils import get_channel_options, ChannelOptions
+from mapr.ojai.utils.json_codec import get_json_codec, DEFAULT_JSON_CODEC
+from mapr.ojai.utils.retry_utils import policy_retry, get_retry_policy, get_rpc_deadlines, \
+    call_timeout
 import urllib.parse
 import logging
 
 LOG = logging.getLogger(__name__)
+# seconds a store returned by get_store is reused without TableExists request, 0 disables
+DEFAULT_STORE_CACHE_TTL = 0
+# seconds the gateway has to answer Ping
+DEFAULT_PING_TIMEOUT = 10.0
 
 
 class OJAIConnection(Connection):
@@ -50,26 +64,65 @@ class OJAIConnection(Connection):
 
         if not isinstance(options, dict):
             raise TypeError('Options type must be dict.')
-        self.__retry_config = \
-            RetryOptions(options.get('ojai.mapr.rpc.wait-multiplier',
-                                     DEFAULT_WAIT_EXPONENTIAL_MULTIPLIER),
-                         options.get('ojai.mapr.rpc.wait-max-attempt',
-                                     DEFAULT_WAIT_EXPONENTIAL_MAX),
-                         options.get('ojai.mapr.rpc.max-retries',
-                                     DEFAULT_STOP_MAX_ATTEMPT))
+        self.__retry_config = get_retry_policy(options)
+        self.__deadlines = get_rpc_deadlines(options)
+        self.__json_codec = get_json_codec(options.get('ojai.mapr.json-codec',
+                                                       DEFAULT_JSON_CODEC))
+        self.__channel_options = get_channel_options(options)
+        self.__store_cache_ttl = options.get('ojai.mapr.store-cache-ttl',
+                                             DEFAULT_STORE_CACHE_TTL)
+        if not isinstance(self.__store_cache_ttl, (int, float)) or self.__store_cache_ttl < 0:
+            raise IllegalArgumentError(m='Store cache TTL must be non-negative number.')
+        self.__stores = {}
+        self.__document_cache_options = (
+            options.get('ojai.mapr.document-cache.max-entries',
+                        DEFAULT_DOCUMENT_CACHE_MAX_ENTRIES),
+            options.get('ojai.mapr.document-cache.max-bytes',
+                        DEFAULT_DOCUMENT_CACHE_MAX_BYTES),
+            options.get('ojai.mapr.document-cache.ttl',
+                        DEFAULT_DOCUMENT_CACHE_TTL))
+        self.__single_flight = options.get('ojai.mapr.single-flight', False)
+        self.__single_flight_find = options.get('ojai.mapr.single-flight.find', False)
+        self.__hedging = OJAIConnection.__create_hedging_policy(options)
+        for value in self.__document_cache_options:
+            if not isinstance(value, (int, float)) or value < 0:
+                raise IllegalArgumentError(m='Document cache options must be non-negative numbers.')
+        self.__stores_lock = threading.Lock()
         self.__url, self.__auth, self.__encoded_user_metadata, self.__ssl, \
-        self.__ssl_ca, self.__ssl_target_name_override = OJAIConnection.__parse_connection_url(
+        self.__ssl_ca, self.__ssl_target_name_override = OJAIConnection.parse_connection_url(
             connection_str=connection_str)
 
-        self.__channel = OJAIConnection.__get_channel(self.__url,
-                                                      self.__ssl,
-                                                      self.__ssl_ca,
-                                                      self.__ssl_target_name_override,
-                                                      self.__encoded_user_metadata)
-
-        self.__connection = MapRDbServerStub(self.__channel)
+        self.__user_metadata = []
+        gateways = OJAIConnection.parse_gateways(self.__url)
+        channel_pool_size = options.get('ojai.mapr.rpc.channel-pool-size',
+                                        DEFAULT_CHANNEL_POOL_SIZE)
+        if not isinstance(channel_pool_size, int) or channel_pool_size < 1:
+            raise IllegalArgumentError(m='Channel pool size must be positive int.')
+        if channel_pool_size == 1 and len(gateways) == 1:
+            self.__channel = self.__new_channel(self.__url)
+            self.__connection = MapRDbServerStub(self.__channel)
+        else:
+            self.__channel = OJAIChannelPool(channel_factory=self.__new_channel,
+                                             targets=gateways,
+                                             size=channel_pool_size,
+                                             load_balancing=options.get(
+                                                 'ojai.mapr.rpc.load-balancing',
+                                                 DEFAULT_LOAD_BALANCING))
+            self.__connection = self.__channel
+        self.__stub = self.__connection
+        self.__circuit_breaker = self.__create_circuit_breaker(options)
+        if self.__circuit_breaker is not None:
+            self.__connection = self.__circuit_breaker
         self.__configure_retry(self.__retry_config)
-        self.__ping_connection(self.__connection)
+        self.__ready = False
+        self.__ready_futures = []
+        if options.get('ojai.mapr.rpc.lazy-connect', False):
+            # channels connect in background, RPCs and wait_until_ready wait for them
+            self.__ready_futures = [grpc.channel_ready_future(channel)
+                                    for channel in self.__channels()]
+        else:
+            self.__ping_connection(self.__stub)
+            self.__ready = True
         LOG.debug('Connection was created'
                   ' for %s with options auth:%s, ssl:%s, sslTargetNameOverride:%s',
                   self.__url,
@@ -77,29 +130,131 @@ class OJAIConnection(Connection):
                   self.__ssl,
                   self.__ssl_target_name_override)
 
+    def __create_circuit_breaker(self, options):
+        failure_threshold = options.get('ojai.mapr.circuit-breaker.failure-threshold',
+                                        DEFAULT_FAILURE_THRESHOLD)
+        open_interval = options.get('ojai.mapr.circuit-breaker.open-interval',
+                                    DEFAULT_OPEN_INTERVAL)
+        listener = options.get('ojai.mapr.circuit-breaker.listener')
+        failure_codes = options.get('ojai.mapr.circuit-breaker.failure-status-codes',
+                                    [code.name for code in DEFAULT_FAILURE_CODES])
+        if not isinstance(failure_threshold, int) or failure_threshold < 0:
+            raise IllegalArgumentError(m='Circuit breaker failure threshold must be non-negative int.')
+        if not isinstance(open_interval, (int, float)) or open_interval <= 0:
+            raise IllegalArgumentError(m='Circuit breaker open interval must be positive number.')
+        if listener is not None and not callable(listener):
+            raise IllegalArgumentError(m='Circuit breaker listener must be callable.')
+        if isinstance(failure_codes, basestring) or not failure_codes \
+                or any(name not in grpc.StatusCode.__members__ for name in failure_codes):
+            raise IllegalArgumentError(m='Circuit breaker failure status codes must be '
+                                         'a list of status code names.')
+        if failure_threshold == 0:
+            return None
+        stub = self.__stub
+        # probes are not retried, the breaker fails fast while the gateway is down
+        return OJAICircuitBreaker(stub=stub,
+                                  probe=lambda: OJAIConnection.__ping_connection(self, stub),
+                                  failure_threshold=failure_threshold,
+                                  open_interval=open_interval,
+                                  listeners=[listener] if listener is not None else [],
+                                  failure_codes=[grpc.StatusCode[name] for name in failure_codes])
+
+    @staticmethod
+    def __create_hedging_policy(options):
+        if not options.get('ojai.mapr.hedged-reads', False):
+            return None
+        delay = options.get('ojai.mapr.hedged-reads.delay-milliseconds')
+        percentile = options.get('ojai.mapr.hedged-reads.percentile', DEFAULT_HEDGE_PERCENTILE)
+        if delay is not None and (not isinstance(delay, (int, float)) or delay < 0):
+            raise IllegalArgumentError(m='Hedge delay must be non-negative number.')
+        if not isinstance(percentile, int) or not 0 < percentile < 100:
+            raise IllegalArgumentError(m='Hedge percentile must be int between 0 and 100.')
+        return OJAIHedgingPolicy(delay=delay / 1000.0 if delay is not None else None,
+                                 percentile=percentile)
+
+    @property
+    def circuit_breaker(self):
+        """OJAICircuitBreaker of the connection or None if it is disabled."""
+        return self.__circuit_breaker
+
+    def __new_channel(self, url):
+        user_metadata = auth_interceptor._UserMetadata(self.__encoded_user_metadata)
+        self.__user_metadata.append(user_metadata)
+        return OJAIConnection.__get_channel(url,
+                                            self.__ssl,
+                                            self.__ssl_ca,
+                                            self.__ssl_target_name_override,
+                                            self.__encoded_user_metadata,
+                                            self.__channel_options,
+                                            user_metadata)
+
+    @property
+    def authentications(self):
+        """Number of calls sent with basic credentials and with bearer token,
+        e.g. {'basic': 1, 'bearer': 99}."""
+        return {'basic': sum(user_metadata.basic_authentications
+                             for user_metadata in self.__user_metadata),
+                'bearer': sum(user_metadata.bearer_authentications
+                              for user_metadata in self.__user_metadata)}
+
+    def __channels(self):
+        if isinstance(self.__channel, OJAIChannelPool):
+            return self.__channel.channels
+        return [self.__channel]
+
+    def wait_until_ready(self, timeout=None):
+        """Blocks until a gateway is connected and answers Ping,
+        returns at once if the connection was already checked.
+        :raises ConnectionError: no gateway is connected within timeout seconds."""
+        if self.__ready:
+            return
+        started = time.time()
+        connected = threading.Event()
+        for future in self.__ready_futures:
+            future.add_done_callback(lambda f: connected.set())
+        if not connected.wait(timeout):
+            raise ConnectionError(m='Gateway {0} is not ready after {1} seconds.'
+                                  .format(self.__url, timeout))
+        # Ping and its retries get the time left, no retry starts after it
+        remaining = None if timeout is None else max(timeout - (time.time() - started), 0.0)
+        try:
+            self.__ping_connection(self.__stub, remaining)
+        except grpc.RpcError as e:
+            raise ConnectionError(m='Gateway {0} is not ready after {1} seconds: {2}.'
+                                  .format(self.__url, timeout, e.code()))
+        self.__ready = True
+
     def __configure_retry(self, retry_config):
-        retry_dec = retry(
-            wait_exponential_multiplier=retry_config.wait_exponential_multiplier,
-            wait_exponential_max=retry_config.wait_exponential_max,
-            stop_max_attempt_number=retry_config.stop_max_attempt_number,
-            retry_on_exception=retry_if_connection_not_established
-        )
+        retry_dec = policy_retry(retry_config)
         self.__ping_connection = retry_dec(self.__ping_connection)
         self.create_store = retry_dec(self.create_store)
         self.is_store_exists = retry_dec(self.is_store_exists)
         self.delete_store = retry_dec(self.delete_store)
 
-    def __ping_connection(self, connection):
+    def __ping_connection(self, connection, timeout=None):
+        """:param timeout: seconds shared by the Ping retries, None for DEFAULT_PING_TIMEOUT
+        per attempt"""
+        if isinstance(connection, OJAIChannelPool):
+            # ejects gateways that do not answer, fails only if none answers
+            connection.probe(lambda stub: OJAIConnection.__ping_stub(stub, timeout))
+        else:
+            OJAIConnection.__ping_stub(connection, timeout)
+
+    @staticmethod
+    def __ping_stub(connection, timeout=None):
         try:
-            connection.Ping(PingRequest(), timeout=10)
-        except _Rendezvous as e:
+            connection.Ping(PingRequest(), timeout=DEFAULT_PING_TIMEOUT if timeout is None
+                            else call_timeout(timeout))
+        except grpc.RpcError as e:
+            # unary call errors are _InactiveRpcError, not _Rendezvous, in grpcio 1.32+
             if e.code() == grpc.StatusCode.UNAUTHENTICATED:
-                raise ConnectionError(e.details())
-            elif e.code() == grpc.StatusCode.UNAVAILABLE:
+                raise ConnectionError(m=e.details())
+            elif e.code() == grpc.StatusCode.UNAVAILABLE \
+                    or (timeout is not None and e.code() == grpc.StatusCode.DEADLINE_EXCEEDED):
                 raise e
 
     @staticmethod
-    def __parse_connection_url(connection_str):
+    def parse_connection_url(connection_str):
         try:
             url, options = re.sub('ojai:mapr:thin:v1@', '',
                                   connection_str).split('?', 1)
@@ -138,47 +293,76 @@ class OJAIConnection(Connection):
                ssl_ca, \
                ssl_target_name_override
 
+    @staticmethod
+    def parse_gateways(url):
+        """Splits comma separated gateway list, e.g. host1:5678,host2:5678."""
+        gateways = [gateway.strip() for gateway in url.split(',') if gateway.strip()]
+        if not gateways:
+            raise IllegalArgumentError(m='Connection string must contain at least one gateway.')
+        return gateways
+
+    @staticmethod
+    def get_ssl_credentials(ssl_ca):
+        with open(ssl_ca, 'rb') as f:
+            ssl_trust_pem = f.read()
+        return grpc.ssl_channel_credentials(ssl_trust_pem)
+
     @staticmethod
     def __get_channel(url,
                       ssl,
                       ssl_ca,
                       ssl_target_name_override,
-                      encoded_user_metadata):
-        interceptor = auth_interceptor.client_auth_interceptor(encoded_user_metadata)
+                      encoded_user_metadata,
+                      channel_options=None,
+                      user_metadata=None):
+        interceptor = auth_interceptor.client_auth_interceptor(encoded_user_metadata,
+                                                               user_metadata)
+        if channel_options is None:
+            channel_options = ChannelOptions()
+        arguments = list(channel_options.arguments)
         if ssl:
             # Disabling SSL validation is currently not supported by gRPC Python library
             # https://github.com/grpc/grpc/pull/15274
-            with open(ssl_ca, 'rb') as f:
-                ssl_trust_pem = f.read()
-            ssl_credentials = \
-                grpc.ssl_channel_credentials(ssl_trust_pem)
+            ssl_credentials = OJAIConnection.get_ssl_credentials(ssl_ca)
             if ssl_target_name_override:
-                channel = grpc.secure_channel(url,
-                                              ssl_credentials,
-                                              (('grpc.ssl_target_name_override',
-                                                ssl_target_name_override),))
-            else:
-                channel = grpc.secure_channel(url,
-                                              ssl_credentials)
+                arguments.append(('grpc.ssl_target_name_override',
+                                  ssl_target_name_override))
+            channel = grpc.secure_channel(url,
+                                          ssl_credentials,
+                                          tuple(arguments) or None,
+                                          compression=channel_options.compression)
         else:
-            channel = grpc.insecure_channel(url)
+            channel = grpc.insecure_channel(url,
+                                            tuple(arguments) or None,
+                                            compression=channel_options.compression)
         return grpc.intercept_channel(channel, interceptor)
 
-    def create_store(self, store_path):
+    @property
+    def deadlines(self):
+        """RpcDeadlines of the connection and its stores."""
+        return self.__deadlines
+
+    def __ddl_timeout(self, timeout):
+        return call_timeout(self.__deadlines.ddl if timeout is None else timeout)
+
+    def create_store(self, store_path, timeout=None):
+        """:param timeout: seconds, overrides ojai.mapr.rpc.ddl-timeout-milliseconds,
+        the same applies to is_store_exists and delete_store."""
         self.__validate_store_path(store_path=store_path)
+        self.__invalidate_store(store_path=store_path)
         request = CreateTableRequest(table_path=store_path)
         LOG.debug('Sending CREATE STORE request to the server. Request body: %s', request)
-        response = self.__connection.CreateTable(request)
+        response = self.__connection.CreateTable(request, timeout=self.__ddl_timeout(timeout))
         LOG.debug('Got CREATE STORE response from the server. Response body: %s', response)
 
-        if self.__validate_response(response=response):
-            return self.get_store(store_path=store_path)
+        if self.validate_response(response=response):
+            return self.__new_store(store_path=store_path)
 
-    def is_store_exists(self, store_path):
+    def is_store_exists(self, store_path, timeout=None):
         self.__validate_store_path(store_path=store_path)
         request = TableExistsRequest(table_path=store_path)
         LOG.debug('Sending IS STORE EXISTS request to the server. Request body: %s', request)
-        response = self.__connection.TableExists(request)
+        response = self.__connection.TableExists(request, timeout=self.__ddl_timeout(timeout))
         LOG.debug('Got IS STORE EXISTS response from the server. Response body: %s', response)
         if response.error.err_code == ErrorCode.Value('NO_ERROR'):
             return True
@@ -193,16 +377,17 @@ class OJAIConnection(Connection):
         else:
             raise UnknownServerError(m=response.error.error_message)
 
-    def delete_store(self, store_path):
+    def delete_store(self, store_path, timeout=None):
         self.__validate_store_path(store_path=store_path)
+        self.__invalidate_store(store_path=store_path)
         request = DeleteTableRequest(table_path=store_path)
         LOG.debug('Sending DELETE STORE request to the server. Request body: %s', request)
-        response = self.__connection.DeleteTable(request)
+        response = self.__connection.DeleteTable(request, timeout=self.__ddl_timeout(timeout))
         LOG.debug('Got DELETE STORE response from the server. Response body: %s', response)
-        return self.__validate_response(response=response)
+        return self.validate_response(response=response)
 
     @staticmethod
-    def __validate_response(response):
+    def validate_response(response):
         if response.error.err_code == ErrorCode.Value('NO_ERROR'):
             return True
         elif response.error.err_code == ErrorCode.Value('CLUSTER_NOT_FOUND'):
@@ -222,21 +407,73 @@ class OJAIConnection(Connection):
             raise TypeError
 
     def get_or_create_store(self, store_path):
+        store = self.__cached_store(store_path=store_path)
+        if store is not None:
+            return store
         if self.is_store_exists(store_path=store_path):
-            return self.get_store(store_path=store_path)
+            return self.__new_store(store_path=store_path)
         else:
             return self.create_store(store_path=store_path)
 
-    def get_store(self, store_path):
+    def get_store(self, store_path, check_exists=True):
+        """
+        :param check_exists: if False, return the store without TableExists request,
+        StoreNotFoundError is raised by the first operation on a missing store.
+        """
         LOG.debug('Trying to get store %s from the server.', store_path)
+        self.__validate_store_path(store_path=store_path)
+        store = self.__cached_store(store_path=store_path)
+        if store is not None:
+            return store
+        if not check_exists:
+            return self.__create_store_handle(store_path=store_path)
         if self.is_store_exists(store_path=store_path):
-            return OJAIDocumentStore(url=self.__url,
-                                     store_path=store_path,
-                                     connection=self.__connection,
-                                     retry_config=self.__retry_config)
+            return self.__new_store(store_path=store_path)
         else:
             raise StoreNotFoundError(m='Store {0} not found.'.format(store_path))
 
+    def __create_store_handle(self, store_path):
+        max_entries, max_bytes, ttl = self.__document_cache_options
+        document_cache = None
+        if max_entries > 0:
+            document_cache = OJAIDocumentCache(max_entries=max_entries,
+                                               max_bytes=max_bytes,
+                                               ttl=ttl)
+        return OJAIDocumentStore(url=self.__url,
+                                 store_path=store_path,
+                                 connection=self.__connection,
+                                 retry_config=self.__retry_config,
+                                 json_codec=self.__json_codec,
+                                 document_cache=document_cache,
+                                 single_flight=OJAISingleFlight(streams=self.__single_flight_find)
+                                 if self.__single_flight else None,
+                                 hedging=self.__hedging,
+                                 deadlines=self.__deadlines)
+
+    def __new_store(self, store_path):
+        store = self.__create_store_handle(store_path=store_path)
+        if self.__store_cache_ttl > 0:
+            with self.__stores_lock:
+                self.__stores[store_path] = (store, time.time() + self.__store_cache_ttl)
+        return store
+
+    def __cached_store(self, store_path):
+        if self.__store_cache_ttl <= 0:
+            return None
+        with self.__stores_lock:
+            cached = self.__stores.get(store_path)
+            if cached is None:
+                return None
+            store, expires = cached
+            if expires <= time.time():
+                del self.__stores[store_path]
+                return None
+            return store
+
+    def __invalidate_store(self, store_path):
+        with self.__stores_lock:
+            self.__stores.pop(store_path, None)
+
     def new_document(self, json_string=None, dictionary=None):
         doc = OJAIDocument()
 
@@ -266,5 +503,10 @@ class OJAIConnection(Connection):
         return ojai_query
 
     def close(self):
+        for future in self.__ready_futures:
+            future.cancel()
+        if isinstance(self.__channel, OJAIChannelPool):
+            self.__channel.close()
         del self.__channel
         del self.__connection
+        del self.__stub
@@ -0,0 +1,166 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+from builtins import *
+from builtins import object
+import os
+import threading
+import time
+
+import logging
+
+LOG = logging.getLogger(__name__)
+# seconds an unused cached connection is kept open
+DEFAULT_IDLE_TIMEOUT = 300.0
+
+
+class _CacheEntry(object):
+
+    def __init__(self, key):
+        self.key = key
+        self.connection = None
+        self.error = None
+        self.closed = False
+        # set when the connection is created or its creation failed
+        self.ready = threading.Event()
+        # held while the connection is recreated after fork
+        self.lock = threading.Lock()
+        self.pid = os.getpid()
+        self.references = 0
+        self.idle_since = time.time()
+
+
+class _CachedConnection(object):
+    """Handle to a shared connection, close() releases it instead of closing it."""
+
+    def __init__(self, cache, entry):
+        self.__cache = cache
+        self.__entry = entry
+        self.__closed = False
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        if self.__closed:
+            raise AttributeError('Connection is closed.')
+        return getattr(self.__cache.connection_of(self.__entry), name)
+
+    def close(self):
+        if not self.__closed:
+            self.__closed = True
+            self.__cache.release(self.__entry)
+
+
+class OJAIConnectionCache(object):
+    """Thread-safe cache of connections keyed by connection string and options.
+    Every get() returns a new handle to the shared connection and increments
+    its reference count, handle close() decrements it. Connections are created
+    outside the cache lock: get() of other keys does not wait for a slow gateway,
+    get() of the same key waits for the connection being created.
+    There is no timer, a connection nobody references is closed by the first
+    get() or handle close() that comes idle_timeout seconds or later after its
+    last release.
+    After os.fork the child process gets new channels on first use,
+    channels inherited from the parent are never used or closed by the child."""
+
+    def __init__(self, connection_factory, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        """:param connection_factory: callable(connection_str, options) returning connection."""
+        self.__connection_factory = connection_factory
+        self.__idle_timeout = idle_timeout
+        self.__entries = {}
+        self.__lock = threading.Lock()
+        self.__pid = os.getpid()
+
+    @staticmethod
+    def __key(connection_str, options):
+        return connection_str, repr(sorted((options or {}).items()))
+
+    def get(self, connection_str, options=None):
+        key = OJAIConnectionCache.__key(connection_str, options)
+        with self.__lock:
+            self.__forget_parent_entries()
+            idle = self.__remove_idle()
+            entry = self.__entries.get(key)
+            creator = entry is None
+            if creator:
+                entry = _CacheEntry((connection_str, options))
+                self.__entries[key] = entry
+            entry.references += 1
+        OJAIConnectionCache.__close(idle)
+        if creator:
+            LOG.debug('Creating cached connection for %s.', connection_str)
+            try:
+                entry.connection = self.__connection_factory(connection_str, options)
+            except Exception as e:
+                with self.__lock:
+                    if self.__entries.get(key) is entry:
+                        del self.__entries[key]
+                entry.error = e
+                raise
+            finally:
+                entry.ready.set()
+        else:
+            entry.ready.wait()
+            if entry.error is not None:
+                raise entry.error
+        return _CachedConnection(self, entry)
+
+    def connection_of(self, entry):
+        if entry.pid == os.getpid():
+            return entry.connection
+        with entry.lock:
+            if entry.pid != os.getpid():
+                LOG.debug('Recreating cached connection for %s after fork.', entry.key[0])
+                entry.connection = self.__connection_factory(*entry.key)
+                entry.pid = os.getpid()
+            return entry.connection
+
+    def release(self, entry):
+        with self.__lock:
+            entry.references -= 1
+            if entry.references == 0:
+                entry.idle_since = time.time()
+            idle = self.__remove_idle()
+            if entry.references == 0 \
+                    and self.__entries.get(OJAIConnectionCache.__key(*entry.key)) is not entry:
+                # removed by clear() while it was being created
+                idle.append(entry)
+        OJAIConnectionCache.__close(idle)
+
+    def __forget_parent_entries(self):
+        if self.__pid != os.getpid():
+            # channels of the parent process must not be used or closed in the child
+            self.__entries = dict((key, entry) for key, entry in list(self.__entries.items())
+                                  if entry.references > 0)
+            self.__pid = os.getpid()
+
+    def __remove_idle(self):
+        """Removes idle entries, their connections are closed by the caller outside the lock."""
+        now = time.time()
+        idle = []
+        for key, entry in list(self.__entries.items()):
+            if entry.references == 0 and now - entry.idle_since >= self.__idle_timeout:
+                del self.__entries[key]
+                idle.append(entry)
+        return idle
+
+    @staticmethod
+    def __close(entries):
+        for entry in entries:
+            if entry.pid == os.getpid() and entry.connection is not None and not entry.closed:
+                entry.closed = True
+                entry.connection.close()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def clear(self):
+        """Closes all cached connections, handles still in use stop working.
+        Connections being created are closed when their last handle is closed."""
+        with self.__lock:
+            entries = list(self.__entries.values())
+            self.__entries = {}
+        OJAIConnectionCache.__close(entries)
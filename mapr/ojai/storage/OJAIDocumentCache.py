@@ -0,0 +1,132 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+from builtins import *
+from builtins import object
+from past.builtins import basestring
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_DOCUMENT_CACHE_MAX_ENTRIES = 0
+DEFAULT_DOCUMENT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_DOCUMENT_CACHE_TTL = 60.0
+
+
+class OJAIDocumentCache(object):
+    """Thread-safe LRU cache of find_by_id responses keyed by _id and projection.
+    Values are the JSON documents returned by the server, so a hit is decoded
+    like a response and callers never share a mutable document.
+    Entries expire after ttl seconds, the least recently used entries are evicted
+    when there are more than max_entries of them or they take more than max_bytes."""
+
+    def __init__(self, max_entries, max_bytes=DEFAULT_DOCUMENT_CACHE_MAX_BYTES,
+                 ttl=DEFAULT_DOCUMENT_CACHE_TTL):
+        self.__max_entries = max_entries
+        self.__max_bytes = max_bytes
+        self.__ttl = ttl
+        # (_id, projection) -> (json_document, expires, size in UTF-8 bytes)
+        self.__entries = OrderedDict()
+        self.__keys_by_id = {}
+        self.__bytes = 0
+        # incremented by every invalidation, responses read before it are not stored
+        self.__generation = 0
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+
+    @staticmethod
+    def __id_key(_id):
+        return bytes(_id) if isinstance(_id, bytearray) else _id
+
+    @staticmethod
+    def __key(_id, field_paths):
+        # 'a,b' and ['a', 'b'] are the same projection, as in OJAIRequestBuilder
+        if isinstance(field_paths, basestring):
+            field_paths = field_paths.split(',')
+        return (OJAIDocumentCache.__id_key(_id),
+                tuple(str(field_path) for field_path in field_paths)
+                if field_paths is not None else None)
+
+    @property
+    def generation(self):
+        return self.__generation
+
+    def get(self, _id, field_paths=None):
+        """Returns cached JSON document or None."""
+        key = OJAIDocumentCache.__key(_id, field_paths)
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                self.__misses += 1
+                return None
+            if entry[1] <= time.time():
+                self.__remove(key)
+                self.__misses += 1
+                return None
+            self.__entries[key] = self.__entries.pop(key)
+            self.__hits += 1
+            return entry[0]
+
+    def put(self, _id, field_paths, json_document, generation):
+        """Stores JSON document read when the cache generation was generation."""
+        size = len(json_document.encode('utf-8'))
+        if size > self.__max_bytes:
+            return
+        key = OJAIDocumentCache.__key(_id, field_paths)
+        with self.__lock:
+            if generation != self.__generation:
+                return
+            if key in self.__entries:
+                self.__remove(key)
+            self.__entries[key] = (json_document, time.time() + self.__ttl, size)
+            self.__keys_by_id.setdefault(key[0], set()).add(key)
+            self.__bytes += size
+            while len(self.__entries) > self.__max_entries or self.__bytes > self.__max_bytes:
+                self.__remove(next(iter(self.__entries)))
+                self.__evictions += 1
+
+    def __remove(self, key):
+        _, _, size = self.__entries.pop(key)
+        self.__bytes -= size
+        keys = self.__keys_by_id[key[0]]
+        keys.discard(key)
+        if not keys:
+            del self.__keys_by_id[key[0]]
+
+    def invalidate(self, _id):
+        """Drops every projection of the document."""
+        with self.__lock:
+            self.__generation += 1
+            for key in list(self.__keys_by_id.get(OJAIDocumentCache.__id_key(_id), ())):
+                self.__remove(key)
+
+    def clear(self):
+        with self.__lock:
+            self.__generation += 1
+            self.__entries.clear()
+            self.__keys_by_id.clear()
+            self.__bytes = 0
+
+    def __len__(self):
+        return len(self.__entries)
+
+    @property
+    def size_bytes(self):
+        return self.__bytes
+
+    @property
+    def hits(self):
+        return self.__hits
+
+    @property
+    def misses(self):
+        return self.__misses
+
+    @property
+    def evictions(self):
+        return self.__evictions
@@ -6,11 +6,11 @@ from future import standard_library
 standard_library.install_aliases()
 from builtins import *
 from past.builtins import *
-from past.utils import old_div
 import json
+from concurrent.futures import ThreadPoolExecutor, wait, as_completed as iter_completed, \
+    FIRST_COMPLETED
 
 from ojai.store.DocumentStore import DocumentStore
-from retrying import retry
 
 from mapr.ojai.exceptions.ClusterNotFoundError import ClusterNotFoundError
 from mapr.ojai.exceptions.DecodingError import DecodingError
@@ -27,93 +27,122 @@ from mapr.ojai.exceptions.StoreNotFoundError import StoreNotFoundError
 from mapr.ojai.exceptions.UnknownPayloadEncodingError import \
     UnknownPayloadEncodingError
 from mapr.ojai.exceptions.UnknownServerError import UnknownServerError
-from mapr.ojai.ojai import document_utils
+from mapr.ojai.ojai.OJAIBulkWriteResult import OJAIBulkWriteResult
 from mapr.ojai.ojai.OJAIDocument import OJAIDocument
+from mapr.ojai.ojai.OJAIDocumentStream import DEFAULT_FETCH_SIZE
+from mapr.ojai.ojai.OJAIParallelQueryResult import OJAIParallelQueryResult
 from mapr.ojai.ojai.OJAIQueryResult import OJAIQueryResult
-from mapr.ojai.ojai_query.OJAIQuery import OJAIQuery
+from mapr.ojai.ojai.OJAIResumableQueryResult import OJAIResumableQueryResult, \
+    DEFAULT_RESUME_ATTEMPTS
+from mapr.ojai.ojai.OJAIStreamPrefetcher import DEFAULT_PREFETCH_DEPTH
 from mapr.ojai.ojai_query.OJAIQueryCondition import OJAIQueryCondition
-from mapr.ojai.proto.gen.maprdb_server_pb2 import InsertOrReplaceRequest, \
-    PayloadEncoding, FindByIdRequest, ErrorCode, \
-    InsertMode, FindRequest, DeleteRequest, UpdateRequest
-from mapr.ojai.utils.retry_utils import retry_if_connection_not_established
-from mapr.ojai.ojai.OJAITagsBuilder import OJAITagsBuilder
+from mapr.ojai.ojai_query.QueryOp import QueryOp
+from mapr.ojai.proto.gen.maprdb_server_pb2 import ErrorCode, FindByIdResponse
+from mapr.ojai.storage.OJAIRequestBuilder import OJAIRequestBuilder, MAX_TIMEOUT
+from mapr.ojai.utils.retry_utils import policy_retry, call_timeout, RpcDeadlines
 import logging
 
 LOG = logging.getLogger(__name__)
-MAX_TIMEOUT = 2147483647
+DEFAULT_BULK_WINDOW_SIZE = 32
+DEFAULT_FIND_BY_IDS_CONCURRENCY = 16
+DEFAULT_PARALLEL_FIND_PARTITIONS = 8
 
 
 class OJAIDocumentStore(DocumentStore):
 
-    def __init__(self, url, store_path, connection, retry_config):
+    def __init__(self, url, store_path, connection, retry_config, json_codec=None,
+                 document_cache=None, single_flight=None, hedging=None, deadlines=None):
+        """:param document_cache: OJAIDocumentCache for find_by_id results, None disables caching.
+        :param single_flight: OJAISingleFlight collapsing concurrent identical FindById requests,
+        and Find requests if its streams is True.
+        :param hedging: OJAIHedgingPolicy sending slow FindById requests twice.
+        :param deadlines: RpcDeadlines used when an operation is called without timeout."""
         self.__url = url
         self.__store_path = store_path
+        self.__json_codec = json_codec
+        self.__request_builder = OJAIRequestBuilder(store_path=store_path,
+                                                    json_codec=json_codec)
         self.__connection = connection
         self.__retry_config = retry_config
+        self.__document_cache = document_cache
+        self.__single_flight = single_flight
+        self.__hedging = hedging
+        self.__deadlines = deadlines if deadlines is not None else RpcDeadlines()
         self.__configure_retry(self.__retry_config)
+        if document_cache is not None:
+            self.__configure_document_cache()
 
     def __configure_retry(self, retry_config):
-        retry_dec = retry(
-            wait_exponential_multiplier=retry_config.wait_exponential_multiplier,
-            wait_exponential_max=retry_config.wait_exponential_max,
-            stop_max_attempt_number=retry_config.stop_max_attempt_number,
-            retry_on_exception=retry_if_connection_not_established
-        )
+        retry_dec = policy_retry(retry_config)
         self.find_by_id = retry_dec(self.find_by_id)
+        self.__find_one_of_ids = retry_dec(self.__find_one_of_ids)
         self.find = retry_dec(self.find)
+        # insert_or_replace, insert, replace, check_and_replace and delete send
+        # every document through these, one retry loop per request shares its deadline
         self.__evaluate_doc = retry_dec(self.__evaluate_doc)
-        self.insert_or_replace = retry_dec(self.insert_or_replace)
-        self.delete = retry_dec(self.delete)
-        self.insert = retry_dec(self.insert)
-        self.replace = retry_dec(self.replace)
+        self.__evaluate_delete = retry_dec(self.__evaluate_delete)
         self.check_and_delete = retry_dec(self.check_and_delete)
         self.update = retry_dec(self.update)
         self.check_and_update = retry_dec(self.check_and_update)
-        self.check_and_replace = retry_dec(self.check_and_replace)
         self.increment = retry_dec(self.increment)
 
-    @staticmethod
-    def __get_str_mutation(mutation):
-        from mapr.ojai.document.OJAIDocumentMutation import \
-            OJAIDocumentMutation
-        if not isinstance(mutation, (OJAIDocumentMutation, dict)):
-            raise IllegalArgumentError(
-                m='Mutation type must be OJAIDocumentMutation or dict.')
-        mutation_with_tags = OJAITagsBuilder().set('mutation',
-                                                   mutation.as_dict()
-                                                   if isinstance(mutation,
-                                                                 OJAIDocumentMutation)
-                                                   else mutation).as_dictionary()['mutation']
-        return json.dumps(mutation_with_tags,
-                          default=document_utils.type_serializer)
+    def __configure_document_cache(self):
+        # lambdas take the write method arguments and return (doc, _id) it changes,
+        # the cached projections of that _id are dropped after the write,
+        # writes of doc_stream drop the whole cache
+        doc_writes = lambda doc=None, _id=None, *args, **kwargs: (doc, _id)
+        id_writes = lambda _id, *args, **kwargs: (None, _id)
+        written = {
+            'insert_or_replace': doc_writes,
+            'insert': doc_writes,
+            'replace': doc_writes,
+            'delete': doc_writes,
+            'check_and_replace': lambda doc, condition, _id=None, *args, **kwargs: (doc, _id),
+            'increment': id_writes,
+            'update': id_writes,
+            'check_and_update': id_writes,
+            'check_and_delete': id_writes,
+        }
+        for name, written_doc in list(written.items()):
+            setattr(self, name, self.__invalidating(getattr(self, name), written_doc))
+
+    def __invalidating(self, method, written_doc):
+        def invalidating_method(*args, **kwargs):
+            try:
+                return method(*args, **kwargs)
+            finally:
+                try:
+                    doc, _id = written_doc(*args, **kwargs)
+                except TypeError:
+                    doc, _id = None, None
+                if _id is None and isinstance(doc, OJAIDocument):
+                    _id = doc.as_dictionary().get('_id')
+                elif _id is None and isinstance(doc, dict):
+                    _id = doc.get('_id')
+                if _id is None:
+                    self.__document_cache.clear()
+                else:
+                    self.__document_cache.invalidate(_id)
+        return invalidating_method
+
+    @property
+    def document_cache(self):
+        return self.__document_cache
+
+    @property
+    def single_flight(self):
+        return self.__single_flight
+
+    @property
+    def hedging(self):
+        return self.__hedging
+
+    @property
+    def deadlines(self):
+        return self.__deadlines
 
     @staticmethod
-    def __get_str_condition(condition):
-        from mapr.ojai.ojai_query.OJAIQueryCondition import OJAIQueryCondition
-        if not isinstance(condition, (OJAIQueryCondition, dict)):
-            raise IllegalArgumentError(
-                m='Condition must be instance of OJAIQueryCondition, dict.')
-
-        condition_with_tags = OJAITagsBuilder().set('condition',
-                                                    condition.as_dictionary()
-                                                    if isinstance(condition,
-                                                                  OJAIQueryCondition)
-                                                    else condition).as_dictionary()['condition']
-        return json.dumps({'$condition': condition_with_tags},
-                          default=document_utils.type_serializer)
-
-    @staticmethod
-    def __get_doc_str(doc, _id=None):
-        if not isinstance(doc, (OJAIDocument, dict)):
-            raise IllegalArgumentError(m="Invalid type of the doc parameter.")
-        if isinstance(doc, dict):
-            doc = OJAIDocument().from_dict(doc)
-        if _id is not None:
-            doc.set_id(_id=_id)
-        return doc.as_json_str()
-
-    @staticmethod
-    def __build_find_by_id_result(response, results_as_document):
+    def build_find_by_id_result(response, results_as_document, json_codec=None):
         from mapr.ojai.ojai_utils.ojai_document_creator import OJAIDocumentCreator
 
         if len(response.json_document) == 0 and results_as_document:
@@ -122,267 +151,469 @@ class OJAIDocumentStore(DocumentStore):
             return {}
         elif results_as_document:
             return OJAIDocumentCreator.create_document(
-                json_string=response.json_document)
+                json_string=response.json_document, json_codec=json_codec)
         else:
             return OJAIDocumentCreator.create_document(
-                json_string=response.json_document).as_dictionary()
-
-    def find_by_id(self, _id, field_paths=None, condition=None,
-                   results_as_document=False, timeout=None):
-        if not isinstance(_id, basestring):
-            raise TypeError
-
-        request = FindByIdRequest(table_path=self.__store_path,
-                                  payload_encoding=PayloadEncoding.Value(
-                                      'JSON_ENCODING'),
-                                  json_document=OJAIDocument().set_id(_id=_id).as_json_str())
-        if condition is not None:
-            if not isinstance(condition, (OJAIQueryCondition, dict)):
-                raise IllegalArgumentError(
-                    m='Condition must be instance of OJAIQueryCondition, dict.')
-            request.json_condition = json.dumps(condition
-                                                if isinstance(condition, dict)
-                                                else condition.as_dictionary(),
-                                                default=document_utils.type_serializer)
-        if field_paths is not None:
-            if not isinstance(field_paths, (list, basestring)):
-                raise IllegalArgumentError(
-                    m='Field paths must be instance of list, str.')
-            request.projections[:] = field_paths \
-                if isinstance(field_paths, list) \
-                else field_paths.split(',')
+                json_string=response.json_document, json_codec=json_codec).as_dictionary()
 
+    def __send_find_by_id(self, request, timeout=None):
         LOG.debug('Sending FIND BY ID request to the server. Request body: %s', request)
-        if timeout is None:
-            response = self.__connection.FindById(request)
+        # the deadline of the call, hedged requests share it
+        timeout = call_timeout(self.__deadlines.read if timeout is None else timeout)
+        if self.__hedging is None:
+            send = lambda: self.__connection.FindById(request, timeout=timeout)
         else:
-            response = self.__connection.FindById(request, timeout=timeout)
-        LOG.debug('Got FIND BY ID response from the server. Response body: %s', response)
-        return self.__build_find_by_id_result(response=response,
-                                              results_as_document=results_as_document)
-
-    def __get_query_str(self, query=None):
-        if query is None:
-            query_str = '{}'
-        elif isinstance(query, basestring):
-            query_str = query
-        elif isinstance(query, OJAIQuery):
-            query_str = query.to_json_str()
-        elif isinstance(query, dict):
-            query_str = json.dumps(query,
-                                   default=document_utils.type_serializer)
+            # the hedged request gets the time left after the hedge delay
+            send = lambda: self.__hedging.call(
+                lambda remaining: self.__connection.FindById.future(request, timeout=remaining),
+                timeout)
+        if self.__single_flight is None:
+            response = send()
         else:
-            raise IllegalArgumentError(
-                m="Invalid type of the query parameter.")
-        return query_str
+            response = self.__single_flight.do(('FindById', request.SerializeToString()), send,
+                                               timeout)
+        LOG.debug('Got FIND BY ID response from the server. Response body: %s', response)
+        if response.error.err_code == ErrorCode.Value('TABLE_NOT_FOUND'):
+            # store returned by get_store(check_exists=False) may not exist
+            raise StoreNotFoundError(m=response.error.error_message)
+        return response
+
+    def find_by_id(self, _id, field_paths=None, condition=None,
+                   results_as_document=False, timeout=None):
+        if self.__document_cache is not None and condition is None:
+            return self.__find_by_id_cached(_id, field_paths, results_as_document, timeout)
+        request = self.__request_builder.find_by_id_request(_id=_id,
+                                                            field_paths=field_paths,
+                                                            condition=condition)
+        response = self.__send_find_by_id(request=request, timeout=timeout)
+        return OJAIDocumentStore.build_find_by_id_result(response=response,
+                                                         results_as_document=results_as_document,
+                                                         json_codec=self.__json_codec)
+
+    def __find_by_id_cached(self, _id, field_paths, results_as_document, timeout):
+        json_document = self.__document_cache.get(_id, field_paths)
+        if json_document is None:
+            generation = self.__document_cache.generation
+            request = self.__request_builder.find_by_id_request(_id=_id,
+                                                                field_paths=field_paths)
+            response = self.__send_find_by_id(request=request, timeout=timeout)
+            json_document = response.json_document
+            # a gateway error is returned as without the cache, but not cached as a missing document
+            if response.error.err_code in (ErrorCode.Value('NO_ERROR'),
+                                           ErrorCode.Value('DOCUMENT_NOT_FOUND')):
+                self.__document_cache.put(_id, field_paths, json_document, generation)
+        return OJAIDocumentStore.build_find_by_id_result(
+            response=FindByIdResponse(json_document=json_document),
+            results_as_document=results_as_document,
+            json_codec=self.__json_codec)
+
+    def __find_one_of_ids(self, request, results_as_document, timeout):
+        response = self.__send_find_by_id(request=request, timeout=timeout)
+        if len(response.json_document) == 0 \
+                or response.error.err_code == ErrorCode.Value('DOCUMENT_NOT_FOUND'):
+            return None
+        self.validate_response(response=response)
+        return OJAIDocumentStore.build_find_by_id_result(response=response,
+                                                         results_as_document=results_as_document,
+                                                         json_codec=self.__json_codec)
+
+    def find_by_ids(self, ids, field_paths=None, condition=None,
+                    results_as_document=False, timeout=None,
+                    concurrency=DEFAULT_FIND_BY_IDS_CONCURRENCY, as_completed=False):
+        """
+        Fetch several documents by _id with up to concurrency FindById requests in flight.
+        Missing documents are reported as None instead of raising.
+        :param ids: list of _id strings
+        :param as_completed: if True, return a generator of (_id, document) tuples
+        in completion order instead of a list of documents in input order
+        :return: list of documents (or None) aligned with ids
+        """
+        if not isinstance(ids, (list, tuple)):
+            raise IllegalArgumentError(m='Ids must be instance of list, tuple.')
+        if not isinstance(concurrency, int) or concurrency < 1:
+            raise IllegalArgumentError(m='Concurrency must be positive int.')
+        requests = [self.__request_builder.find_by_id_request(_id=_id,
+                                                              field_paths=field_paths,
+                                                              condition=condition)
+                    for _id in ids]
+        if as_completed:
+            return self.__find_by_ids_as_completed(ids, requests, results_as_document,
+                                                   timeout, concurrency)
+        if not requests:
+            return []
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(requests))) as executor:
+            return list(executor.map(lambda request: self.__find_one_of_ids(request,
+                                                                            results_as_document,
+                                                                            timeout),
+                                     requests))
+
+    def __find_by_ids_as_completed(self, ids, requests, results_as_document, timeout,
+                                   concurrency):
+        if not requests:
+            return
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(requests))) as executor:
+            futures = dict((executor.submit(self.__find_one_of_ids, request,
+                                            results_as_document, timeout), _id)
+                           for _id, request in zip(ids, requests))
+            try:
+                for future in iter_completed(futures):
+                    yield futures[future], future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
 
     def find(self, query=None, options=None):
         if options is None:
             options = {}
-        query_str = self.__get_query_str(query)
-        include_query_plan = options.get('ojai.mapr.query.include-query-plan',
-                                         False)
-        timeout = options.get('ojai.mapr.query.timeout-milliseconds', None)
-        if timeout is not None:
-            if timeout > MAX_TIMEOUT:
-                raise IllegalArgumentError('ojai.mapr.query.'
-                                           'timeout-milliseconds'
-                                           ' cannot be > {0}.'
-                                           .format(MAX_TIMEOUT))
-            # Converting timeout from milliseconds to seconds,
-            # due to gRPC expect timeout in seconds.
-            timeout = old_div(timeout, 1000.0)
-        result_as_document = \
-            options.get('ojai.mapr.query.result-as-document', False)
-
-        request = FindRequest(table_path=self.__store_path,
-                              payload_encoding=PayloadEncoding.Value(
-                                  'JSON_ENCODING'),
-                              include_query_plan=include_query_plan,
-                              json_query=query_str)
+        if options.get('ojai.mapr.query.resumable', False) \
+                or options.get('ojai.mapr.query.cursor') is not None:
+            return self.__find_resumable(query, options)
+        query_str = self.__request_builder.get_query_str(query)
+        include_query_plan, timeout, result_as_document = \
+            OJAIRequestBuilder.parse_find_options(options)
+        prefetch_depth = None
+        if options.get('ojai.mapr.query.prefetch', False):
+            prefetch_depth = options.get('ojai.mapr.query.prefetch-depth',
+                                         DEFAULT_PREFETCH_DEPTH)
+            if not isinstance(prefetch_depth, int) or prefetch_depth < 1:
+                raise IllegalArgumentError(m='ojai.mapr.query.prefetch-depth must be positive int.')
+        fetch_size = options.get('ojai.mapr.query.fetch-size', DEFAULT_FETCH_SIZE)
+        if not isinstance(fetch_size, int) or fetch_size < 1:
+            raise IllegalArgumentError(m='ojai.mapr.query.fetch-size must be positive int.')
+        max_buffer_bytes = options.get('ojai.mapr.query.max-buffer-bytes', None)
+        if max_buffer_bytes is not None \
+                and (not isinstance(max_buffer_bytes, int) or max_buffer_bytes < 1):
+            raise IllegalArgumentError(m='ojai.mapr.query.max-buffer-bytes must be positive int.')
+        request = self.__request_builder.find_request(query_str=query_str,
+                                                      include_query_plan=include_query_plan)
         LOG.debug('Sending FIND request to the server. Request body: %s',
                   request)
         if timeout is None:
-            response_stream = \
-                self.__connection.Find(request)
+            timeout = self.__deadlines.scan
+        send = lambda: self.__connection.Find(request, timeout=timeout)
+        if self.__single_flight is None or not self.__single_flight.streams:
+            response_stream = send()
         else:
-            response_stream = \
-                self.__connection.Find(request,
-                                       timeout=timeout)
+            # the whole result is received once and replayed to every caller
+            response_stream = self.__single_flight.do_stream(('Find', request.SerializeToString()),
+                                                             send, timeout)
         return OJAIQueryResult(document_stream=response_stream,
                                results_as_document=result_as_document,
-                               include_query_plan=include_query_plan)
+                               include_query_plan=include_query_plan,
+                               prefetch_depth=prefetch_depth,
+                               fetch_size=fetch_size,
+                               max_buffer_bytes=max_buffer_bytes,
+                               json_codec=self.__json_codec)
+
+    def __find_resumable(self, query, options):
+        max_resumes = options.get('ojai.mapr.query.resume-attempts', DEFAULT_RESUME_ATTEMPTS)
+        if not isinstance(max_resumes, int) or max_resumes < 0:
+            raise IllegalArgumentError(m='ojai.mapr.query.resume-attempts must be non-negative int.')
+        find_options = dict((key, value) for key, value in list(options.items())
+                            if key not in ('ojai.mapr.query.resumable', 'ojai.mapr.query.cursor'))
+        query_dict = OJAIResumableQueryResult.ordered_by_id(
+            json.loads(self.__request_builder.get_query_str(query)))
+        after, delivered = None, 0
+        cursor = options.get('ojai.mapr.query.cursor')
+        if cursor is not None:
+            cursor_query, after, delivered = OJAIResumableQueryResult.parse_cursor(cursor)
+            if query is not None and cursor_query != query_dict:
+                raise IllegalArgumentError(m='Query does not match the find cursor.')
+            query_dict = cursor_query
+        return OJAIResumableQueryResult(query=query_dict,
+                                        find=lambda remaining: self.find(remaining, find_options),
+                                        max_resumes=max_resumes,
+                                        after=after,
+                                        delivered=delivered)
+
+    def parallel_find(self, query=None, partitions=DEFAULT_PARALLEL_FIND_PARTITIONS,
+                      split_points=None, ordered=False, options=None):
+        """
+        Find split into _id ranges read by concurrent Find streams.
+        Example:
+        for doc in store.parallel_find(query, split_points=['id250', 'id500', 'id750']):
+            ...
+        :param partitions: number of ranges when split_points are not given, the range
+        between the smallest and the largest matching _id is then split evenly
+        :param split_points: sorted str _id values where the ranges start
+        :param ordered: if True, yield documents ordered by _id, else as they arrive
+        :param options: find options used for every range
+        :return: OJAIParallelQueryResult
+        """
+        if options is None:
+            options = {}
+        query_dict = json.loads(self.__request_builder.get_query_str(query))
+        if '$orderby' in query_dict or '$offset' in query_dict:
+            raise IllegalArgumentError(m='Parallel find does not support $orderby and $offset.')
+        where = query_dict.get('$where')
+        if split_points is None:
+            if not isinstance(partitions, int) or partitions < 1:
+                raise IllegalArgumentError(m='Partitions must be positive int.')
+            split_points = self.__sample_split_points(where, partitions, options)
+        elif not isinstance(split_points, (list, tuple)) \
+                or not all(isinstance(point, basestring) for point in split_points) \
+                or any(a >= b for a, b in zip(split_points, split_points[1:])):
+            raise IllegalArgumentError(m='Split points must be sorted list of distinct str _id.')
+        bounds = [None] + list(split_points) + [None]
+        partition_queries = []
+        for lower, upper in zip(bounds[:-1], bounds[1:]):
+            partition_query = dict(query_dict)
+            condition = OJAIDocumentStore.__id_range_condition(where, lower, upper)
+            if condition is not None:
+                partition_query['$where'] = condition
+            if ordered:
+                partition_query['$orderby'] = {'_id': 'asc'}
+            partition_queries.append(
+                lambda partition_query=partition_query: self.find(partition_query, options))
+        LOG.debug('Starting parallel find with %s partitions.', len(partition_queries))
+        return OJAIParallelQueryResult(partition_queries=partition_queries,
+                                       ordered=ordered,
+                                       limit=query_dict.get('$limit'))
 
-    def __evaluate_doc_stream(self, doc_stream, operation_type):
+    @staticmethod
+    def __id_range_condition(where, lower, upper):
+        if lower is None and upper is None:
+            return where
+        condition = OJAIQueryCondition().and_()
+        if where:
+            condition.condition_(where)
+        if lower is not None:
+            condition.is_('_id', QueryOp.GREATER_OR_EQUAL, lower)
+        if upper is not None:
+            condition.is_('_id', QueryOp.LESS, upper)
+        return condition.close().build().as_dictionary()
+
+    def __sample_split_points(self, where, partitions, options):
+        if partitions == 1:
+            return []
+        first_id = self.__boundary_id(where, 'asc', options)
+        last_id = self.__boundary_id(where, 'desc', options)
+        if not isinstance(first_id, basestring) or not isinstance(last_id, basestring) \
+                or first_id >= last_id:
+            return []
+        return OJAIParallelQueryResult.interpolate_split_points(first_id, last_id, partitions)
+
+    def __boundary_id(self, where, order, options):
+        boundary_query = {'$select': ['_id'], '$orderby': {'_id': order}, '$limit': 1}
+        if where:
+            boundary_query['$where'] = where
+        boundary_options = dict(options)
+        boundary_options['ojai.mapr.query.result-as-document'] = False
+        for doc in self.find(boundary_query, boundary_options):
+            return doc.get('_id')
+        return None
+
+    def __evaluate_doc_stream(self, doc_stream, operation_type, options=None, timeout=None):
+        if options is not None:
+            return self.__evaluate_doc_stream_pipelined(doc_stream,
+                                                        operation_type,
+                                                        options,
+                                                        timeout)
         LOG.debug('Start sending documents on the server.')
         for doc in doc_stream:
-            if isinstance(doc, OJAIDocument):
-                self.__validate_dict(doc.as_dictionary())
-                doc_str = doc.as_json_str()
+            self.__evaluate_doc(doc_str=self.__request_builder.get_stream_doc_str(doc),
+                                operation_type=operation_type,
+                                timeout=timeout)
+
+    def __evaluate_doc_stream_pipelined(self, doc_stream, operation_type, options, timeout):
+        if not isinstance(options, dict):
+            raise TypeError('Options type must be dict.')
+        window_size = options.get('ojai.mapr.bulk.window-size',
+                                  DEFAULT_BULK_WINDOW_SIZE)
+        if not isinstance(window_size, int) or window_size < 1:
+            raise IllegalArgumentError(m='ojai.mapr.bulk.window-size must be positive int.')
+
+        LOG.debug('Start sending documents on the server, window size %s.', window_size)
+        result = OJAIBulkWriteResult()
+        in_flight = {}
+        executor = ThreadPoolExecutor(max_workers=window_size)
+        try:
+            for doc in doc_stream:
+                if len(in_flight) >= window_size:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    OJAIDocumentStore.__collect_bulk_results(done, in_flight, result)
+                _id = doc.as_dictionary().get('_id') if isinstance(doc, OJAIDocument) \
+                    else doc.get('_id') if isinstance(doc, dict) else None
+                try:
+                    doc_str = self.__request_builder.get_stream_doc_str(doc)
+                except (TypeError, EncodingError, InvalidOJAIDocumentError) as e:
+                    result.add_failure(_id, e)
+                    continue
+                future = executor.submit(self.__evaluate_doc,
+                                         doc_str=doc_str,
+                                         operation_type=operation_type,
+                                         timeout=timeout)
+                in_flight[future] = _id
+            done, _ = wait(in_flight)
+            OJAIDocumentStore.__collect_bulk_results(done, in_flight, result)
+        finally:
+            executor.shutdown(wait=True)
+        LOG.debug('Finish sending documents on the server. %s', result)
+        return result
+
+    @staticmethod
+    def __collect_bulk_results(done, in_flight, result):
+        for future in done:
+            _id = in_flight.pop(future)
+            error = future.exception()
+            if error is None:
+                result.add_success()
             else:
-                self.__validate_dict(doc)
-                doc_str = OJAIDocument().from_dict(doc).as_json_str()
-            self.__evaluate_doc(doc_str=doc_str,
-                                operation_type=operation_type)
-
-    def __evaluate_doc(self, doc_str, operation_type, condition=None):
-        request = InsertOrReplaceRequest(table_path=self.__store_path,
-                                         insert_mode=InsertMode.Value(
-                                             operation_type),
-                                         payload_encoding=PayloadEncoding
-                                         .Value('JSON_ENCODING'),
-                                         json_document=doc_str)
-        if condition is not None:
-            request.json_condition = condition
+                result.add_failure(_id, error)
+
+    def __evaluate_doc(self, doc_str, operation_type, condition=None, timeout=None):
+        request = self.__request_builder.insert_or_replace_request(doc_str=doc_str,
+                                                                   operation_type=operation_type,
+                                                                   condition=condition)
         LOG.debug('Sending %s request to the server. Request body: %s',
                   operation_type,
                   request)
         response = \
-            self.__connection.InsertOrReplace(request)
+            self.__connection.InsertOrReplace(request, timeout=self.__write_timeout(timeout))
         LOG.debug('Got %s response from the server. Response body: %s',
                   operation_type,
                   response)
         self.validate_response(response=response)
 
+    def __write_timeout(self, timeout):
+        return call_timeout(self.__deadlines.write if timeout is None else timeout)
+
     def insert_or_replace(self, doc=None, _id=None, field_as_key=None,
-                          doc_stream=None):
+                          doc_stream=None, options=None, timeout=None):
+        """
+        Insert or replace a single document or a doc_stream.
+        When options are passed together with doc_stream, documents are sent
+        with up to 'ojai.mapr.bulk.window-size' requests in flight, failures
+        are collected per document and OJAIBulkWriteResult is returned.
+        The same applies to insert and replace.
+        timeout in seconds applies to the request of every document, it overrides
+        the ojai.mapr.rpc.write-timeout-milliseconds connection option, the same
+        applies to the other write operations.
+        Example:
+        options = {'ojai.mapr.bulk.window-size': 64}
+        result = store.insert_or_replace(doc_stream=docs, options=options)
+        result.get_failures() -> [(_id, exception), ...]
+        """
         if doc_stream is None:
-            doc_str = OJAIDocumentStore.__get_doc_str(doc=doc, _id=_id)
+            doc_str = self.__request_builder.get_doc_str(doc=doc, _id=_id)
             self.__evaluate_doc(doc_str=doc_str,
-                                operation_type='INSERT_OR_REPLACE')
+                                operation_type='INSERT_OR_REPLACE',
+                                timeout=timeout)
         else:
-            self.__evaluate_doc_stream(doc_stream, 'INSERT_OR_REPLACE')
+            return self.__evaluate_doc_stream(doc_stream, 'INSERT_OR_REPLACE', options, timeout)
 
-    def __evaluate_delete(self, doc_string):
-        request = DeleteRequest(table_path=self.__store_path,
-                                payload_encoding=PayloadEncoding.Value(
-                                    'JSON_ENCODING'),
-                                json_document=doc_string)
+    def __evaluate_delete(self, doc_string, timeout=None):
+        request = self.__request_builder.delete_request(doc_str=doc_string)
         LOG.debug('Sending DELETE request to the server. Request body: %s', request)
-        response = self.__connection.Delete(request)
+        response = self.__connection.Delete(request, timeout=self.__write_timeout(timeout))
         LOG.debug('Got DELETE response from the server. Response body: %s', response)
         self.validate_response(response)
 
-    def __delete_doc_stream(self, doc_stream):
+    def __delete_doc_stream(self, doc_stream, timeout):
         LOG.debug('Start deleting documents on the server.')
         if not isinstance(doc_stream, list):
             raise IllegalArgumentError(
                 m="Invalid type of the doc_stream parameter.")
 
         for doc in doc_stream:
-            if isinstance(doc, OJAIDocument):
-                self.__evaluate_delete(doc.as_json_str())
-            elif isinstance(doc, dict):
-                self.__evaluate_delete(
-                    OJAIDocument().from_dict(document_dict=doc).as_json_str())
-            else:
-                raise IllegalArgumentError(
-                    m="Invalid type of the doc parameter, must be "
-                      "OJAIDocument or dict.")
+            self.__evaluate_delete(self.__request_builder.get_delete_doc_str(doc), timeout)
 
-    def __delete_id_field(self, _id):
+    def __delete_id_field(self, _id, timeout):
         if not isinstance(_id, (basestring, bytearray)):
             raise IllegalArgumentError(m="Invalid type of the _id parameter.")
-        self.__evaluate_delete(OJAIDocument().set_id(_id=_id).as_json_str())
+        self.__evaluate_delete(self.__request_builder.get_id_str(_id), timeout)
 
-    def __delete_document(self, document):
+    def __delete_document(self, document, timeout):
         if not isinstance(document, (OJAIDocument, dict)):
             raise IllegalArgumentError(m="Invalid type of the doc parameter.")
 
-        if isinstance(document, OJAIDocument):
-            self.__evaluate_delete(document.as_json_str())
-        else:
-            self.__evaluate_delete(
-                OJAIDocument().from_dict(document_dict=document).as_json_str())
+        self.__evaluate_delete(self.__request_builder.get_delete_doc_str(document), timeout)
 
-    def delete(self, doc=None, _id=None, field_as_key=None, doc_stream=None):
+    def delete(self, doc=None, _id=None, field_as_key=None, doc_stream=None, timeout=None):
         if doc is not None:
-            self.__delete_document(document=doc)
+            self.__delete_document(document=doc, timeout=timeout)
         elif _id is not None:
-            self.__delete_id_field(_id=_id)
+            self.__delete_id_field(_id=_id, timeout=timeout)
         elif doc_stream is not None:
-            self.__delete_doc_stream(doc_stream=doc_stream)
+            self.__delete_doc_stream(doc_stream=doc_stream, timeout=timeout)
         else:
             raise IllegalArgumentError(m="Invalid set of the parameters.")
 
-    def insert(self, doc=None, _id=None, field_as_key=None, doc_stream=None):
+    def insert(self, doc=None, _id=None, field_as_key=None, doc_stream=None, options=None,
+               timeout=None):
         if doc_stream is None:
-            doc_str = OJAIDocumentStore.__get_doc_str(doc=doc, _id=_id)
-            self.__evaluate_doc(doc_str=doc_str, operation_type='INSERT')
+            doc_str = self.__request_builder.get_doc_str(doc=doc, _id=_id)
+            self.__evaluate_doc(doc_str=doc_str, operation_type='INSERT', timeout=timeout)
         else:
-            self.__evaluate_doc_stream(doc_stream, 'INSERT')
+            return self.__evaluate_doc_stream(doc_stream, 'INSERT', options, timeout)
 
-    def replace(self, doc=None, _id=None, field_as_key=None, doc_stream=None):
+    def replace(self, doc=None, _id=None, field_as_key=None, doc_stream=None, options=None,
+                timeout=None):
         if doc_stream is None:
-            doc_str = OJAIDocumentStore.__get_doc_str(doc=doc, _id=_id)
-            self.__evaluate_doc(doc_str=doc_str, operation_type='REPLACE')
+            doc_str = self.__request_builder.get_doc_str(doc=doc, _id=_id)
+            self.__evaluate_doc(doc_str=doc_str, operation_type='REPLACE', timeout=timeout)
         else:
-            self.__evaluate_doc_stream(doc_stream, 'REPLACE')
+            return self.__evaluate_doc_stream(doc_stream, 'REPLACE', options, timeout)
 
-    def increment(self, _id, field, inc):
-        str_doc = OJAIDocument().set_id(_id=_id).as_json_str()
+    def increment(self, _id, field, inc, timeout=None):
+        str_doc = self.__request_builder.get_id_str(_id)
         from mapr.ojai.document.OJAIDocumentMutation import \
             OJAIDocumentMutation
-        str_mutation = self.__get_str_mutation(OJAIDocumentMutation()
-                                               .increment(field_path=field,
-                                                          inc=inc))
-        self.__execute_update(_id=str_doc, mutation=str_mutation)
-
-    def __execute_update(self, _id, mutation, condition=None):
-        request = UpdateRequest(table_path=self.__store_path,
-                                payload_encoding=PayloadEncoding.Value(
-                                    'JSON_ENCODING'),
-                                json_document=_id,
-                                json_mutation=mutation)
-        if condition:
-            request.json_condition = condition
+        str_mutation = self.__request_builder.get_str_mutation(OJAIDocumentMutation()
+                                                               .increment(field_path=field,
+                                                                          inc=inc))
+        self.__execute_update(_id=str_doc, mutation=str_mutation, timeout=timeout)
+
+    def __execute_update(self, _id, mutation, condition=None, timeout=None):
+        request = self.__request_builder.update_request(doc_str=_id,
+                                                        mutation=mutation,
+                                                        condition=condition)
         LOG.debug('Sending UPDATE request to the server. Request body: %s', request)
-        response = self.__connection.Update(request)
+        response = self.__connection.Update(request, timeout=self.__write_timeout(timeout))
         LOG.debug('Got UPDATE response from the server. Response body: %s', response)
         self.validate_response(response=response)
 
-    def update(self, _id, mutation):
-        str_doc = OJAIDocument().set_id(_id=_id).as_json_str()
-        str_mutation = OJAIDocumentStore.__get_str_mutation(mutation)
+    def update(self, _id, mutation, timeout=None):
+        str_doc = self.__request_builder.get_id_str(_id)
+        str_mutation = self.__request_builder.get_str_mutation(mutation)
 
         self.__execute_update(_id=str_doc,
-                              mutation=str_mutation)
+                              mutation=str_mutation,
+                              timeout=timeout)
 
-    def check_and_update(self, _id, query_condition, mutation):
-        str_condition = OJAIDocumentStore.__get_str_condition(query_condition)
-        str_doc = OJAIDocument().set_id(_id=_id).as_json_str()
-        str_mutation = OJAIDocumentStore.__get_str_mutation(mutation)
+    def check_and_update(self, _id, query_condition, mutation, timeout=None):
+        str_condition = self.__request_builder.get_str_condition(query_condition)
+        str_doc = self.__request_builder.get_id_str(_id)
+        str_mutation = self.__request_builder.get_str_mutation(mutation)
         try:
             self.__execute_update(_id=str_doc,
                                   mutation=str_mutation,
-                                  condition=str_condition)
+                                  condition=str_condition,
+                                  timeout=timeout)
         except DocumentNotFoundError:
             return False
         return True
 
-    def check_and_delete(self, _id, condition):
-        str_condition = OJAIDocumentStore.__get_str_condition(
+    def check_and_delete(self, _id, condition, timeout=None):
+        str_condition = self.__request_builder.get_str_condition(
             condition=condition)
-        request = DeleteRequest(table_path=self.__store_path,
-                                payload_encoding=PayloadEncoding.Value(
-                                    'JSON_ENCODING'),
-                                json_condition=str_condition,
-                                json_document=OJAIDocument().set_id(
-                                    _id=_id).as_json_str())
+        request = self.__request_builder.delete_request(
+            doc_str=self.__request_builder.get_id_str(_id),
+            condition=str_condition)
         LOG.debug('Sending CHECK AND DELETE request to the server. Request body: %s', request)
-        response = self.__connection.Delete(request)
+        response = self.__connection.Delete(request, timeout=self.__write_timeout(timeout))
         LOG.debug('Got CHECK AND DELETE response from the server. Response body: %s', response)
         self.validate_response(response)
 
-    def check_and_replace(self, doc, condition, _id=None):
+    def check_and_replace(self, doc, condition, _id=None, timeout=None):
         if _id is not None:
             doc.set_id(_id=_id)
-        doc_str = OJAIDocumentStore.__get_doc_str(doc=doc, _id=_id)
-        str_condition = OJAIDocumentStore.__get_str_condition(
+        doc_str = self.__request_builder.get_doc_str(doc=doc, _id=_id)
+        str_condition = self.__request_builder.get_str_condition(
             condition=condition)
         try:
             self.__evaluate_doc(doc_str=doc_str, operation_type='REPLACE',
-                                condition=str_condition)
+                                condition=str_condition, timeout=timeout)
         except DocumentNotFoundError:
             return False
         return True
@@ -401,17 +632,6 @@ class OJAIDocumentStore(DocumentStore):
 
         raise InvalidOJAIDocumentError(m="Invalid OJAI Document")
 
-    @staticmethod
-    def __validate_dict(dict_to_insert):
-        if not isinstance(dict_to_insert, dict):
-            raise TypeError
-
-        if '_id' in dict_to_insert and isinstance(dict_to_insert['_id'],
-                                                  basestring):
-            return True
-
-        raise InvalidOJAIDocumentError(m="Invalid dictionary")
-
     @staticmethod
     def validate_response(response):
         if response.error.err_code == ErrorCode.Value('NO_ERROR'):
@@ -0,0 +1,115 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+from builtins import *
+from builtins import object
+import queue
+import threading
+import time
+from collections import deque
+
+DEFAULT_HEDGE_PERCENTILE = 95
+# seconds before the request is sent again while there are too few measured latencies
+DEFAULT_HEDGE_DELAY = 0.05
+LATENCY_WINDOW = 1000
+MIN_LATENCY_SAMPLES = 20
+# calls between recomputations of the percentile
+DELAY_UPDATE_INTERVAL = 20
+
+
+class OJAIHedgingPolicy(object):
+    """Hedged unary calls: when a call has not answered after delay seconds the same
+    request is sent again, through the channel pool that is usually another channel
+    or gateway, and the first successful response is returned.
+    Without a fixed delay it is the percentile of the recent call latencies, so about
+    (100 - percentile)% of the calls are hedged.
+    Both requests are non-blocking gRPC calls sent from the caller's thread, the slower
+    one is cancelled when the other succeeds."""
+
+    def __init__(self, delay=None, percentile=DEFAULT_HEDGE_PERCENTILE):
+        """:param delay: fixed delay in seconds, None for the percentile of latencies"""
+        self.__fixed_delay = delay
+        self.__percentile = percentile
+        self.__delay = DEFAULT_HEDGE_DELAY if delay is None else delay
+        self.__latencies = deque(maxlen=LATENCY_WINDOW)
+        self.__calls_since_update = 0
+        self.__lock = threading.Lock()
+        self.__hedged = 0
+        self.__hedges_won = 0
+
+    @property
+    def delay(self):
+        """Current hedge delay in seconds."""
+        return self.__delay
+
+    @property
+    def hedged(self):
+        """Number of calls sent twice."""
+        return self.__hedged
+
+    @property
+    def hedges_won(self):
+        """Number of hedged calls answered first by the second request."""
+        return self.__hedges_won
+
+    def __record(self, latency):
+        if self.__fixed_delay is not None:
+            return
+        with self.__lock:
+            self.__latencies.append(latency)
+            self.__calls_since_update += 1
+            if len(self.__latencies) >= MIN_LATENCY_SAMPLES \
+                    and self.__calls_since_update >= DELAY_UPDATE_INTERVAL:
+                self.__calls_since_update = 0
+                latencies = sorted(self.__latencies)
+                self.__delay = latencies[min(len(latencies) - 1,
+                                             len(latencies) * self.__percentile // 100)]
+
+    def __send(self, send, timeout, completed):
+        started = time.time()
+        future = send(timeout)
+
+        def done(f):
+            # only the RPC is timed, successful calls only
+            if not f.cancelled() and f.exception() is None:
+                self.__record(time.time() - started)
+            completed.put(f)
+
+        future.add_done_callback(done)
+        return future
+
+    def call(self, send, timeout=None):
+        """Sends the request with send(timeout), and again with the time left of timeout
+        if it has not completed after delay, returns the first successful response or
+        raises the last error if both failed. The call is not hedged when no time is left.
+        :param send: callable starting the call and returning grpc.Future,
+        e.g. lambda timeout: stub.FindById.future(request, timeout=timeout)
+        :param timeout: seconds shared by both requests or None for no deadline"""
+        started = time.time()
+        completed = queue.Queue()
+        futures = [self.__send(send, timeout, completed)]
+        try:
+            done = [completed.get(timeout=self.__delay)]
+        except queue.Empty:
+            done = []
+            remaining = None if timeout is None else timeout - (time.time() - started)
+            if remaining is None or remaining > 0:
+                with self.__lock:
+                    self.__hedged += 1
+                futures.append(self.__send(send, remaining, completed))
+        error = None
+        for _ in futures:
+            future = done.pop() if done else completed.get()
+            if future.exception() is None:
+                for other in futures:
+                    if other is not future:
+                        other.cancel()
+                if future is not futures[0]:
+                    with self.__lock:
+                        self.__hedges_won += 1
+                return future.result()
+            error = future.exception()
+        raise error
@@ -0,0 +1,194 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+from builtins import *
+from past.builtins import *
+from past.utils import old_div
+from builtins import object
+import json
+
+from mapr.ojai.exceptions.IllegalArgumentError import IllegalArgumentError
+from mapr.ojai.exceptions.InvalidOJAIDocumentError import \
+    InvalidOJAIDocumentError
+from mapr.ojai.ojai import document_utils
+from mapr.ojai.ojai.OJAIDocument import OJAIDocument
+from mapr.ojai.ojai.OJAITagsEncoder import OJAITagsEncoder
+from mapr.ojai.ojai_query.OJAIQuery import OJAIQuery
+from mapr.ojai.ojai_query.OJAIQueryCondition import OJAIQueryCondition
+from mapr.ojai.proto.gen.maprdb_server_pb2 import InsertOrReplaceRequest, \
+    PayloadEncoding, FindByIdRequest, InsertMode, FindRequest, DeleteRequest, \
+    UpdateRequest
+
+MAX_TIMEOUT = 2147483647
+
+
+class OJAIRequestBuilder(object):
+    """Builds gRPC requests for a single store.
+    Shared by OJAIDocumentStore and AsyncOJAIDocumentStore."""
+
+    def __init__(self, store_path, json_codec=None):
+        self.__store_path = store_path
+        self.__json_codec = json_codec
+
+    def get_str_mutation(self, mutation):
+        from mapr.ojai.document.OJAIDocumentMutation import \
+            OJAIDocumentMutation
+        if not isinstance(mutation, (OJAIDocumentMutation, dict)):
+            raise IllegalArgumentError(
+                m='Mutation type must be OJAIDocumentMutation or dict.')
+        return OJAITagsEncoder.dumps(mutation.as_dict()
+                                     if isinstance(mutation, OJAIDocumentMutation)
+                                     else mutation,
+                                     json_codec=self.__json_codec)
+
+    def get_str_condition(self, condition):
+        if not isinstance(condition, (OJAIQueryCondition, dict)):
+            raise IllegalArgumentError(
+                m='Condition must be instance of OJAIQueryCondition, dict.')
+
+        return OJAITagsEncoder.dumps({'$condition': condition.as_dictionary()
+                                      if isinstance(condition, OJAIQueryCondition)
+                                      else condition},
+                                     json_codec=self.__json_codec)
+
+    def get_doc_str(self, doc, _id=None):
+        if not isinstance(doc, (OJAIDocument, dict)):
+            raise IllegalArgumentError(m="Invalid type of the doc parameter.")
+        if isinstance(doc, dict):
+            doc = OJAIDocument().from_dict(doc)
+        if _id is not None:
+            doc.set_id(_id=_id)
+        return OJAITagsEncoder.dumps(doc.as_dictionary(), json_codec=self.__json_codec)
+
+    def get_id_str(self, _id):
+        return OJAITagsEncoder.dumps(OJAIDocument().set_id(_id=_id).as_dictionary(),
+                                     json_codec=self.__json_codec)
+
+    def get_stream_doc_str(self, doc):
+        if isinstance(doc, OJAIDocument):
+            OJAIRequestBuilder.validate_dict(doc.as_dictionary())
+            return OJAITagsEncoder.dumps(doc.as_dictionary(), json_codec=self.__json_codec)
+        else:
+            OJAIRequestBuilder.validate_dict(doc)
+            return OJAITagsEncoder.dumps(doc, json_codec=self.__json_codec)
+
+    def get_delete_doc_str(self, doc):
+        if isinstance(doc, OJAIDocument):
+            return OJAITagsEncoder.dumps(doc.as_dictionary(), json_codec=self.__json_codec)
+        elif isinstance(doc, dict):
+            return OJAITagsEncoder.dumps(doc, json_codec=self.__json_codec)
+        else:
+            raise IllegalArgumentError(
+                m="Invalid type of the doc parameter, must be "
+                  "OJAIDocument or dict.")
+
+    @staticmethod
+    def validate_dict(dict_to_insert):
+        if not isinstance(dict_to_insert, dict):
+            raise TypeError
+
+        if '_id' in dict_to_insert and isinstance(dict_to_insert['_id'],
+                                                  basestring):
+            return True
+
+        raise InvalidOJAIDocumentError(m="Invalid dictionary")
+
+    def get_query_str(self, query=None):
+        if query is None:
+            query_str = '{}'
+        elif isinstance(query, basestring):
+            query_str = query
+        elif isinstance(query, OJAIQuery):
+            query_str = query.to_json_str()
+        elif isinstance(query, dict):
+            query_str = json.dumps(query, default=document_utils.type_serializer) \
+                if self.__json_codec is None else self.__json_codec.dumps(query)
+        else:
+            raise IllegalArgumentError(
+                m="Invalid type of the query parameter.")
+        return query_str
+
+    @staticmethod
+    def parse_find_options(options):
+        """:return: include_query_plan, timeout in seconds or None, result_as_document"""
+        include_query_plan = options.get('ojai.mapr.query.include-query-plan',
+                                         False)
+        timeout = options.get('ojai.mapr.query.timeout-milliseconds', None)
+        if timeout is not None:
+            if timeout > MAX_TIMEOUT:
+                raise IllegalArgumentError('ojai.mapr.query.'
+                                           'timeout-milliseconds'
+                                           ' cannot be > {0}.'
+                                           .format(MAX_TIMEOUT))
+            # Converting timeout from milliseconds to seconds,
+            # due to gRPC expect timeout in seconds.
+            timeout = old_div(timeout, 1000.0)
+        result_as_document = \
+            options.get('ojai.mapr.query.result-as-document', False)
+        return include_query_plan, timeout, result_as_document
+
+    def find_by_id_request(self, _id, field_paths=None, condition=None):
+        if not isinstance(_id, basestring):
+            raise TypeError
+
+        request = FindByIdRequest(table_path=self.__store_path,
+                                  payload_encoding=PayloadEncoding.Value(
+                                      'JSON_ENCODING'),
+                                  json_document=self.get_id_str(_id))
+        if condition is not None:
+            if not isinstance(condition, (OJAIQueryCondition, dict)):
+                raise IllegalArgumentError(
+                    m='Condition must be instance of OJAIQueryCondition, dict.')
+            condition_dict = condition if isinstance(condition, dict) \
+                else condition.as_dictionary()
+            request.json_condition = \
+                json.dumps(condition_dict, default=document_utils.type_serializer) \
+                if self.__json_codec is None else self.__json_codec.dumps(condition_dict)
+        if field_paths is not None:
+            if not isinstance(field_paths, (list, basestring)):
+                raise IllegalArgumentError(
+                    m='Field paths must be instance of list, str.')
+            request.projections[:] = field_paths \
+                if isinstance(field_paths, list) \
+                else field_paths.split(',')
+        return request
+
+    def find_request(self, query_str, include_query_plan=False):
+        return FindRequest(table_path=self.__store_path,
+                           payload_encoding=PayloadEncoding.Value(
+                               'JSON_ENCODING'),
+                           include_query_plan=include_query_plan,
+                           json_query=query_str)
+
+    def insert_or_replace_request(self, doc_str, operation_type, condition=None):
+        request = InsertOrReplaceRequest(table_path=self.__store_path,
+                                         insert_mode=InsertMode.Value(
+                                             operation_type),
+                                         payload_encoding=PayloadEncoding
+                                         .Value('JSON_ENCODING'),
+                                         json_document=doc_str)
+        if condition is not None:
+            request.json_condition = condition
+        return request
+
+    def delete_request(self, doc_str, condition=None):
+        request = DeleteRequest(table_path=self.__store_path,
+                                payload_encoding=PayloadEncoding.Value(
+                                    'JSON_ENCODING'),
+                                json_document=doc_str)
+        if condition is not None:
+            request.json_condition = condition
+        return request
+
+    def update_request(self, doc_str, mutation, condition=None):
+        request = UpdateRequest(table_path=self.__store_path,
+                                payload_encoding=PayloadEncoding.Value(
+                                    'JSON_ENCODING'),
+                                json_document=doc_str,
+                                json_mutation=mutation)
+        if condition:
+            request.json_condition = condition
+        return request
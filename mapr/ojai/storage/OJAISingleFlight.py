@@ -0,0 +1,120 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+from builtins import *
+from builtins import object
+import threading
+from concurrent.futures import Future, TimeoutError
+
+import grpc
+
+
+class _DeadlineExceededError(grpc.RpcError):
+    """Raised to a caller whose timeout passed while it waited for the call of another."""
+
+    def code(self):
+        return grpc.StatusCode.DEADLINE_EXCEEDED
+
+    def details(self):
+        return 'Deadline Exceeded'
+
+    def __str__(self):
+        return 'Deadline exceeded while waiting for an identical call in flight.'
+
+
+class _ReplayedStream(object):
+    """Find responses received by another call, iterated like a response stream.
+    The error that ended the received stream is raised after the responses."""
+
+    def __init__(self, responses, error=None):
+        self.__responses = iter(responses)
+        self.__error = error
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self.__responses)
+        except StopIteration:
+            if self.__error is not None:
+                raise self.__error
+            raise
+
+    next = __next__
+
+    def cancel(self):
+        pass
+
+
+class OJAISingleFlight(object):
+    """Collapses concurrent calls with the same key into one: the first caller runs
+    the function, callers arriving while it runs wait and get its result or error.
+    Nothing is kept after the call completes.
+    Streams are coalesced only if streams is True, the leader then receives the whole
+    stream into memory before any caller gets it."""
+
+    def __init__(self, streams=False):
+        self.__streams = streams
+        self.__calls = {}
+        self.__lock = threading.Lock()
+        self.__coalesced = 0
+
+    @property
+    def streams(self):
+        return self.__streams
+
+    def do(self, key, function, timeout=None):
+        """:param timeout: seconds a caller waits for the call of another caller,
+        then it raises grpc.RpcError with DEADLINE_EXCEEDED"""
+        with self.__lock:
+            future = self.__calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self.__calls[key] = future
+            else:
+                self.__coalesced += 1
+        if not leader:
+            try:
+                return future.result(timeout)
+            except TimeoutError:
+                raise _DeadlineExceededError()
+        try:
+            result = function()
+        except BaseException as e:
+            self.__complete(key)
+            future.set_exception(e)
+            raise
+        self.__complete(key)
+        future.set_result(result)
+        return result
+
+    def do_stream(self, key, function, timeout=None):
+        """Like do() for a response stream: the leader receives the whole stream,
+        every caller gets its own iterator over the responses. An error of the stream
+        is raised by the iterators after the responses received before it."""
+        return _ReplayedStream(*self.do(key, lambda: OJAISingleFlight.__receive(function()),
+                                        timeout))
+
+    @staticmethod
+    def __receive(stream):
+        responses = []
+        try:
+            for response in stream:
+                responses.append(response)
+        except grpc.RpcError as e:
+            return responses, e
+        return responses, None
+
+    def __complete(self, key):
+        with self.__lock:
+            del self.__calls[key]
+
+    @property
+    def coalesced(self):
+        """Number of calls served by another in-flight call."""
+        return self.__coalesced
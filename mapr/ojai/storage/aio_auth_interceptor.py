@@ -0,0 +1,51 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+from builtins import *
+import grpc.aio
+
+from mapr.ojai.storage.auth_interceptor import _UserMetadata
+
+
+class _AioClientAuthInterceptor(
+        grpc.aio.UnaryUnaryClientInterceptor, grpc.aio.UnaryStreamClientInterceptor):
+    """grpc.aio counterpart of auth_interceptor._ClientAuthInterceptor,
+    shares the same basic/bearer token handling."""
+
+    def __init__(self, user_metadata):
+        self._user_metadata = user_metadata
+
+    def __build_call_details(self, client_call_details):
+        metadata = []
+        if client_call_details.metadata is not None:
+            metadata = list(client_call_details.metadata)
+        metadata.append((self._user_metadata.metadata_builder()))
+        return grpc.aio.ClientCallDetails(client_call_details.method,
+                                          client_call_details.timeout,
+                                          metadata,
+                                          client_call_details.credentials,
+                                          client_call_details.wait_for_ready)
+
+    async def intercept_unary_unary(self, continuation, client_call_details, request):
+        call_details = self.__build_call_details(client_call_details)
+        authorization = dict(call_details.metadata).get('authorization')
+        call = await continuation(call_details, request)
+        self._user_metadata.set_token_from_metadata(await call.initial_metadata(),
+                                                    authorization)
+        self._user_metadata.check_token_expired(await call.code(), await call.details(),
+                                                authorization)
+        return call
+
+    async def intercept_unary_stream(self, continuation, client_call_details, request):
+        call_details = self.__build_call_details(client_call_details)
+        call = await continuation(call_details, request)
+        self._user_metadata.set_token_from_metadata(
+            await call.initial_metadata(), dict(call_details.metadata).get('authorization'))
+        return call
+
+
+def client_auth_interceptor(encoded_user_metadata):
+    return _AioClientAuthInterceptor(_UserMetadata(encoded_user_metadata))
@@ -9,10 +9,16 @@ from builtins import next
 from builtins import object
 import base64
 import collections
+import json
+import threading
+import time
 import grpc
 
 from mapr.ojai.exceptions.ExpiredTokenError import ExpiredTokenError
 
+# seconds before the exp claim of the bearer token when a new token is requested
+DEFAULT_TOKEN_REFRESH_MARGIN = 30.0
+
 
 class _ClientAuthInterceptor(
         grpc.UnaryUnaryClientInterceptor, grpc.UnaryStreamClientInterceptor):
@@ -25,50 +31,133 @@ class _ClientAuthInterceptor(
         new_details, new_request_iterator, postprocess = self._fn(
             client_call_details, iter((request,)))
         response = continuation(new_details, next(new_request_iterator))
-        self._user_metadata.set_jwt_token(response)
+        authorization = _authorization(new_details)
+        if response.done():
+            self._user_metadata.set_jwt_token(response, authorization=authorization)
+        else:
+            # future() calls, e.g. hedged reads, must not wait for the response here
+            response.add_done_callback(lambda call: self.__set_jwt_token(call, authorization))
         return postprocess(response) if postprocess else response
 
+    def __set_jwt_token(self, call, authorization):
+        try:
+            self._user_metadata.set_jwt_token(call, authorization=authorization)
+        except ExpiredTokenError:
+            # the token is dropped, the call itself fails with STATUS_TOKEN_EXPIRED and is retried
+            pass
+
     def intercept_unary_stream(self, continuation, client_call_details,
                                request):
 
         new_details, new_request_iterator, postprocess = self._fn(
             client_call_details, iter((request,)))
         response_it = continuation(new_details, next(new_request_iterator))
-        self._user_metadata.set_jwt_token(response_it, True)
+        self._user_metadata.set_jwt_token(response_it, True,
+                                          authorization=_authorization(new_details))
         return postprocess(response_it) if postprocess else response_it
 
 
-class __UserMetadata(object):
+def _authorization(client_call_details):
+    return dict(client_call_details.metadata).get('authorization')
+
+
+class _UserMetadata(object):
+    """Thread-safe holder of the authorization sent with every call.
+    The bearer token returned by the gateway for a call with basic credentials
+    is reused by all calls and threads until refresh_margin seconds before the
+    exp claim of the JWT, or half its remaining lifetime for short-lived tokens.
+    Then a single call goes with basic credentials to get a new token while the
+    others keep using the old one, so the gateway does not authenticate the
+    user on every call."""
 
-    def __init__(self, encoded_user_metadata):
+    def __init__(self, encoded_user_metadata, refresh_margin=DEFAULT_TOKEN_REFRESH_MARGIN):
         self._token = None
+        self._token_expires = None
+        self._token_refresh_at = None
+        self._refreshing = False
+        self._refresh_margin = refresh_margin
         self._encoded_user_creds = encoded_user_metadata
+        self._lock = threading.Lock()
+        self._basic_authentications = 0
+        self._bearer_authentications = 0
+
+    @staticmethod
+    def __expires(token):
+        """exp claim of the JWT or None."""
+        try:
+            payload = token.split('.')[1]
+            claims = json.loads(base64.urlsafe_b64decode(
+                (payload + '=' * (-len(payload) % 4)).encode('ascii')).decode('utf8'))
+            return float(claims['exp'])
+        except (IndexError, ValueError, TypeError, KeyError, AttributeError):
+            return None
 
     def metadata_builder(self):
-        if not self._token:
-            value = 'basic {0}'.format(self._encoded_user_creds)
-        else:
-            value = 'bearer {0}'.format(self._token)
-            self._token = None
+        with self._lock:
+            now = time.time()
+            if self._token_expires is not None and now >= self._token_expires:
+                self._token = None
+                self._token_expires = None
+            refresh = self._token is not None and not self._refreshing \
+                and self._token_refresh_at is not None and now >= self._token_refresh_at
+            if not self._token or refresh:
+                self._refreshing = self._refreshing or refresh
+                self._basic_authentications += 1
+                value = 'basic {0}'.format(self._encoded_user_creds)
+            else:
+                self._bearer_authentications += 1
+                value = 'bearer {0}'.format(self._token)
         return 'authorization', value
 
-    def set_jwt_token(self, call, stream=False):
-        if not self._token:
+    def set_jwt_token(self, call, stream=False, authorization=None):
+        if authorization is None or authorization.startswith('basic'):
             try:
-                self._token = \
-                        dict(call.initial_metadata())['bearer-token']
+                metadata = call.initial_metadata()
             except:
-                pass
+                metadata = None
+            self.set_token_from_metadata(metadata, authorization)
         elif stream:
-            if call.done() and call.code() == grpc.StatusCode.UNAUTHENTICATED \
-                    and call.details() == 'STATUS_TOKEN_EXPIRED':
+            if call.done():
+                self.check_token_expired(call.code(), call.details(), authorization)
+        else:
+            self.check_token_expired(call.code(), call.details(), authorization)
+
+    def set_token_from_metadata(self, metadata, authorization=None):
+        token = dict(metadata or ()).get('bearer-token')
+        with self._lock:
+            if authorization is None or authorization.startswith('basic'):
+                self._refreshing = False
+            if token and token != self._token:
+                self._token = token
+                self._token_expires = _UserMetadata.__expires(token)
+                self._token_refresh_at = None
+                if self._token_expires is not None:
+                    # tokens living shorter than twice the margin are refreshed halfway
+                    lifetime = self._token_expires - time.time()
+                    self._token_refresh_at = \
+                        self._token_expires - min(self._refresh_margin, lifetime / 2)
+
+    def check_token_expired(self, code, details, authorization=None):
+        if code == grpc.StatusCode.UNAUTHENTICATED \
+                and details == 'STATUS_TOKEN_EXPIRED':
+            with self._lock:
+                # a newer token received by another call is kept
+                if authorization is None \
+                        or authorization == 'bearer {0}'.format(self._token):
                     self._token = None
-                    raise ExpiredTokenError()
-        elif call.code() == grpc.StatusCode.UNAUTHENTICATED \
-                and call.details() == 'STATUS_TOKEN_EXPIRED':
-            self._token = None
+                    self._token_expires = None
             raise ExpiredTokenError()
 
+    @property
+    def basic_authentications(self):
+        """Number of calls sent with basic credentials."""
+        return self._basic_authentications
+
+    @property
+    def bearer_authentications(self):
+        """Number of calls sent with bearer token."""
+        return self._bearer_authentications
+
 
 class _ClientCallDetails(
         collections.namedtuple(
@@ -78,8 +167,9 @@ class _ClientCallDetails(
     pass
 
 
-def client_auth_interceptor(encoded_user_metadata):
-    user_metadata = __UserMetadata(encoded_user_metadata)
+def client_auth_interceptor(encoded_user_metadata, user_metadata=None):
+    if user_metadata is None:
+        user_metadata = _UserMetadata(encoded_user_metadata)
 
     def intercept_call(client_call_details, request_iterator):
         metadata = []
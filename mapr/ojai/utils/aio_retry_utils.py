@@ -0,0 +1,55 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+from builtins import *
+import asyncio
+import functools
+import time
+
+from grpc import StatusCode
+from grpc.aio import AioRpcError
+
+from mapr.ojai.exceptions.ExpiredTokenError import ExpiredTokenError
+
+
+# Retry checker function, grpc.aio counterpart of retry_if_connection_not_established
+def retry_if_aio_connection_not_established(exception):
+    if isinstance(exception, AioRpcError):
+        if exception.code() == StatusCode.UNAUTHENTICATED \
+                and exception.details() == 'STATUS_TOKEN_EXPIRED':
+            return True
+        else:
+            return exception.code() == StatusCode.UNAVAILABLE \
+                   or exception.code() == StatusCode.RESOURCE_EXHAUSTED
+    elif isinstance(exception, ExpiredTokenError):
+        return True
+    else:
+        return False
+
+
+def aio_retry(retry_config, retry_on_exception=retry_if_aio_connection_not_established):
+    """Coroutine version of retry_utils.policy_retry, retry_config is RetryPolicy."""
+
+    def decorator(coroutine_function):
+        @functools.wraps(coroutine_function)
+        async def wrapper(*args, **kwargs):
+            if retry_config.budget is not None:
+                retry_config.budget.deposit()
+            started = time.time()
+            attempt = 0
+            while True:
+                attempt += 1
+                try:
+                    return await coroutine_function(*args, **kwargs)
+                except Exception as e:
+                    delay = retry_config.next_delay(e, attempt, started, retry_on_exception)
+                    if delay is None:
+                        raise
+                    await asyncio.sleep(delay)
+
+        return wrapper
+
+    return decorator
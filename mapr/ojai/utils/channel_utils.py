@@ -0,0 +1,58 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+from builtins import *
+from builtins import object
+import grpc
+
+from mapr.ojai.exceptions.IllegalArgumentError import IllegalArgumentError
+
+# ojai.mapr.rpc.* connection options passed to the channel as gRPC arguments
+CHANNEL_ARGUMENTS = (
+    ('ojai.mapr.rpc.max-receive-message-length', 'grpc.max_receive_message_length'),
+    ('ojai.mapr.rpc.max-send-message-length', 'grpc.max_send_message_length'),
+    ('ojai.mapr.rpc.keepalive-time-ms', 'grpc.keepalive_time_ms'),
+    ('ojai.mapr.rpc.keepalive-timeout-ms', 'grpc.keepalive_timeout_ms'),
+    ('ojai.mapr.rpc.keepalive-permit-without-calls', 'grpc.keepalive_permit_without_calls'),
+    ('ojai.mapr.rpc.http2-max-pings-without-data', 'grpc.http2.max_pings_without_data'),
+    ('ojai.mapr.rpc.http2-lookahead-bytes', 'grpc.http2.lookahead_bytes'),
+    ('ojai.mapr.rpc.http2-bdp-probe', 'grpc.http2.bdp_probe'),
+)
+COMPRESSION_ALGORITHMS = {
+    'none': grpc.Compression.NoCompression,
+    'gzip': grpc.Compression.Gzip,
+    'deflate': grpc.Compression.Deflate,
+}
+
+
+# Channel option class
+class ChannelOptions(object):
+    def __init__(self, arguments=None, compression=None):
+        self.arguments = arguments if arguments is not None else []
+        self.compression = compression
+
+
+def get_channel_options(options):
+    """Builds ChannelOptions from ojai.mapr.rpc.* connection options,
+    ojai.mapr.rpc.compression sets the compression of every call on the channel.
+    :raises IllegalArgumentError: option value is not int or bool, or compression is unknown."""
+    arguments = []
+    for option_name, argument_name in CHANNEL_ARGUMENTS:
+        if option_name not in options:
+            continue
+        value = options[option_name]
+        if not isinstance(value, int):
+            raise IllegalArgumentError(m='Option {0} must be int or bool, but was {1}.'
+                                       .format(option_name, type(value).__name__))
+        arguments.append((argument_name, int(value)))
+    compression = options.get('ojai.mapr.rpc.compression')
+    if compression is not None:
+        if compression not in COMPRESSION_ALGORITHMS:
+            raise IllegalArgumentError(m='Unknown compression {0}, supported: {1}.'
+                                       .format(compression,
+                                               ', '.join(sorted(COMPRESSION_ALGORITHMS))))
+        compression = COMPRESSION_ALGORITHMS[compression]
+    return ChannelOptions(arguments=arguments, compression=compression)
@@ -0,0 +1,166 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+from builtins import *
+from builtins import object
+import json
+import math
+from collections import OrderedDict
+
+from mapr.ojai.exceptions.EncodingError import EncodingError
+from mapr.ojai.exceptions.IllegalArgumentError import IllegalArgumentError
+from mapr.ojai.ojai.document_utils import type_serializer
+
+# Codec names accepted by the ojai.mapr.json-codec option
+JSON_CODEC_AUTO = 'auto'
+JSON_CODEC_STDLIB = 'json'
+# the other codecs are faster but reject some values json accepts, so they are opt-in
+DEFAULT_JSON_CODEC = JSON_CODEC_STDLIB
+# errors raised by the codec libraries for values they cannot encode
+_ENCODE_ERRORS = (TypeError, ValueError, OverflowError, AttributeError)
+
+
+# JSON codec classes
+class StdlibJsonCodec(object):
+    """Standard library json, always available.
+    Other codecs use the library for dumps and plain loads, but decode with object_hook
+    through the json C scanner: a hook over the library output is slower."""
+    name = JSON_CODEC_STDLIB
+    module_name = 'json'
+
+    def dumps(self, value):
+        return json.dumps(value, default=type_serializer)
+
+    def loads(self, json_string, object_hook=None):
+        return json.loads(json_string, object_hook=object_hook)
+
+
+def _encoding_error(codec, value, error):
+    return EncodingError(m='JSON codec {0} cannot encode {1!r}: {2}. Use the json codec.'
+                         .format(codec.name, value, error))
+
+
+def _has_non_finite(value):
+    """True if value holds a NaN or Infinity float, including values of types
+    encoded through type_serializer."""
+    if isinstance(value, float):
+        return math.isnan(value) or math.isinf(value)
+    if isinstance(value, dict):
+        return any(_has_non_finite(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return any(_has_non_finite(item) for item in value)
+    if value is None or isinstance(value, (str, bytes, bytearray, int)):
+        return False
+    try:
+        return _has_non_finite(type_serializer(value))
+    except Exception:
+        return False
+
+
+class OrjsonCodec(StdlibJsonCodec):
+    """orjson writes NaN and Infinity as null, a value holding them is encoded
+    by json. Integers beyond 64 bits raise EncodingError."""
+    name = 'orjson'
+    module_name = 'orjson'
+
+    def __init__(self):
+        import orjson
+        self.__orjson = orjson
+
+    def dumps(self, value):
+        try:
+            json_bytes = self.__orjson.dumps(value, default=type_serializer,
+                                             option=self.__orjson.OPT_NON_STR_KEYS)
+        except _ENCODE_ERRORS as e:
+            raise _encoding_error(self, value, e)
+        # the value is walked only when the output has a null that may be a lost NaN
+        if b'null' in json_bytes and _has_non_finite(value):
+            return StdlibJsonCodec.dumps(self, value)
+        return json_bytes.decode('utf-8')
+
+    def loads(self, json_string, object_hook=None):
+        if object_hook is not None:
+            return StdlibJsonCodec.loads(self, json_string, object_hook=object_hook)
+        return self.__orjson.loads(json_string)
+
+
+class UjsonCodec(StdlibJsonCodec):
+    name = 'ujson'
+    module_name = 'ujson'
+
+    def __init__(self):
+        import ujson
+        self.__ujson = ujson
+
+    def dumps(self, value):
+        try:
+            return self.__ujson.dumps(value, default=type_serializer,
+                                      escape_forward_slashes=False)
+        except _ENCODE_ERRORS as e:
+            raise _encoding_error(self, value, e)
+
+    def loads(self, json_string, object_hook=None):
+        if object_hook is not None:
+            return StdlibJsonCodec.loads(self, json_string, object_hook=object_hook)
+        return self.__ujson.loads(json_string)
+
+
+class RapidjsonCodec(StdlibJsonCodec):
+    name = 'rapidjson'
+    module_name = 'rapidjson'
+
+    def __init__(self):
+        import rapidjson
+        self.__rapidjson = rapidjson
+
+    def dumps(self, value):
+        try:
+            return self.__rapidjson.dumps(value, default=type_serializer,
+                                          mapping_mode=self.__rapidjson.MM_COERCE_KEYS_TO_STRINGS)
+        except _ENCODE_ERRORS as e:
+            raise _encoding_error(self, value, e)
+
+    def loads(self, json_string, object_hook=None):
+        if object_hook is not None:
+            return StdlibJsonCodec.loads(self, json_string, object_hook=object_hook)
+        return self.__rapidjson.loads(json_string)
+
+
+# Codecs in the order they are tried for JSON_CODEC_AUTO
+JSON_CODECS = OrderedDict((codec.name, codec) for codec in (OrjsonCodec,
+                                                              UjsonCodec,
+                                                              RapidjsonCodec,
+                                                              StdlibJsonCodec))
+__codec_instances = {}
+
+
+def get_json_codec(name=None):
+    """Returns codec by name, DEFAULT_JSON_CODEC if None,
+    JSON_CODEC_AUTO picks the first installed one.
+    :raises IllegalArgumentError: codec is unknown or its module is not installed."""
+    if name is None:
+        name = DEFAULT_JSON_CODEC
+    codec = __codec_instances.get(name)
+    if codec is not None:
+        return codec
+    if name == JSON_CODEC_AUTO:
+        for codec_class in list(JSON_CODECS.values()):
+            try:
+                codec = codec_class()
+                break
+            except ImportError:
+                continue
+    elif name in JSON_CODECS:
+        try:
+            codec = JSON_CODECS[name]()
+        except ImportError:
+            raise IllegalArgumentError(m='JSON codec {0} requires {1} module to be installed.'
+                                       .format(name, JSON_CODECS[name].module_name))
+    else:
+        raise IllegalArgumentError(m='Unknown JSON codec {0}, supported: {1}.'
+                                   .format(name, ', '.join([JSON_CODEC_AUTO] + list(JSON_CODECS))))
+    __codec_instances[name] = codec
+    return codec
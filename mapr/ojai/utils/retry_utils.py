@@ -6,15 +6,31 @@ from future import standard_library
 standard_library.install_aliases()
 from builtins import *
 from builtins import object
+import functools
+import random
+import threading
+import time
+
+import grpc
 from grpc import StatusCode
-from grpc._channel import _Rendezvous
 
 from mapr.ojai.exceptions.ExpiredTokenError import ExpiredTokenError
+from mapr.ojai.exceptions.IllegalArgumentError import IllegalArgumentError
+import logging
+
+LOG = logging.getLogger(__name__)
 
 # Retry default constants
 DEFAULT_WAIT_EXPONENTIAL_MULTIPLIER = 1000
 DEFAULT_WAIT_EXPONENTIAL_MAX = 18000
 DEFAULT_STOP_MAX_ATTEMPT = 7
+# tokens deposited to the retry budget by every call, a retry takes one token
+DEFAULT_RETRY_BUDGET_RATIO = 0.1
+# tokens added to the retry budget every second regardless of the calls
+DEFAULT_RETRY_BUDGET_MIN_PER_SECOND = 10.0
+DEFAULT_RETRY_BUDGET_MAX_TOKENS = 100.0
+# policy_retry calls in progress in the current thread, innermost last
+_calls = threading.local()
 
 
 # Retry option class
@@ -28,9 +44,243 @@ class RetryOptions(object):
         self.stop_max_attempt_number = stop_max_attempt_number
 
 
+class RetryBudget(object):
+    """Thread-safe token bucket limiting the retries of all calls of a connection,
+    so that a failing gateway gets at most about ratio more calls than it would
+    without retries. Every call deposits ratio tokens, every retry withdraws one
+    and is refused when the bucket is empty. min_per_second tokens are added
+    every second, so rarely used connections can still retry."""
+
+    def __init__(self, ratio=DEFAULT_RETRY_BUDGET_RATIO,
+                 min_per_second=DEFAULT_RETRY_BUDGET_MIN_PER_SECOND,
+                 max_tokens=DEFAULT_RETRY_BUDGET_MAX_TOKENS):
+        self.__ratio = ratio
+        self.__min_per_second = min_per_second
+        self.__max_tokens = max_tokens
+        self.__tokens = min(max(min_per_second, 1.0), max_tokens)
+        self.__updated = time.time()
+        self.__refused = 0
+        self.__lock = threading.Lock()
+
+    def __refill(self, tokens):
+        now = time.time()
+        self.__tokens = min(self.__tokens + tokens
+                            + (now - self.__updated) * self.__min_per_second,
+                            self.__max_tokens)
+        self.__updated = now
+
+    def deposit(self):
+        with self.__lock:
+            self.__refill(self.__ratio)
+
+    def withdraw(self):
+        """:return: True if a retry is allowed."""
+        with self.__lock:
+            self.__refill(0.0)
+            if self.__tokens < 1.0:
+                self.__refused += 1
+                return False
+            self.__tokens -= 1.0
+            return True
+
+    @property
+    def tokens(self):
+        return self.__tokens
+
+    @property
+    def refused(self):
+        """Number of retries refused because the budget was exhausted."""
+        return self.__refused
+
+
+class RpcDeadlines(object):
+    """Default timeouts in seconds of the RPCs of a connection per operation class,
+    None for no deadline. read: FindById, write: InsertOrReplace, Update, Delete,
+    ddl: CreateTable, TableExists, DeleteTable, scan: the whole Find stream."""
+
+    def __init__(self, read=None, write=None, ddl=None, scan=None):
+        self.read = read
+        self.write = write
+        self.ddl = ddl
+        self.scan = scan
+
+
+class _Call(object):
+
+    def __init__(self, started, deadline=None):
+        """:param deadline: RetryPolicy.deadline in ms or None"""
+        self.started = started
+        self.expires = None
+        self.deadline_expires = started + deadline / 1000.0 if deadline is not None else None
+
+
+def call_timeout(timeout):
+    """Timeout for the next RPC of the current policy_retry call: timeout seconds
+    counted from the first attempt, so that the attempts share one deadline and
+    the call is not retried after it. The RPC gets at most the time left before
+    the retry deadline of the policy, whichever is earlier wins.
+    Outside policy_retry returns timeout.
+    :param timeout: seconds or None for no deadline"""
+    calls = getattr(_calls, 'stack', None)
+    if not calls:
+        return timeout
+    call = calls[-1]
+    if timeout is not None:
+        call.expires = call.started + timeout
+    expires = [e for e in (call.expires, call.deadline_expires) if e is not None]
+    if not expires:
+        return None
+    return max(min(expires) - time.time(), 0.0)
+
+
+class RetryPolicy(RetryOptions):
+    """RetryOptions with full jitter, a shared RetryBudget, an overall deadline
+    and per status code attempt limits.
+    After attempt n the call is retried after a random wait between 0 and
+    min(wait_exponential_max, wait_exponential_multiplier * 2^n) ms, unless the
+    retry would start after deadline ms from the first attempt or the budget
+    is exhausted. status_code_attempts maps StatusCode to the maximum number of
+    attempts for errors with that code, 0 disables retries, codes not in it are
+    retried as decided by retry_if_connection_not_established."""
+
+    def __init__(self,
+                 wait_exponential_multiplier=DEFAULT_WAIT_EXPONENTIAL_MULTIPLIER,
+                 wait_exponential_max=DEFAULT_WAIT_EXPONENTIAL_MAX,
+                 stop_max_attempt_number=DEFAULT_STOP_MAX_ATTEMPT,
+                 jitter=True,
+                 deadline=None,
+                 budget=None,
+                 status_code_attempts=None):
+        super(RetryPolicy, self).__init__(wait_exponential_multiplier,
+                                          wait_exponential_max,
+                                          stop_max_attempt_number)
+        self.jitter = jitter
+        self.deadline = deadline
+        self.budget = budget
+        self.status_code_attempts = status_code_attempts or {}
+
+    def should_retry(self, exception, attempt,
+                     retry_on_exception=None):
+        if retry_on_exception is None:
+            retry_on_exception = retry_if_connection_not_established
+        if isinstance(exception, grpc.RpcError) and hasattr(exception, 'code'):
+            max_attempts = self.status_code_attempts.get(exception.code())
+            if max_attempts is not None:
+                return attempt < max_attempts
+        return attempt < self.stop_max_attempt_number and retry_on_exception(exception)
+
+    def next_delay(self, exception, attempt, started, retry_on_exception=None,
+                   expires=None):
+        """:param expires: time.time() of the RPC deadline of the call, see call_timeout
+        :return: seconds to wait before the next attempt, or None if the call
+        must fail with exception."""
+        if not self.should_retry(exception, attempt, retry_on_exception):
+            return None
+        delay = min(self.wait_exponential_multiplier * 2 ** attempt,
+                    self.wait_exponential_max) / 1000.0
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        if self.deadline is not None \
+                and time.time() + delay - started >= self.deadline / 1000.0:
+            LOG.debug('Not retrying after %s attempts, deadline exceeded.', attempt)
+            return None
+        if expires is not None and time.time() + delay >= expires:
+            LOG.debug('Not retrying after %s attempts, RPC deadline exceeded.', attempt)
+            return None
+        if self.budget is not None and not self.budget.withdraw():
+            LOG.debug('Not retrying after %s attempts, retry budget exhausted.', attempt)
+            return None
+        return delay
+
+
+def policy_retry(retry_policy, retry_on_exception=None):
+    """Decorator retrying calls as decided by retry_policy."""
+
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if retry_policy.budget is not None:
+                retry_policy.budget.deposit()
+            started = time.time()
+            call = _Call(started, retry_policy.deadline)
+            if not hasattr(_calls, 'stack'):
+                _calls.stack = []
+            _calls.stack.append(call)
+            attempt = 0
+            try:
+                while True:
+                    attempt += 1
+                    try:
+                        return function(*args, **kwargs)
+                    except Exception as e:
+                        delay = retry_policy.next_delay(e, attempt, started,
+                                                        retry_on_exception, call.expires)
+                        if delay is None:
+                            raise
+                        LOG.debug('Retrying %s in %.3f seconds after %s.',
+                                  function.__name__, delay, e)
+                        time.sleep(delay)
+            finally:
+                _calls.stack.pop()
+
+        return wrapper
+
+    return decorator
+
+
+def get_retry_policy(options):
+    """Builds RetryPolicy from ojai.mapr.rpc.* connection options,
+    the retry budget is shared by every store of the connection.
+    :raises IllegalArgumentError: invalid option value or unknown status code."""
+    deadline = options.get('ojai.mapr.rpc.retry-deadline-milliseconds')
+    if deadline is not None and (not isinstance(deadline, (int, float)) or deadline <= 0):
+        raise IllegalArgumentError(m='Retry deadline must be positive number.')
+    budget = None
+    if options.get('ojai.mapr.rpc.retry-budget', True):
+        ratio = options.get('ojai.mapr.rpc.retry-budget-ratio', DEFAULT_RETRY_BUDGET_RATIO)
+        min_per_second = options.get('ojai.mapr.rpc.retry-budget-min-per-second',
+                                     DEFAULT_RETRY_BUDGET_MIN_PER_SECOND)
+        for value in (ratio, min_per_second):
+            if not isinstance(value, (int, float)) or value < 0:
+                raise IllegalArgumentError(m='Retry budget options must be non-negative numbers.')
+        budget = RetryBudget(ratio=ratio, min_per_second=min_per_second)
+    status_code_attempts = {}
+    for name, max_attempts in list(options.get('ojai.mapr.rpc.retry-status-codes', {}).items()):
+        if name not in StatusCode.__members__:
+            raise IllegalArgumentError(m='Unknown status code {0}.'.format(name))
+        if not isinstance(max_attempts, int) or max_attempts < 0:
+            raise IllegalArgumentError(m='Attempts for status code {0} must be non-negative int.'
+                                       .format(name))
+        status_code_attempts[StatusCode[name]] = max_attempts
+    return RetryPolicy(options.get('ojai.mapr.rpc.wait-multiplier',
+                                   DEFAULT_WAIT_EXPONENTIAL_MULTIPLIER),
+                       options.get('ojai.mapr.rpc.wait-max-attempt',
+                                   DEFAULT_WAIT_EXPONENTIAL_MAX),
+                       options.get('ojai.mapr.rpc.max-retries',
+                                   DEFAULT_STOP_MAX_ATTEMPT),
+                       jitter=options.get('ojai.mapr.rpc.retry-jitter', True),
+                       deadline=deadline,
+                       budget=budget,
+                       status_code_attempts=status_code_attempts)
+
+
+def get_rpc_deadlines(options):
+    """Builds RpcDeadlines from ojai.mapr.rpc.*-timeout-milliseconds connection options.
+    :raises IllegalArgumentError: invalid option value."""
+    timeouts = []
+    for operation_class in ('read', 'write', 'ddl', 'scan'):
+        timeout = options.get('ojai.mapr.rpc.{0}-timeout-milliseconds'.format(operation_class))
+        if timeout is not None and (not isinstance(timeout, (int, float)) or timeout <= 0):
+            raise IllegalArgumentError(m='RPC {0} timeout must be positive number.'
+                                       .format(operation_class))
+        timeouts.append(timeout / 1000.0 if timeout is not None else None)
+    return RpcDeadlines(*timeouts)
+
+
 # Retry checker function
 def retry_if_connection_not_established(exception):
-    if isinstance(exception, _Rendezvous):
+    # grpc.RpcError covers stream errors (_Rendezvous) and unary errors (_InactiveRpcError)
+    if isinstance(exception, grpc.RpcError) and hasattr(exception, 'code'):
         if exception.code() == StatusCode.UNAUTHENTICATED \
                 and exception.details() == 'STATUS_TOKEN_EXPIRED':
             return True
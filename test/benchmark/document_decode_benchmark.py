@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+from future import standard_library
+standard_library.install_aliases()
+from builtins import range
+from builtins import *
+import json
+import timeit
+
+from ojai.types.ODate import ODate
+
+from mapr.ojai.ojai.OJAIDocument import OJAIDocument
+from mapr.ojai.ojai_utils.ojai_document_creator import OJAIDocumentCreator
+
+FIELD_COUNTS = (10, 50, 200, 800)
+NUMBER = 200
+REPEAT = 5
+
+
+def build_json(field_count):
+    # dates are kept rare, their parsing in ojai.types costs the same on both paths
+    doc = OJAIDocument().set_id('id001')
+    for i in range(field_count):
+        if i % 4 == 0:
+            doc.set('group{0}.int{1}'.format(i % 10, i), i)
+        elif i % 4 == 1:
+            doc.set('group{0}.float{1}'.format(i % 10, i), i * 1.5)
+        elif i % 4 == 2:
+            doc.set('group{0}.str{1}'.format(i % 10, i), 'value{0}'.format(i))
+        else:
+            doc.set('group{0}.list{1}'.format(i % 10, i), [i, 'str', {'float': i * 1.5}])
+    doc.set('created', ODate(days_since_epoch=17000))
+    return doc.as_json_str()
+
+
+def two_pass_decode(json_string):
+    return OJAIDocument().from_dict(OJAIDocumentCreator.remove_tags(json.loads(json_string)))
+
+
+if __name__ == '__main__':
+    print('{0:>8} {1:>16} {2:>16} {3:>10}'.format('fields', 'two pass, us', 'object_hook, us',
+                                                   'speedup'))
+    for field_count in FIELD_COUNTS:
+        json_string = build_json(field_count)
+        two_pass = min(timeit.repeat(lambda: two_pass_decode(json_string),
+                                     number=NUMBER, repeat=REPEAT)) / NUMBER
+        object_hook = min(timeit.repeat(lambda: OJAIDocumentCreator.create_document(json_string),
+                                        number=NUMBER, repeat=REPEAT)) / NUMBER
+        print('{0:>8} {1:>16.1f} {2:>16.1f} {3:>9.2f}x'.format(field_count,
+                                                              two_pass * 1000000,
+                                                              object_hook * 1000000,
+                                                              two_pass / object_hook))
@@ -0,0 +1,33 @@
+#!/usr/bin/env python
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+from future import standard_library
+standard_library.install_aliases()
+from builtins import range
+from builtins import *
+import timeit
+
+from mapr.ojai.ojai.OJAIDocument import OJAIDocument
+
+FIELD_COUNTS = (25, 50, 100, 200, 400, 800)
+REPEAT = 5
+
+
+def build_document(field_count):
+    doc = OJAIDocument().set_id('id001')
+    for i in range(field_count):
+        doc.set('group{0}.field{1}'.format(i % 10, i), i)
+    return doc
+
+
+if __name__ == '__main__':
+    print('{0:>8} {1:>12} {2:>14}'.format('fields', 'build, ms', 'per field, us'))
+    for field_count in FIELD_COUNTS:
+        elapsed = min(timeit.repeat(lambda: build_document(field_count),
+                                    number=1, repeat=REPEAT))
+        print('{0:>8} {1:>12.3f} {2:>14.3f}'.format(field_count,
+                                                    elapsed * 1000,
+                                                    elapsed * 1000000 / field_count))
@@ -14,6 +14,7 @@ from random import getrandbits, randint
 
 from ojai.types.OInterval import OInterval
 from mapr.ojai.ojai.OJAIDocument import OJAIDocument
+from mapr.ojai.ojai.OJAIFieldPath import OJAIFieldPath
 from ojai.types.ODate import ODate
 from ojai.types.OTime import OTime
 from ojai.types.OTimestamp import OTimestamp
@@ -28,6 +29,29 @@ except ImportError:
 
 class DocumentTest(unittest.TestCase):
 
+    def test_doc_set_nested_in_place(self):
+        doc = OJAIDocument()
+        for i in range(200):
+            doc.set('level1.level2.field{0}'.format(i), i)
+        self.assertEqual(len(doc.get_dictionary('level1.level2')), 200)
+        self.assertEqual(doc.get_int('level1.level2.field199'), 199)
+
+        doc.set('level1.level2', 'replaced') \
+            .set('level1.other', {'a': 1}) \
+            .set('level1.other.b', 2) \
+            .set('test_list', [1, 2, 3]) \
+            .set('test_list[1]', 'second') \
+            .set('test_list[5]', 'sixth')
+        self.assertEqual(doc.as_dictionary(),
+                         {'level1': {'level2': 'replaced', 'other': {'a': 1, 'b': 2}},
+                          'test_list': [1, 'second', 3, None, None, 'sixth']})
+
+        nested = {'c': {'d': 1}}
+        doc.set('level1.nested', OJAIDocument().from_dict(nested))
+        doc.set('level1.nested.c.e', 2)
+        self.assertEqual(nested, {'c': {'d': 1}})
+        self.assertEqual(doc.get('level1.nested'), {'c': {'d': 1, 'e': 2}})
+
     def test_empty_doc(self):
         doc = OJAIDocument()
         self.assertTrue(doc.empty())
@@ -293,3 +317,24 @@ class DocumentTest(unittest.TestCase):
                           "test_dict2": {}, "test_list": [1, 2, "str", False, "1979-06-20"]},
                           "test_float": 11.1, "test_bytearray": "\u0006\u0006"},
                          json.loads(doc.as_json_str(with_tags=False)))
+
+    def test_field_path(self):
+        field_path = OJAIFieldPath.parse('first."second.third"[2]')
+        self.assertEqual(field_path.segments, ('first', 'second.third'))
+        self.assertEqual(field_path.index, 2)
+        self.assertEqual(field_path.path, 'first."second.third"[2]')
+        self.assertIs(OJAIFieldPath.parse(field_path), field_path)
+        self.assertEqual(OJAIFieldPath.parse('a.b'), OJAIFieldPath('a.b'))
+        self.assertIsNone(OJAIFieldPath.parse('a.b').index)
+
+        name_path = OJAIFieldPath.parse('user.name')
+        list_path = OJAIFieldPath.parse('user.tags[1]')
+        doc = OJAIDocument() \
+            .set(name_path, 'John') \
+            .set('user.tags', ['a', 'b']) \
+            .set(list_path, 'c')
+        self.assertEqual(doc.get_str(name_path), 'John')
+        self.assertEqual(doc.get(list_path), 'c')
+        self.assertEqual(doc.as_dictionary(), {'user': {'name': 'John', 'tags': ['a', 'c']}})
+        doc.delete(list_path).delete(name_path)
+        self.assertEqual(doc.as_dictionary(), {'user': {'tags': ['a']}})
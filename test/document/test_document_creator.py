@@ -35,3 +35,16 @@ class DocumentCreatorTest(unittest.TestCase):
         doc = OJAIDocumentCreator.create_document(json_string=doc_string)
         self.assertEqual({'test_null': None, 'test_dict': {'test_int': 5}, 'test_list': [5, 6], '_id': u'id008',
                           'test_str': 'strstr', 'test_int': 51}, doc.as_dictionary())
+
+    def test_doc_creator_decode_tags(self):
+        doc_string = '{"_id": "id001", "test_list": [{"$numberLong": 1}, [{"$numberFloat": 2.5}], ' \
+                     '{"test_binary": {"$binary": "BgY="}}], "test_dict": {"test_interval": {"$interval": 3000}, ' \
+                     '"test_date": {"$dateDay": "1979-06-19"}, "test_time": {"$time": "12:12:12"}, ' \
+                     '"test_empty": {}}}'
+        doc = OJAIDocumentCreator.create_document(json_string=doc_string)
+        self.assertEqual(doc.get('test_list'), [1, [2.5], {'test_binary': bytearray(b'\x06\x06')}])
+        self.assertEqual(doc.get_interval('test_dict.test_interval').time_duration, 3000)
+        self.assertEqual(doc.get_date('test_dict.test_date').to_date_str(), '1979-06-19')
+        self.assertEqual(doc.get_time('test_dict.test_time').time_to_str(), '12:12:12')
+        self.assertEqual(doc.get('test_dict.test_empty'), {})
+        self.assertEqual(OJAIDocumentCreator.decode_tags({'a': 1, 'b': {'c': 2}}), {'a': 1, 'b': {'c': 2}})
@@ -12,6 +12,9 @@ from datetime import datetime
 
 from ojai.types.OInterval import OInterval
 from mapr.ojai.ojai.OJAIDocument import OJAIDocument
+from mapr.ojai.ojai.OJAITagsBuilder import OJAITagsBuilder
+from mapr.ojai.ojai.OJAITagsEncoder import OJAITagsEncoder
+from mapr.ojai.ojai import document_utils
 from ojai.types.ODate import ODate
 from ojai.types.OTime import OTime
 from ojai.types.OTimestamp import OTimestamp
@@ -271,3 +274,26 @@ class DocumentTagsTest(unittest.TestCase):
                                                              "tag": "PY"}}}]}))
         self.assertEqual(doc.as_json_str(with_tags=False),
                          json.dumps(test_doc_dict))
+
+    def test_tags_encoder_matches_tags_builder(self):
+        doc = OJAIDocument().set_id('id001') \
+            .set('test_int', 123) \
+            .set('test_float', 11.1) \
+            .set('test_str', 'strstr') \
+            .set('test_bool', False) \
+            .set('test_null', None) \
+            .set('first.test_time', OTime(timestamp=1518689532)) \
+            .set('first.test_timestamp', OTimestamp(millis_since_epoch=29877132000)) \
+            .set('first.test_date', ODate(days_since_epoch=3456)) \
+            .set('first.test_interval', OInterval(milli_seconds=172800000)) \
+            .set('first.test_bytearray', bytearray(b'\x06\x06')) \
+            .set('first.test_dict', {'a': 1, 'b': {'c': [1, 2.5, {'d': [3, 'e']}]}, 'f': {}}) \
+            .set('test_list', [1, [2, ODate(days_since_epoch=1)], {'a': [1, 2], 'b': 3}, {}, None]) \
+            .set('test_doc', OJAIDocument().set('inner', 5))
+        builder_json = json.dumps(OJAITagsBuilder().set('tmp', doc.as_dictionary())
+                                  .as_dictionary()['tmp'],
+                                  default=document_utils.type_serializer)
+        self.assertEqual(doc.as_json_str(), builder_json)
+        self.assertEqual(OJAITagsEncoder.dumps(doc.as_dictionary()), builder_json)
+        self.assertEqual(OJAITagsEncoder.encode({'$numberLong': 5, 'a': 5}),
+                         {'$numberLong': 5, 'a': {'$numberLong': 5}})
@@ -0,0 +1,138 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+from builtins import *
+import json
+
+from ojai.types.ODate import ODate
+from ojai.types.OInterval import OInterval
+from ojai.types.OTime import OTime
+from ojai.types.OTimestamp import OTimestamp
+
+from mapr.ojai.document.OJAIDocumentMutation import OJAIDocumentMutation
+from mapr.ojai.exceptions.EncodingError import EncodingError
+from mapr.ojai.exceptions.IllegalArgumentError import IllegalArgumentError
+from mapr.ojai.ojai.OJAIDocument import OJAIDocument
+from mapr.ojai.ojai.OJAITagsEncoder import OJAITagsEncoder
+from mapr.ojai.ojai_query.OJAIQueryCondition import OJAIQueryCondition
+from mapr.ojai.ojai_query.QueryOp import QueryOp
+from mapr.ojai.ojai_utils.ojai_document_creator import OJAIDocumentCreator
+from mapr.ojai.storage.OJAIRequestBuilder import OJAIRequestBuilder
+from mapr.ojai.utils.json_codec import JSON_CODECS, get_json_codec, StdlibJsonCodec, \
+    DEFAULT_JSON_CODEC
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+
+def installed_codecs():
+    codecs = []
+    for name in JSON_CODECS:
+        try:
+            codecs.append(get_json_codec(name))
+        except IllegalArgumentError:
+            pass
+    return codecs
+
+
+class JsonCodecTest(unittest.TestCase):
+
+    doc = OJAIDocument().set_id('id001') \
+        .set('test_int', 123) \
+        .set('test_float', 11.1) \
+        .set('test_str', 'str/with "quotes" é') \
+        .set('test_bool', True) \
+        .set('test_null', None) \
+        .set('first.test_time', OTime(timestamp=1518689532)) \
+        .set('first.test_timestamp', OTimestamp(millis_since_epoch=29877132000)) \
+        .set('first.test_date', ODate(days_since_epoch=3456)) \
+        .set('first.test_interval', OInterval(milli_seconds=172800000)) \
+        .set('first.test_bytearray', bytearray(b'\x06\x06')) \
+        .set('test_list', [1, [2.5, 'a'], {'a': [1, 2], 'b': 3}, {}, None])
+
+    def test_stdlib_codec_output_is_unchanged(self):
+        builder = OJAIRequestBuilder(store_path='/test-store', json_codec=get_json_codec('json'))
+        self.assertEqual(builder.get_doc_str(self.doc), self.doc.as_json_str())
+
+    def test_codecs_wire_output(self):
+        stdlib_builder = OJAIRequestBuilder(store_path='/test-store')
+        mutation = OJAIDocumentMutation().set('a.b', 5).increment('c', 1.5)
+        condition = OJAIQueryCondition().and_().is_('a', QueryOp.GREATER, 5) \
+            .equals_('b', 'str').close().close().build()
+        for codec in installed_codecs():
+            builder = OJAIRequestBuilder(store_path='/test-store', json_codec=codec)
+            for expected, actual in ((stdlib_builder.get_doc_str(self.doc), builder.get_doc_str(self.doc)),
+                                     (stdlib_builder.get_str_mutation(mutation),
+                                      builder.get_str_mutation(mutation)),
+                                     (stdlib_builder.get_str_condition(condition),
+                                      builder.get_str_condition(condition)),
+                                     (stdlib_builder.get_query_str({'$select': ['a', 'b']}),
+                                      builder.get_query_str({'$select': ['a', 'b']}))):
+                self.assertEqual(json.loads(actual), json.loads(expected), codec.name)
+
+    def test_codecs_decode(self):
+        json_string = self.doc.as_json_str()
+        expected = OJAIDocumentCreator.create_document(json_string).as_json_str()
+        for codec in installed_codecs():
+            self.assertEqual(OJAIDocumentCreator.create_document(json_string, json_codec=codec)
+                             .as_json_str(), expected, codec.name)
+
+    def __codec(self, name):
+        try:
+            return get_json_codec(name)
+        except IllegalArgumentError:
+            self.skipTest('{0} is not installed'.format(name))
+
+    def test_default_codec_encodes_edge_values(self):
+        for codec in (None, get_json_codec(), get_json_codec(DEFAULT_JSON_CODEC)):
+            self.assertEqual(OJAITagsEncoder.dumps({'a': float('nan')}, json_codec=codec),
+                             '{"a": {"$numberFloat": NaN}}')
+            self.assertEqual(OJAITagsEncoder.dumps({'a': float('inf')}, json_codec=codec),
+                             '{"a": {"$numberFloat": Infinity}}')
+            self.assertEqual(OJAITagsEncoder.dumps({'a': 2 ** 70}, json_codec=codec),
+                             '{"a": {"$numberLong": 1180591620717411303424}}')
+            self.assertEqual(OJAITagsEncoder.dumps({'a': [{2: 3}], 1: 'x'}, json_codec=codec),
+                             '{"a": [{"2": {"$numberLong": 3}}], "1": "x"}')
+
+    def test_orjson_edge_values(self):
+        codec = self.__codec('orjson')
+        # orjson writes NaN as null, a value holding NaN or Infinity is encoded by json
+        self.assertEqual(OJAITagsEncoder.dumps({'a': float('nan')}, json_codec=codec),
+                         '{"a": {"$numberFloat": NaN}}')
+        self.assertEqual(OJAITagsEncoder.dumps({'a': [None, float('-inf')]}, json_codec=codec),
+                         '{"a": [null, {"$numberFloat": -Infinity}]}')
+        # null values and strings are kept from orjson
+        self.assertEqual(OJAITagsEncoder.dumps({'a': None}, json_codec=codec), '{"a":null}')
+        self.assertEqual(OJAITagsEncoder.dumps({'null': 'null', 'b': 1.5}, json_codec=codec),
+                         '{"null":"null","b":{"$numberFloat":1.5}}')
+        self.assertEqual(OJAITagsEncoder.dumps({'a': [{2: 3}], 1: 'x'}, json_codec=codec),
+                         '{"a":[{"2":{"$numberLong":3}}],"1":"x"}')
+        with self.assertRaises(EncodingError):
+            OJAITagsEncoder.dumps({'a': 2 ** 70}, json_codec=codec)
+
+    def test_rapidjson_edge_values(self):
+        codec = self.__codec('rapidjson')
+        self.assertEqual(OJAITagsEncoder.dumps({'a': [{2: 3}], 1: 'x'}, json_codec=codec),
+                         '{"a":[{"2":{"$numberLong":3}}],"1":"x"}')
+        self.assertEqual(OJAITagsEncoder.dumps({'a': 2 ** 70}, json_codec=codec),
+                         '{"a":{"$numberLong":1180591620717411303424}}')
+
+    def test_ujson_edge_values(self):
+        codec = self.__codec('ujson')
+        self.assertEqual(OJAITagsEncoder.dumps({'a': [{2: 3}], 1: 'x'}, json_codec=codec),
+                         '{"a":[{"2":{"$numberLong":3}}],"1":"x"}')
+        self.assertEqual(OJAITagsEncoder.dumps({'a': float('nan')}, json_codec=codec),
+                         '{"a":{"$numberFloat":NaN}}')
+
+    def test_get_json_codec(self):
+        self.assertIsInstance(get_json_codec(), StdlibJsonCodec)
+        self.assertIs(get_json_codec(), get_json_codec(DEFAULT_JSON_CODEC))
+        self.assertIn(get_json_codec('auto').name, JSON_CODECS)
+        self.assertIs(get_json_codec('json'), get_json_codec('json'))
+        with self.assertRaises(IllegalArgumentError):
+            get_json_codec('unknown')
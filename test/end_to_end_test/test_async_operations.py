@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+from future import standard_library
+standard_library.install_aliases()
+from builtins import *
+import asyncio
+
+from mapr.ojai.exceptions.StoreNotFoundError import StoreNotFoundError
+from mapr.ojai.ojai_query.OJAIQueryCondition import OJAIQueryCondition
+from mapr.ojai.storage.AsyncOJAIConnection import AsyncOJAIConnection
+from mapr.ojai.storage.AsyncOJAIDocumentStore import AsyncOJAIDocumentStore
+from test.test_utils.constants import CONNECTION_STR, CONNECTION_OPTIONS, DICT_STREAM
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+
+class AsyncOperationsTest(unittest.TestCase):
+
+    def test_async_ddl_operations(self):
+        async def run():
+            connection = await AsyncOJAIConnection.connect(connection_str=CONNECTION_STR,
+                                                           options=CONNECTION_OPTIONS)
+            if await connection.is_store_exists(store_path='/async-test-store1'):
+                await connection.delete_store(store_path='/async-test-store1')
+            document_store = await connection.create_store(store_path='/async-test-store1')
+            self.assertTrue(isinstance(document_store, AsyncOJAIDocumentStore))
+            self.assertTrue(await connection.is_store_exists(store_path='/async-test-store1'))
+            self.assertTrue(await connection.delete_store(store_path='/async-test-store1'))
+            with self.assertRaises(StoreNotFoundError):
+                await connection.get_store(store_path='/async-test-store1')
+            await connection.close()
+
+        asyncio.run(run())
+
+    def test_async_document_operations(self):
+        async def run():
+            async with AsyncOJAIConnection(connection_str=CONNECTION_STR,
+                                           options=CONNECTION_OPTIONS) as connection:
+                document_store = await connection.get_or_create_store(store_path='/async-test-store2')
+                await document_store.insert_or_replace(doc_stream=DICT_STREAM)
+
+                doc = await document_store.find_by_id('id08')
+                self.assertEqual(doc, {'_id': 'id08', 'test_int': 51, 'test_str': 'strstr',
+                                       'test_dict': {'test_int': 5}})
+
+                query_result = await document_store.find(connection.new_query()
+                                                         .select(['_id', 'test_int'])
+                                                         .build())
+                docs = [d async for d in query_result]
+                self.assertEqual(len(docs), len(DICT_STREAM))
+
+                await document_store.update('id01', connection.new_mutation().set('test_int', 52))
+                self.assertEqual((await document_store.find_by_id('id01'))['test_int'], 52)
+
+                condition = OJAIQueryCondition().equals_('test_int', 52).close().build()
+                self.assertTrue(await document_store.check_and_replace(
+                    connection.new_document(dictionary={'_id': 'id01', 'test_int': 53}),
+                    condition=condition))
+
+                await document_store.delete(_id='id02')
+                self.assertEqual(await document_store.find_by_id('id02'), {})
+                await connection.delete_store(store_path='/async-test-store2')
+
+        asyncio.run(run())
+
+
+if __name__ == '__main__':
+    test_classes_to_run = [AsyncOperationsTest]
+    loader = unittest.TestLoader()
+    suites_list = []
+    for test_class in test_classes_to_run:
+        suite = loader.loadTestsFromTestCase(test_class)
+        suites_list.append(suite)
+
+    big_suite = unittest.TestSuite(suites_list)
+
+    runner = unittest.TextTestRunner()
+    results = runner.run(big_suite)
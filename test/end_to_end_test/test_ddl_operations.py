@@ -7,8 +7,11 @@ from __future__ import absolute_import
 from future import standard_library
 standard_library.install_aliases()
 from builtins import *
+from mapr.ojai.exceptions.IllegalArgumentError import IllegalArgumentError
 from mapr.ojai.exceptions.StoreAlreadyExistsError import StoreAlreadyExistsError
+from mapr.ojai.exceptions.StoreNotFoundError import StoreNotFoundError
 from mapr.ojai.storage.ConnectionFactory import ConnectionFactory
+from mapr.ojai.storage.OJAIConnectionCache import OJAIConnectionCache
 from mapr.ojai.storage.OJAIDocumentStore import OJAIDocumentStore
 from test.test_utils.constants import CONNECTION_STR, CONNECTION_OPTIONS
 
@@ -52,6 +55,200 @@ class ConnectionTest(unittest.TestCase):
         delete_response = connection.delete_store(store_path='/test-store2')
         self.assertTrue(delete_response)
 
+    def test_connection_with_channel_pool(self):
+        options = dict(CONNECTION_OPTIONS)
+        options['ojai.mapr.rpc.channel-pool-size'] = 4
+        connection = ConnectionFactory.get_connection(connection_str=CONNECTION_STR,
+                                                      options=options)
+        store = connection.get_or_create_store(store_path='/test-store3')
+        store.insert_or_replace(doc_stream=[{'_id': 'id{0}'.format(i), 'test_int': i}
+                                            for i in range(10)])
+        for i in range(10):
+            self.assertEqual(store.find_by_id('id{0}'.format(i))['test_int'], i)
+        self.assertEqual(len(list(store.find())), 10)
+        self.assertTrue(connection.delete_store(store_path='/test-store3'))
+        connection.close()
+
+    def test_connection_with_several_gateways(self):
+        gateway = CONNECTION_STR.split('@')[-1].split('?')[0]
+        options = dict(CONNECTION_OPTIONS)
+        options['ojai.mapr.rpc.load-balancing'] = 'round-robin'
+        connection = ConnectionFactory.get_connection(
+            connection_str=CONNECTION_STR.replace(gateway, '{0},{0}'.format(gateway), 1),
+            options=options)
+        store = connection.get_or_create_store(store_path='/test-store4')
+        store.insert_or_replace(doc_stream=[{'_id': 'id{0}'.format(i), 'test_int': i}
+                                            for i in range(10)])
+        for i in range(10):
+            self.assertEqual(store.find_by_id('id{0}'.format(i))['test_int'], i)
+        self.assertTrue(connection.delete_store(store_path='/test-store4'))
+        connection.close()
+
+        options['ojai.mapr.rpc.load-balancing'] = 'random'
+        with self.assertRaises(IllegalArgumentError):
+            ConnectionFactory.get_connection(connection_str=CONNECTION_STR.replace(
+                gateway, '{0},{0}'.format(gateway), 1), options=options)
+
+    def test_connection_with_channel_tuning(self):
+        options = dict(CONNECTION_OPTIONS)
+        options.update({'ojai.mapr.rpc.compression': 'gzip',
+                        'ojai.mapr.rpc.max-receive-message-length': 16 * 1024 * 1024,
+                        'ojai.mapr.rpc.keepalive-time-ms': 30000,
+                        'ojai.mapr.rpc.keepalive-permit-without-calls': True})
+        connection = ConnectionFactory.get_connection(connection_str=CONNECTION_STR,
+                                                      options=options)
+        store = connection.get_or_create_store(store_path='/test-store5')
+        store.insert_or_replace(doc_stream=[{'_id': 'id1', 'test_str': 'a' * 100000}])
+        self.assertEqual(store.find_by_id('id1')['test_str'], 'a' * 100000)
+        self.assertTrue(connection.delete_store(store_path='/test-store5'))
+
+        for option, value in (('ojai.mapr.rpc.compression', 'lz4'),
+                              ('ojai.mapr.rpc.keepalive-time-ms', '30000')):
+            options = dict(CONNECTION_OPTIONS)
+            options[option] = value
+            with self.assertRaises(IllegalArgumentError):
+                ConnectionFactory.get_connection(connection_str=CONNECTION_STR, options=options)
+
+    def test_cached_connection(self):
+        first = ConnectionFactory.get_connection(connection_str=CONNECTION_STR,
+                                                 options=CONNECTION_OPTIONS, cached=True)
+        second = ConnectionFactory.get_connection(connection_str=CONNECTION_STR,
+                                                  options=CONNECTION_OPTIONS, cached=True)
+        store = first.get_or_create_store(store_path='/test-store6')
+        self.assertTrue(isinstance(store, OJAIDocumentStore))
+        first.close()
+        self.assertTrue(second.is_store_exists(store_path='/test-store6'))
+        self.assertTrue(second.delete_store(store_path='/test-store6'))
+        second.close()
+        ConnectionFactory.clear_cache()
+
+    def test_connection_cache_idle_eviction(self):
+        cache = OJAIConnectionCache(connection_factory=ConnectionFactory.get_connection,
+                                    idle_timeout=0)
+        connection = cache.get(CONNECTION_STR, CONNECTION_OPTIONS)
+        self.assertEqual(len(cache), 1)
+        self.assertFalse(connection.is_store_exists(store_path='/test-store7'))
+        connection.close()
+        self.assertEqual(len(cache), 0)
+
+    def test_lazy_connection(self):
+        options = dict(CONNECTION_OPTIONS)
+        options['ojai.mapr.rpc.lazy-connect'] = True
+        connection = ConnectionFactory.get_connection(connection_str=CONNECTION_STR,
+                                                      options=options)
+        self.assertFalse(connection.is_store_exists(store_path='/test-store8'))
+        connection.wait_until_ready(timeout=30)
+        connection.wait_until_ready(timeout=0)
+        connection.close()
+
+    def test_store_cache(self):
+        options = dict(CONNECTION_OPTIONS)
+        options['ojai.mapr.store-cache-ttl'] = 60
+        connection = ConnectionFactory.get_connection(connection_str=CONNECTION_STR,
+                                                      options=options)
+        store = connection.get_or_create_store(store_path='/test-store9')
+        self.assertIs(connection.get_store(store_path='/test-store9'), store)
+        self.assertTrue(connection.delete_store(store_path='/test-store9'))
+        with self.assertRaises(StoreNotFoundError):
+            connection.get_store(store_path='/test-store9')
+
+        unchecked_store = connection.get_store(store_path='/test-store9', check_exists=False)
+        self.assertTrue(isinstance(unchecked_store, OJAIDocumentStore))
+        with self.assertRaises(StoreNotFoundError):
+            unchecked_store.find_by_id('id1')
+
+    def test_bearer_token_reuse(self):
+        connection = ConnectionFactory.get_connection(connection_str=CONNECTION_STR,
+                                                      options=CONNECTION_OPTIONS)
+        for _ in range(10):
+            connection.is_store_exists(store_path='/test-store1')
+        authentications = connection.authentications
+        self.assertEqual(authentications['basic'] + authentications['bearer'], 11)
+        self.assertLess(authentications['basic'], authentications['bearer'])
+        connection.close()
+
+    def test_retry_policy_options(self):
+        options = dict(CONNECTION_OPTIONS)
+        options.update({'ojai.mapr.rpc.retry-deadline-milliseconds': 5000,
+                        'ojai.mapr.rpc.retry-budget-ratio': 0.2,
+                        'ojai.mapr.rpc.retry-status-codes': {'DEADLINE_EXCEEDED': 2}})
+        connection = ConnectionFactory.get_connection(connection_str=CONNECTION_STR,
+                                                      options=options)
+        self.assertFalse(connection.is_store_exists(store_path='/test-store10'))
+        connection.close()
+
+        for name, value in (('ojai.mapr.rpc.retry-deadline-milliseconds', 0),
+                            ('ojai.mapr.rpc.retry-budget-ratio', -1),
+                            ('ojai.mapr.rpc.retry-status-codes', {'UNKNOWN_CODE': 1})):
+            options = dict(CONNECTION_OPTIONS)
+            options[name] = value
+            with self.assertRaises(IllegalArgumentError):
+                ConnectionFactory.get_connection(connection_str=CONNECTION_STR, options=options)
+
+    def test_circuit_breaker(self):
+        state_changes = []
+        options = dict(CONNECTION_OPTIONS)
+        options.update({'ojai.mapr.circuit-breaker.failure-threshold': 3,
+                        'ojai.mapr.circuit-breaker.open-interval': 5,
+                        'ojai.mapr.circuit-breaker.failure-status-codes':
+                            ['UNAVAILABLE', 'DEADLINE_EXCEEDED'],
+                        'ojai.mapr.circuit-breaker.listener':
+                            lambda old_state, new_state: state_changes.append(new_state)})
+        connection = ConnectionFactory.get_connection(connection_str=CONNECTION_STR,
+                                                      options=options)
+        self.assertFalse(connection.is_store_exists(store_path='/test-store11'))
+        self.assertEqual(connection.circuit_breaker.state, 'closed')
+        self.assertEqual(state_changes, [])
+        connection.close()
+
+        connection = ConnectionFactory.get_connection(connection_str=CONNECTION_STR,
+                                                      options=CONNECTION_OPTIONS)
+        self.assertIsNone(connection.circuit_breaker)
+        connection.close()
+
+        for name, value in (('ojai.mapr.circuit-breaker.failure-threshold', -1),
+                            ('ojai.mapr.circuit-breaker.open-interval', 0),
+                            ('ojai.mapr.circuit-breaker.listener', 'not callable'),
+                            ('ojai.mapr.circuit-breaker.failure-status-codes', ['NOT_A_CODE']),
+                            ('ojai.mapr.circuit-breaker.failure-status-codes', 'UNAVAILABLE')):
+            options = dict(CONNECTION_OPTIONS)
+            options[name] = value
+            with self.assertRaises(IllegalArgumentError):
+                ConnectionFactory.get_connection(connection_str=CONNECTION_STR, options=options)
+
+    def test_rpc_deadlines(self):
+        options = dict(CONNECTION_OPTIONS)
+        options.update({'ojai.mapr.rpc.read-timeout-milliseconds': 5000,
+                        'ojai.mapr.rpc.write-timeout-milliseconds': 5000,
+                        'ojai.mapr.rpc.ddl-timeout-milliseconds': 30000,
+                        'ojai.mapr.rpc.scan-timeout-milliseconds': 60000})
+        connection = ConnectionFactory.get_connection(connection_str=CONNECTION_STR,
+                                                      options=options)
+        self.assertEqual(connection.deadlines.ddl, 30.0)
+        if connection.is_store_exists(store_path='/test-store12'):
+            connection.delete_store(store_path='/test-store12')
+        store = connection.create_store(store_path='/test-store12', timeout=60)
+        self.assertEqual(store.deadlines.write, 5.0)
+        store.insert_or_replace({'_id': 'id1', 'value': 1}, timeout=10)
+        store.update('id1', connection.new_mutation().set('value', 2))
+        self.assertEqual(store.find_by_id('id1'), {'_id': 'id1', 'value': 2})
+        self.assertEqual(list(store.find()), [{'_id': 'id1', 'value': 2}])
+        store.delete(_id='id1')
+        self.assertTrue(connection.delete_store(store_path='/test-store12'))
+        connection.close()
+
+        for operation_class in ('read', 'write', 'ddl', 'scan'):
+            options = dict(CONNECTION_OPTIONS)
+            options['ojai.mapr.rpc.{0}-timeout-milliseconds'.format(operation_class)] = 0
+            with self.assertRaises(IllegalArgumentError):
+                ConnectionFactory.get_connection(connection_str=CONNECTION_STR, options=options)
+
+    def test_channel_pool_size_error(self):
+        options = dict(CONNECTION_OPTIONS)
+        options['ojai.mapr.rpc.channel-pool-size'] = 0
+        with self.assertRaises(IllegalArgumentError):
+            ConnectionFactory.get_connection(connection_str=CONNECTION_STR, options=options)
+
 
 if __name__ == '__main__':
     test_classes_to_run = [ConnectionTest]
@@ -7,8 +7,11 @@ from __future__ import absolute_import
 from future import standard_library
 standard_library.install_aliases()
 from builtins import *
+import threading
+
 from ojai.types.ODate import ODate
 from ojai.types.OTime import OTime
+from mapr.ojai.exceptions.IllegalArgumentError import IllegalArgumentError
 from mapr.ojai.ojai.OJAIDocument import OJAIDocument
 from mapr.ojai.ojai_query.OJAIQueryCondition import OJAIQueryCondition
 from mapr.ojai.storage.ConnectionFactory import ConnectionFactory
@@ -149,6 +152,114 @@ class FindByIdTest(unittest.TestCase):
                          {'_id': 'id008', 'test_dict': {'test_int': 5},
                           'test_null': None, 'test_str': 'strstr'})
 
+    def test_find_by_ids(self):
+        connection = ConnectionFactory.get_connection(connection_str=CONNECTION_STR,
+                                                      options=CONNECTION_OPTIONS)
+
+        if connection.is_store_exists(store_path='/find-by-id-test-store1'):
+            document_store = connection.get_store(store_path='/find-by-id-test-store1')
+        else:
+            document_store = connection.create_store(store_path='/find-by-id-test-store1')
+        document_store.insert_or_replace(doc_stream=[{'_id': 'id101', 'test_int': 1},
+                                                     {'_id': 'id102', 'test_int': 2},
+                                                     {'_id': 'id103', 'test_int': 3}])
+
+        docs = document_store.find_by_ids(['id103', 'id9999', 'id101', 'id102'], concurrency=2)
+        self.assertEqual(docs, [{'_id': 'id103', 'test_int': 3},
+                                None,
+                                {'_id': 'id101', 'test_int': 1},
+                                {'_id': 'id102', 'test_int': 2}])
+
+        docs = dict(document_store.find_by_ids(['id101', 'id9999', 'id102'],
+                                               results_as_document=True,
+                                               as_completed=True))
+        self.assertIsNone(docs['id9999'])
+        self.assertEqual(docs['id102'].get_int('test_int'), 2)
+        self.assertEqual(document_store.find_by_ids([]), [])
+
+    def test_find_by_id_with_document_cache(self):
+        options = dict(CONNECTION_OPTIONS)
+        options['ojai.mapr.document-cache.max-entries'] = 2
+        connection = ConnectionFactory.get_connection(connection_str=CONNECTION_STR,
+                                                      options=options)
+        document_store = connection.get_or_create_store(store_path='/find-by-id-test-store2')
+        document_store.insert_or_replace(doc_stream=[{'_id': 'id201', 'test_int': 1},
+                                                     {'_id': 'id202', 'test_int': 2},
+                                                     {'_id': 'id203', 'test_int': 3}])
+        cache = document_store.document_cache
+        self.assertEqual(document_store.find_by_id('id201'), {'_id': 'id201', 'test_int': 1})
+        self.assertEqual(document_store.find_by_id('id201'), {'_id': 'id201', 'test_int': 1})
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        document_store.update('id201', connection.new_mutation().set('test_int', 11))
+        self.assertEqual(document_store.find_by_id('id201')['test_int'], 11)
+        document_store.insert_or_replace({'_id': 'id201', 'test_int': 12})
+        self.assertEqual(document_store.find_by_id('id201',
+                                                 results_as_document=True).get_int('test_int'), 12)
+        document_store.delete(_id='id201')
+        self.assertEqual(document_store.find_by_id('id201'), {})
+
+        document_store.find_by_id('id202')
+        document_store.find_by_id('id203')
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.evictions, 1)
+        document_store.insert_or_replace(doc_stream=[{'_id': 'id202', 'test_int': 22}])
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(document_store.find_by_id('id202')['test_int'], 22)
+        connection.delete_store(store_path='/find-by-id-test-store2')
+
+    def test_find_by_id_with_single_flight(self):
+        options = dict(CONNECTION_OPTIONS)
+        options['ojai.mapr.single-flight'] = True
+        options['ojai.mapr.single-flight.find'] = True
+        connection = ConnectionFactory.get_connection(connection_str=CONNECTION_STR,
+                                                      options=options)
+        document_store = connection.get_or_create_store(store_path='/find-by-id-test-store3')
+        document_store.insert_or_replace(doc_stream=[{'_id': 'id301', 'test_int': 1},
+                                                     {'_id': 'id302', 'test_int': 2}])
+        results = []
+
+        def read():
+            results.append(document_store.find_by_id('id301'))
+            results.append(len(list(document_store.find())))
+
+        threads = [threading.Thread(target=read) for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results.count({'_id': 'id301', 'test_int': 1}), 16)
+        self.assertEqual(results.count(2), 16)
+        results[0]['test_int'] = 5
+        self.assertEqual(document_store.find_by_id('id301'), {'_id': 'id301', 'test_int': 1})
+        connection.delete_store(store_path='/find-by-id-test-store3')
+
+    def test_find_by_id_with_hedged_reads(self):
+        options = dict(CONNECTION_OPTIONS)
+        options.update({'ojai.mapr.hedged-reads': True,
+                        'ojai.mapr.hedged-reads.delay-milliseconds': 0,
+                        'ojai.mapr.rpc.channel-pool-size': 2})
+        connection = ConnectionFactory.get_connection(connection_str=CONNECTION_STR,
+                                                      options=options)
+        document_store = connection.get_or_create_store(store_path='/find-by-id-test-store4')
+        document_store.insert_or_replace(doc_stream=[{'_id': 'id401', 'test_int': 1},
+                                                     {'_id': 'id402', 'test_int': 2}])
+        for _ in range(10):
+            self.assertEqual(document_store.find_by_id('id401'), {'_id': 'id401', 'test_int': 1})
+        self.assertEqual(document_store.find_by_ids(['id402', 'id403']),
+                         [{'_id': 'id402', 'test_int': 2}, None])
+        self.assertEqual(document_store.hedging.delay, 0)
+        self.assertLessEqual(document_store.hedging.hedges_won, document_store.hedging.hedged)
+        connection.delete_store(store_path='/find-by-id-test-store4')
+        connection.close()
+
+        for name, value in (('ojai.mapr.hedged-reads.delay-milliseconds', -1),
+                            ('ojai.mapr.hedged-reads.percentile', 100)):
+            options = dict(CONNECTION_OPTIONS)
+            options.update({'ojai.mapr.hedged-reads': True, name: value})
+            with self.assertRaises(IllegalArgumentError):
+                ConnectionFactory.get_connection(connection_str=CONNECTION_STR, options=options)
+
 
 if __name__ == '__main__':
 
@@ -179,6 +179,162 @@ class FindTest(unittest.TestCase):
             stream_size += 1
         self.assertEqual(stream_size, 9)
 
+    def test_find_with_prefetch(self):
+        connection = ConnectionFactory.get_connection(connection_str=CONNECTION_STR,
+                                                      options=CONNECTION_OPTIONS)
+
+        if connection.is_store_exists(store_path='/find-test-store6'):
+            connection.delete_store(store_path='/find-test-store6')
+        document_store = connection.create_store(store_path='/find-test-store6')
+        document_list = [{'_id': 'id%04d' % i, 'test_int': i} for i in range(100)]
+        document_store.insert_or_replace(doc_stream=document_list)
+
+        options = {'ojai.mapr.query.prefetch': True,
+                   'ojai.mapr.query.prefetch-depth': 8}
+        self.assertEqual(list(document_store.find(options=options)), document_list)
+
+        # consumer stops early, the rest of the stream is cancelled
+        query_result = document_store.find(options=options)
+        for doc in query_result:
+            self.assertEqual(doc, document_list[0])
+            break
+        query_result.close()
+
+        with self.assertRaises(IllegalArgumentError):
+            document_store.find(options={'ojai.mapr.query.prefetch': True,
+                                         'ojai.mapr.query.prefetch-depth': 0})
+        connection.delete_store(store_path='/find-test-store6')
+
+    def test_find_with_fetch_size(self):
+        connection = ConnectionFactory.get_connection(connection_str=CONNECTION_STR,
+                                                      options=CONNECTION_OPTIONS)
+
+        if connection.is_store_exists(store_path='/find-test-store7'):
+            connection.delete_store(store_path='/find-test-store7')
+        document_store = connection.create_store(store_path='/find-test-store7')
+        document_list = [{'_id': 'id%04d' % i, 'test_int': i} for i in range(50)]
+        document_store.insert_or_replace(doc_stream=document_list)
+
+        self.assertEqual(list(document_store.find(options={'ojai.mapr.query.fetch-size': 7})),
+                         document_list)
+        self.assertEqual(list(document_store.find(options={'ojai.mapr.query.fetch-size': 100,
+                                                           'ojai.mapr.query.max-buffer-bytes': 1})),
+                         document_list)
+
+        with self.assertRaises(IllegalArgumentError):
+            document_store.find(options={'ojai.mapr.query.fetch-size': 0})
+        with self.assertRaises(IllegalArgumentError):
+            document_store.find(options={'ojai.mapr.query.max-buffer-bytes': -1})
+        connection.delete_store(store_path='/find-test-store7')
+
+    def test_parallel_find(self):
+        connection = ConnectionFactory.get_connection(connection_str=CONNECTION_STR,
+                                                      options=CONNECTION_OPTIONS)
+
+        if connection.is_store_exists(store_path='/find-test-store8'):
+            connection.delete_store(store_path='/find-test-store8')
+
+    def test_resumable_find(self):
+        connection = ConnectionFactory.get_connection(connection_str=CONNECTION_STR,
+                                                      options=CONNECTION_OPTIONS)
+
+        if connection.is_store_exists(store_path='/find-test-store9'):
+            connection.delete_store(store_path='/find-test-store9')
+        document_store = connection.create_store(store_path='/find-test-store9')
+        document_list = [{'_id': 'id%04d' % i, 'test_int': i} for i in range(100)]
+        document_store.insert_or_replace(doc_stream=document_list)
+
+        options = {'ojai.mapr.query.resumable': True}
+        self.assertEqual(list(document_store.find(options=options)), document_list)
+
+        # a crashed job continues from the cursor of the last delivered document
+        query_result = document_store.find({'$limit': 50}, options=options)
+        delivered = []
+        for doc in query_result:
+            delivered.append(doc)
+            if len(delivered) == 20:
+                break
+        cursor = query_result.cursor
+        query_result.close()
+        resumed = document_store.find({'$limit': 50},
+                                      options={'ojai.mapr.query.cursor': cursor})
+        self.assertEqual(delivered + list(resumed), document_list[:50])
+        resumed = document_store.find(options={'ojai.mapr.query.cursor': cursor})
+        self.assertEqual(len(list(resumed)), 30)
+
+        with self.assertRaises(IllegalArgumentError):
+            document_store.find({'$limit': 10}, options={'ojai.mapr.query.cursor': cursor})
+        with self.assertRaises(IllegalArgumentError):
+            document_store.find({'$orderby': {'test_int': 'desc'}}, options=options)
+        connection.delete_store(store_path='/find-test-store9')
+        document_store = connection.create_store(store_path='/find-test-store8')
+        document_list = [{'_id': 'id%04d' % i, 'test_int': i} for i in range(200)]
+        document_store.insert_or_replace(doc_stream=document_list)
+
+        # ranges from split points
+        result = list(document_store.parallel_find(split_points=['id0050', 'id0100', 'id0150']))
+        self.assertEqual(sorted(result, key=lambda doc: doc['_id']), document_list)
+        self.assertEqual(list(document_store.parallel_find(split_points=['id0050', 'id0100'],
+                                                           ordered=True)),
+                         document_list)
+
+        # ranges sampled between the smallest and the largest _id
+        self.assertEqual(list(document_store.parallel_find(partitions=4, ordered=True)),
+                         document_list)
+        self.assertEqual(list(document_store.parallel_find(partitions=1, ordered=True)),
+                         document_list)
+        self.assertEqual(len(list(document_store.parallel_find({'$limit': 10}, partitions=4))),
+                         10)
+
+        # consumer stops early, the remaining partitions are cancelled
+        query_result = document_store.parallel_find(partitions=4, ordered=True)
+        for doc in query_result:
+            self.assertEqual(doc, document_list[0])
+            break
+        query_result.close()
+
+        with self.assertRaises(IllegalArgumentError):
+            document_store.parallel_find(partitions=0)
+        with self.assertRaises(IllegalArgumentError):
+            document_store.parallel_find(split_points=['id0100', 'id0050'])
+        with self.assertRaises(IllegalArgumentError):
+            document_store.parallel_find({'$orderby': {'test_int': 'desc'}})
+        connection.delete_store(store_path='/find-test-store8')
+
+    def test_resumable_find(self):
+        connection = ConnectionFactory.get_connection(connection_str=CONNECTION_STR,
+                                                      options=CONNECTION_OPTIONS)
+
+        if connection.is_store_exists(store_path='/find-test-store9'):
+            connection.delete_store(store_path='/find-test-store9')
+        document_store = connection.create_store(store_path='/find-test-store9')
+        document_list = [{'_id': 'id%04d' % i, 'test_int': i} for i in range(100)]
+        document_store.insert_or_replace(doc_stream=document_list)
+
+        options = {'ojai.mapr.query.resumable': True}
+        self.assertEqual(list(document_store.find(options=options)), document_list)
+
+        # a crashed job continues from the cursor of the last delivered document
+        query_result = document_store.find({'$limit': 50}, options=options)
+        delivered = []
+        for doc in query_result:
+            delivered.append(doc)
+            if len(delivered) == 20:
+                break
+        cursor = query_result.cursor
+        query_result.close()
+        resumed = document_store.find({'$limit': 50},
+                                      options={'ojai.mapr.query.cursor': cursor})
+        self.assertEqual(delivered + list(resumed), document_list[:50])
+        resumed = document_store.find(options={'ojai.mapr.query.cursor': cursor})
+        self.assertEqual(len(list(resumed)), 30)
+
+        with self.assertRaises(IllegalArgumentError):
+            document_store.find({'$limit': 10}, options={'ojai.mapr.query.cursor': cursor})
+        with self.assertRaises(IllegalArgumentError):
+            document_store.find({'$orderby': {'test_int': 'desc'}}, options=options)
+        connection.delete_store(store_path='/find-test-store9')
+
 
 if __name__ == '__main__':
 
@@ -10,7 +10,9 @@ from builtins import *
 from ojai.types.OTime import OTime
 from ojai.types.OTimestamp import OTimestamp
 
+from mapr.ojai.exceptions.DocumentAlreadyExistsError import DocumentAlreadyExistsError
 from mapr.ojai.exceptions.DocumentNotFoundError import DocumentNotFoundError
+from mapr.ojai.exceptions.InvalidOJAIDocumentError import InvalidOJAIDocumentError
 from mapr.ojai.ojai.OJAIDocument import OJAIDocument
 from mapr.ojai.storage.OJAIDocumentStore import OJAIDocumentStore
 from mapr.ojai.storage.ConnectionFactory import ConnectionFactory
@@ -132,6 +134,35 @@ class InsertOrReplaceTest(unittest.TestCase):
             document_store.replace(doc=doc)
         connection.delete_store(store_path='/test-store9')
 
+    def test_insert_doc_stream_pipelined(self):
+        connection = ConnectionFactory.get_connection(connection_str=CONNECTION_STR,
+                                                      options=CONNECTION_OPTIONS)
+        if connection.is_store_exists(store_path='/test-store10'):
+            connection.delete_store(store_path='/test-store10')
+        document_store = connection.create_store(store_path='/test-store10')
+
+        result = document_store.insert(doc_stream=DICT_STREAM,
+                                       options={'ojai.mapr.bulk.window-size': 4})
+        self.assertFalse(result.has_failures())
+        self.assertEqual(result.get_success_count(), len(DICT_STREAM))
+
+        # second insert of the same ids fails for every document, but doesn't abort the stream
+        result = document_store.insert(doc_stream=DICT_STREAM + [{'test_int': 1}],
+                                       options={'ojai.mapr.bulk.window-size': 4})
+        self.assertEqual(result.get_success_count(), 0)
+        self.assertEqual(result.get_failure_count(), len(DICT_STREAM) + 1)
+        for _id, error in result.get_failures():
+            if _id is None:
+                self.assertIsInstance(error, InvalidOJAIDocumentError)
+            else:
+                self.assertIsInstance(error, DocumentAlreadyExistsError)
+
+        result = document_store.replace(doc_stream=DICT_STREAM_REPLACE,
+                                        options={'ojai.mapr.bulk.window-size': 4})
+        self.assertFalse(result.has_failures())
+        self.assertEqual(document_store.find_by_id('id01')['test_int'], 52)
+        connection.delete_store(store_path='/test-store10')
+
 
 if __name__ == '__main__':
     test_classes_to_run = [InsertOrReplaceTest]
@@ -0,0 +1,53 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+from future import standard_library
+
+standard_library.install_aliases()
+from builtins import *
+from collections import deque
+
+from mapr.ojai.ojai.OJAIDocumentStream import OJAIDocumentStream
+from mapr.ojai.proto.gen.maprdb_server_pb2 import FindResponse, FindResponseType
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+
+class DocumentStreamTest(unittest.TestCase):
+
+    @staticmethod
+    def __responses(json_documents):
+        return iter([FindResponse(type=FindResponseType.Value('RESULT_DOCUMENT'),
+                                  json_response=json_document)
+                     for json_document in json_documents])
+
+    def test_read_batch_fetch_size(self):
+        cache = deque()
+        stream = DocumentStreamTest.__responses(['{"_id": "%d"}' % i for i in range(5)])
+        OJAIDocumentStream.read_batch(stream, cache, fetch_size=3)
+        self.assertEqual(len(cache), 3)
+        OJAIDocumentStream.read_batch(stream, cache, fetch_size=3)
+        self.assertEqual(len(cache), 5)
+
+    def test_read_batch_max_buffer_bytes_counts_utf8(self):
+        # 12 characters, 16 bytes in UTF-8, the limit is reached by the second document
+        document = '{"a":"' + '\u0436' * 4 + '"}'
+        self.assertEqual(len(document), 12)
+        cache = deque()
+        OJAIDocumentStream.read_batch(DocumentStreamTest.__responses([document] * 4), cache,
+                                      fetch_size=4, max_buffer_bytes=30)
+        self.assertEqual(len(cache), 2)
+
+        cache = deque()
+        OJAIDocumentStream.read_batch(DocumentStreamTest.__responses([document] * 4), cache,
+                                      fetch_size=4, max_buffer_bytes=1)
+        self.assertEqual(len(cache), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+from future import standard_library
+
+standard_library.install_aliases()
+from builtins import *
+import bisect
+import random
+
+from mapr.ojai.ojai.OJAIParallelQueryResult import OJAIParallelQueryResult
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+
+class ParallelQueryResultTest(unittest.TestCase):
+
+    def assert_even_split(self, ids, partitions):
+        ids = sorted(ids)
+        split_points = OJAIParallelQueryResult.interpolate_split_points(ids[0], ids[-1],
+                                                                        partitions)
+        self.assertEqual(split_points, sorted(set(split_points)))
+        self.assertEqual(len(split_points), partitions - 1)
+        bounds = [0] + [bisect.bisect_left(ids, point) for point in split_points] + [len(ids)]
+        sizes = [upper - lower for lower, upper in zip(bounds[:-1], bounds[1:])]
+        even = len(ids) / partitions
+        for size in sizes:
+            self.assertTrue(0.75 * even <= size <= 1.25 * even, (split_points, sizes))
+
+    def test_split_numbered_ids(self):
+        self.assert_even_split(['id{0:04d}'.format(i) for i in range(200)], 4)
+        self.assert_even_split(['user{0}'.format(i) for i in range(1000, 9000)], 8)
+
+    def test_split_hex_ids(self):
+        rng = random.Random(7)
+        self.assert_even_split(['{0:08x}'.format(rng.getrandbits(32)) for _ in range(1000)], 4)
+        self.assert_even_split(['{0:032x}'.format(rng.getrandbits(128)) for _ in range(2000)], 8)
+
+    def test_split_alphanumeric_ids(self):
+        rng = random.Random(7)
+        chars = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+        self.assert_even_split([''.join(rng.choice(chars) for _ in range(20))
+                                for _ in range(2000)], 4)
+
+    def test_split_degenerate_ranges(self):
+        self.assertEqual(OJAIParallelQueryResult.interpolate_split_points('a', 'a', 4), [])
+        self.assertEqual(OJAIParallelQueryResult.interpolate_split_points('id1', 'id2', 4), [])
+        self.assertEqual(OJAIParallelQueryResult.interpolate_split_points('id', 'id9', 3),
+                         ['id3', 'id6'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+from future import standard_library
+
+standard_library.install_aliases()
+from builtins import *
+from mapr.ojai.exceptions.ConnectionLostError import ConnectionLostError
+from mapr.ojai.exceptions.IllegalArgumentError import IllegalArgumentError
+from mapr.ojai.ojai import OJAIResumableQueryResult as resumable_module
+from mapr.ojai.ojai.OJAIResumableQueryResult import OJAIResumableQueryResult
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+
+class _FailingFind(object):
+    """Find over a sorted list of documents, the first failures streams are cut
+    after fail_after documents."""
+
+    def __init__(self, documents, failures, fail_after):
+        self.documents = documents
+        self.failures = failures
+        self.fail_after = fail_after
+        self.queries = []
+
+    def __call__(self, query):
+        self.queries.append(query)
+        where = query.get('$where', {})
+        after = where.get('$and', [where])[-1].get('$gt', {}).get('_id')
+        documents = [doc for doc in self.documents if after is None or doc['_id'] > after]
+        documents = documents[:query.get('$limit', len(documents))]
+        fail = self.failures > 0
+        self.failures -= 1
+        return _Result(documents, self.fail_after if fail else None)
+
+
+class _Result(object):
+
+    def __init__(self, documents, fail_after):
+        self.documents = documents
+        self.fail_after = fail_after
+
+    def __iter__(self):
+        for i, doc in enumerate(self.documents):
+            if i == self.fail_after:
+                raise ConnectionLostError(m='Connection lost during operation.')
+            yield dict(doc)
+
+    def get_query_plan(self):
+        return None
+
+    def close(self):
+        pass
+
+
+class ResumableQueryResultTest(unittest.TestCase):
+
+    def setUp(self):
+        self.backoff = resumable_module.RESUME_BACKOFF
+        resumable_module.RESUME_BACKOFF = 0
+        self.documents = [{'_id': 'id%03d' % i, 'value': i} for i in range(20)]
+
+    def tearDown(self):
+        resumable_module.RESUME_BACKOFF = self.backoff
+
+    def test_resume_after_connection_lost(self):
+        find = _FailingFind(self.documents, failures=2, fail_after=7)
+        query = OJAIResumableQueryResult.ordered_by_id({})
+        result = OJAIResumableQueryResult(query=query, find=find)
+        self.assertEqual(list(result), self.documents)
+        self.assertEqual(len(find.queries), 3)
+        self.assertEqual(find.queries[1]['$where'], {'$gt': {'_id': 'id006'}})
+        self.assertEqual(find.queries[2]['$where'], {'$gt': {'_id': 'id013'}})
+
+    def test_resume_keeps_condition_and_limit(self):
+        find = _FailingFind(self.documents, failures=1, fail_after=5)
+        query = OJAIResumableQueryResult.ordered_by_id(
+            {'$where': {'$ge': {'value': 0}}, '$limit': 12, '$offset': 0})
+        result = OJAIResumableQueryResult(query=query, find=find)
+        self.assertEqual(list(result), self.documents[:12])
+        self.assertEqual(find.queries[1]['$where'],
+                         {'$and': [{'$ge': {'value': 0}}, {'$gt': {'_id': 'id004'}}]})
+        self.assertEqual(find.queries[1]['$limit'], 7)
+        self.assertNotIn('$offset', find.queries[1])
+
+    def test_resume_attempts_exhausted(self):
+        find = _FailingFind(self.documents, failures=10, fail_after=0)
+        result = OJAIResumableQueryResult(query=OJAIResumableQueryResult.ordered_by_id({}),
+                                          find=find, max_resumes=2)
+        with self.assertRaises(ConnectionLostError):
+            list(result)
+        self.assertEqual(len(find.queries), 3)
+
+    def test_cursor(self):
+        find = _FailingFind(self.documents, failures=0, fail_after=None)
+        query = OJAIResumableQueryResult.ordered_by_id({'$select': ['value']})
+        self.assertEqual(query['$select'], ['value', '_id'])
+        result = OJAIResumableQueryResult(query=query, find=find)
+        iterator = iter(result)
+        first = [next(iterator) for _ in range(5)]
+        cursor_query, after, delivered = OJAIResumableQueryResult.parse_cursor(result.cursor)
+        self.assertEqual((cursor_query, after, delivered), (query, 'id004', 5))
+
+        resumed = OJAIResumableQueryResult(query=cursor_query, find=find,
+                                           after=after, delivered=delivered)
+        self.assertEqual(first + list(resumed), self.documents)
+
+        with self.assertRaises(IllegalArgumentError):
+            OJAIResumableQueryResult.parse_cursor('not a cursor')
+        with self.assertRaises(IllegalArgumentError):
+            OJAIResumableQueryResult.ordered_by_id({'$orderby': {'value': 'asc'}})
+
+
+if __name__ == '__main__':
+    unittest.main()
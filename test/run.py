@@ -9,7 +9,20 @@ from test.document.test_document import DocumentTest
 from test.document.test_document_creator import DocumentCreatorTest
 from test.document.test_document_with_tags import DocumentTagsTest
 from test.document.test_documentmutation import DocumentMutationTest
+from test.document.test_json_codec import JsonCodecTest
+from test.query_test.test_document_stream import DocumentStreamTest
+from test.query_test.test_parallel_query_result import ParallelQueryResultTest
 from test.query_test.test_query import QueryTest
+from test.query_test.test_resumable_query_result import ResumableQueryResultTest
+from test.storage_test.test_channel_pool import ChannelPoolTest
+from test.storage_test.test_circuit_breaker import CircuitBreakerTest
+from test.storage_test.test_connection import ConnectionTest
+from test.storage_test.test_connection_cache import ConnectionCacheTest
+from test.storage_test.test_document_cache import DocumentCacheTest
+from test.storage_test.test_document_store import DocumentStoreTest
+from test.storage_test.test_hedging_policy import HedgingPolicyTest
+from test.storage_test.test_single_flight import SingleFlightTest
+from test.utils_test.test_retry_policy import RetryPolicyTest
 
 try:
     import unittest2 as unittest
@@ -21,8 +34,21 @@ if __name__ == '__main__':
     test_classes_to_run = [DocumentTest,
                            DocumentTagsTest,
                            QueryTest,
+                           ResumableQueryResultTest,
+                           DocumentStreamTest,
+                           ParallelQueryResultTest,
                            DocumentCreatorTest,
-                           DocumentMutationTest
+                           DocumentMutationTest,
+                           JsonCodecTest,
+                           ChannelPoolTest,
+                           CircuitBreakerTest,
+                           ConnectionTest,
+                           ConnectionCacheTest,
+                           DocumentCacheTest,
+                           DocumentStoreTest,
+                           HedgingPolicyTest,
+                           SingleFlightTest,
+                           RetryPolicyTest
                            ]
 
     loader = unittest.TestLoader()
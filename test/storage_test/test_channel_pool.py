@@ -0,0 +1,84 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+from future import standard_library
+
+standard_library.install_aliases()
+from builtins import *
+import socket
+import time
+
+import grpc
+
+from mapr.ojai.proto.gen.maprdb_server_pb2 import TableExistsRequest
+from mapr.ojai.storage.OJAIChannelPool import OJAIChannelPool
+from mapr.ojai.utils.retry_utils import RetryPolicy, RetryBudget, policy_retry
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+
+def closed_port():
+    sock = socket.socket()
+    sock.bind(('localhost', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+class ChannelPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.targets = ['localhost:{0}'.format(closed_port()) for _ in range(2)]
+        self.pool = OJAIChannelPool(channel_factory=grpc.insecure_channel,
+                                    targets=self.targets)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_failed_call_is_not_repeated_by_the_pool(self):
+        with self.assertRaises(grpc.RpcError) as context:
+            self.pool.TableExists(TableExistsRequest(table_path='/t'), timeout=5)
+        self.assertEqual(context.exception.code(), grpc.StatusCode.UNAVAILABLE)
+        # only the gateway that was called is ejected
+        self.assertEqual(sorted(self.pool.is_healthy(target) for target in self.targets),
+                         [False, True])
+
+    def test_future_call_stays_in_flight_until_it_completes(self):
+        future = self.pool.TableExists.future(TableExistsRequest(table_path='/t'), timeout=5)
+        with self.assertRaises(grpc.RpcError) as context:
+            future.result()
+        self.assertEqual(context.exception.code(), grpc.StatusCode.UNAVAILABLE)
+        # released by the callback of the call
+        for _ in range(100):
+            if self.pool.in_flight() == [0, 0]:
+                break
+            time.sleep(0.01)
+        self.assertEqual(self.pool.in_flight(), [0, 0])
+        self.assertEqual(sorted(self.pool.is_healthy(target) for target in self.targets),
+                         [False, True])
+
+    def test_failover_is_a_retry_of_the_retry_policy(self):
+        budget = RetryBudget(ratio=0, min_per_second=1, max_tokens=1)
+        policy = RetryPolicy(wait_exponential_multiplier=1, jitter=False, budget=budget)
+        calls = []
+
+        @policy_retry(policy)
+        def table_exists():
+            calls.append(1)
+            return self.pool.TableExists(TableExistsRequest(table_path='/t'), timeout=5)
+
+        with self.assertRaises(grpc.RpcError):
+            table_exists()
+        # the single budget token allows one retry, it goes to the other gateway
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(budget.refused, 1)
+        self.assertFalse(any(self.pool.is_healthy(target) for target in self.targets))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+from future import standard_library
+
+standard_library.install_aliases()
+from builtins import *
+import time
+
+import grpc
+
+from mapr.ojai.exceptions.CircuitBreakerOpenError import CircuitBreakerOpenError
+from mapr.ojai.storage.OJAICircuitBreaker import OJAICircuitBreaker
+from test.test_utils.rpc_errors import FakeRpcError
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+
+class _Stub(object):
+    """Raises the queued errors, then answers 'response'."""
+
+    def __init__(self):
+        self.errors = []
+        self.calls = 0
+
+    def FindById(self, request, timeout=None):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return 'response'
+
+
+class CircuitBreakerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.stub = _Stub()
+        self.probe_error = None
+        self.probes = 0
+        self.changes = []
+
+    def __probe(self):
+        self.probes += 1
+        if self.probe_error is not None:
+            raise self.probe_error
+
+    def __breaker(self, **kwargs):
+        kwargs.setdefault('open_interval', 0.05)
+        return OJAICircuitBreaker(stub=self.stub, probe=self.__probe, failure_threshold=3,
+                                  listeners=[lambda old, new: self.changes.append((old, new))],
+                                  **kwargs)
+
+    def __fail(self, breaker, code=grpc.StatusCode.UNAVAILABLE, times=1):
+        for _ in range(times):
+            self.stub.errors.append(FakeRpcError(code))
+            with self.assertRaises(grpc.RpcError):
+                breaker.FindById('request')
+
+    def test_opens_at_threshold(self):
+        breaker = self.__breaker()
+        self.__fail(breaker, times=2)
+        self.assertEqual(breaker.state, 'closed')
+        # a success resets the count of consecutive failures
+        self.assertEqual(breaker.FindById('request'), 'response')
+        self.__fail(breaker, times=2)
+        self.assertEqual(breaker.state, 'closed')
+        self.__fail(breaker)
+        self.assertEqual(breaker.state, 'open')
+        self.assertEqual(self.changes, [('closed', 'open')])
+
+    def test_fails_fast_while_open(self):
+        breaker = self.__breaker(open_interval=60)
+        self.__fail(breaker, times=3)
+        calls = self.stub.calls
+        for _ in range(5):
+            with self.assertRaises(CircuitBreakerOpenError):
+                breaker.FindById('request')
+        self.assertEqual(self.stub.calls, calls)
+        self.assertEqual(self.probes, 0)
+
+    def test_half_open_probe_closes(self):
+        breaker = self.__breaker()
+        self.__fail(breaker, times=3)
+        time.sleep(0.1)
+        self.assertEqual(breaker.FindById('request'), 'response')
+        self.assertEqual(self.probes, 1)
+        self.assertEqual(breaker.state, 'closed')
+        self.assertEqual(self.changes, [('closed', 'open'), ('open', 'half-open'),
+                                        ('half-open', 'closed')])
+        # the failure count starts over
+        self.__fail(breaker, times=2)
+        self.assertEqual(breaker.state, 'closed')
+
+    def test_failed_probe_reopens(self):
+        breaker = self.__breaker()
+        self.__fail(breaker, times=3)
+        time.sleep(0.1)
+        self.probe_error = FakeRpcError(grpc.StatusCode.UNAVAILABLE)
+        calls = self.stub.calls
+        with self.assertRaises(CircuitBreakerOpenError):
+            breaker.FindById('request')
+        self.assertEqual(self.stub.calls, calls)
+        self.assertEqual(breaker.state, 'open')
+        # the next probe waits for another interval
+        with self.assertRaises(CircuitBreakerOpenError):
+            breaker.FindById('request')
+        self.assertEqual(self.probes, 1)
+        time.sleep(0.1)
+        self.probe_error = None
+        self.assertEqual(breaker.FindById('request'), 'response')
+        self.assertEqual(self.changes, [('closed', 'open'), ('open', 'half-open'),
+                                        ('half-open', 'open'), ('open', 'half-open'),
+                                        ('half-open', 'closed')])
+
+    def test_failing_listener_is_ignored(self):
+        breaker = self.__breaker()
+
+        def listener(old_state, new_state):
+            raise ValueError(new_state)
+
+        breaker.add_listener(listener)
+        self.__fail(breaker, times=3)
+        self.assertEqual(breaker.state, 'open')
+        self.assertEqual(self.changes, [('closed', 'open')])
+
+    def test_failure_codes(self):
+        breaker = self.__breaker()
+        self.__fail(breaker, grpc.StatusCode.DEADLINE_EXCEEDED, times=5)
+        self.assertEqual(breaker.state, 'closed')
+
+        breaker = self.__breaker(failure_codes=[grpc.StatusCode.UNAVAILABLE,
+                                                grpc.StatusCode.DEADLINE_EXCEEDED])
+        self.__fail(breaker, grpc.StatusCode.DEADLINE_EXCEEDED, times=2)
+        # cancelled calls neither count nor reset the failures
+        self.__fail(breaker, grpc.StatusCode.CANCELLED)
+        self.__fail(breaker, grpc.StatusCode.UNAVAILABLE)
+        self.assertEqual(breaker.state, 'open')
+
+    def test_unknown_attribute(self):
+        breaker = self.__breaker()
+        with self.assertRaises(AttributeError):
+            breaker.NotAMethod
+
+
+if __name__ == '__main__':
+    unittest.main()
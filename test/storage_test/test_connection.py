@@ -0,0 +1,113 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+from future import standard_library
+
+standard_library.install_aliases()
+from builtins import *
+import time
+from concurrent import futures
+
+import grpc
+
+from mapr.ojai.exceptions.ConnectionError import ConnectionError
+from mapr.ojai.proto.gen.maprdb_server_pb2 import PingResponse
+from mapr.ojai.proto.gen.maprdb_server_pb2_grpc import MapRDbServerServicer, \
+    add_MapRDbServerServicer_to_server
+from mapr.ojai.storage.ConnectionFactory import ConnectionFactory
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+
+class _PingServicer(MapRDbServerServicer):
+    """Fails Ping with code after delay seconds, answers it if code is None."""
+
+    def __init__(self):
+        self.code = None
+        self.delay = 0
+        self.pings = 0
+
+    def Ping(self, request, context):
+        self.pings += 1
+        time.sleep(self.delay)
+        if self.code is not None:
+            context.abort(self.code, 'Ping failed.')
+        return PingResponse()
+
+
+class ConnectionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.servicer = _PingServicer()
+        self.server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+        add_MapRDbServerServicer_to_server(self.servicer, self.server)
+        port = self.server.add_insecure_port('localhost:0')
+        self.server.start()
+        self.connection_str = 'localhost:{0}?auth=basic&user=mapr&password=mapr&ssl=false' \
+            .format(port)
+        self.options = {'ojai.mapr.rpc.wait-multiplier': 1, 'ojai.mapr.rpc.max-retries': 2}
+
+    def tearDown(self):
+        self.server.stop(0)
+
+    def __connect(self, **options):
+        self.options.update(options)
+        return ConnectionFactory.get_connection(connection_str=self.connection_str,
+                                                options=self.options)
+
+    def test_ping_unauthenticated(self):
+        self.servicer.code = grpc.StatusCode.UNAUTHENTICATED
+        with self.assertRaises(ConnectionError):
+            self.__connect()
+
+    def test_ping_unavailable(self):
+        self.servicer.code = grpc.StatusCode.UNAVAILABLE
+        with self.assertRaises(grpc.RpcError) as context:
+            self.__connect()
+        self.assertEqual(context.exception.code(), grpc.StatusCode.UNAVAILABLE)
+        self.assertEqual(self.servicer.pings, 2)
+
+    def test_ping_other_errors_ignored(self):
+        self.servicer.code = grpc.StatusCode.UNIMPLEMENTED
+        self.__connect().close()
+        self.assertEqual(self.servicer.pings, 1)
+
+
+    def test_wait_until_ready(self):
+        connection = self.__connect(**{'ojai.mapr.rpc.lazy-connect': True})
+        self.assertEqual(self.servicer.pings, 0)
+        connection.wait_until_ready(timeout=5)
+        self.assertEqual(self.servicer.pings, 1)
+        connection.close()
+
+    def test_wait_until_ready_retries_within_timeout(self):
+        self.servicer.code = grpc.StatusCode.UNAVAILABLE
+        connection = self.__connect(**{'ojai.mapr.rpc.lazy-connect': True,
+                                       'ojai.mapr.rpc.wait-multiplier': 200,
+                                       'ojai.mapr.rpc.retry-jitter': False,
+                                       'ojai.mapr.rpc.max-retries': 7})
+        started = time.time()
+        with self.assertRaises(ConnectionError):
+            connection.wait_until_ready(timeout=1)
+        # waits of 0.4 and 0.8 seconds, the third retry would start after the timeout
+        self.assertLess(time.time() - started, 1)
+        self.assertEqual(self.servicer.pings, 2)
+        connection.close()
+
+    def test_wait_until_ready_ping_gets_remaining_time(self):
+        self.servicer.delay = 2
+        connection = self.__connect(**{'ojai.mapr.rpc.lazy-connect': True})
+        started = time.time()
+        with self.assertRaises(ConnectionError):
+            connection.wait_until_ready(timeout=0.3)
+        self.assertLess(time.time() - started, 1)
+        connection.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
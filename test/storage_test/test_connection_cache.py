@@ -0,0 +1,125 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+from future import standard_library
+
+standard_library.install_aliases()
+from builtins import *
+from builtins import object
+import threading
+
+from mapr.ojai.exceptions.ConnectionError import ConnectionError
+from mapr.ojai.storage.OJAIConnectionCache import OJAIConnectionCache
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+
+class _Connection(object):
+
+    def __init__(self, connection_str):
+        self.connection_str = connection_str
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class _Factory(object):
+    """Creates _Connection, blocks connection strings in blocked until they are released."""
+
+    def __init__(self):
+        self.created = []
+        self.blocked = {}
+        self.failing = set()
+
+    def block(self, connection_str):
+        self.blocked[connection_str] = threading.Event()
+        return self.blocked[connection_str]
+
+    def __call__(self, connection_str, options):
+        if connection_str in self.blocked:
+            self.blocked[connection_str].wait(10)
+        if connection_str in self.failing:
+            raise ConnectionError(m='Gateway {0} is unavailable.'.format(connection_str))
+        connection = _Connection(connection_str)
+        self.created.append(connection)
+        return connection
+
+
+class ConnectionCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.factory = _Factory()
+        self.cache = OJAIConnectionCache(connection_factory=self.factory)
+
+    def test_shared_connection(self):
+        first = self.cache.get('a', {'x': 1})
+        second = self.cache.get('a', {'x': 1})
+        other = self.cache.get('a', {'x': 2})
+        self.assertEqual(len(self.factory.created), 2)
+        self.assertEqual(first.connection_str, second.connection_str)
+        first.close()
+        second.close()
+        other.close()
+        self.assertFalse(any(connection.closed for connection in self.factory.created))
+        self.cache.clear()
+        self.assertTrue(all(connection.closed for connection in self.factory.created))
+
+    def test_slow_connection_does_not_block_other_keys(self):
+        released = self.factory.block('slow')
+        slow = []
+        creating = threading.Thread(target=lambda: slow.append(self.cache.get('slow')))
+        creating.start()
+        joining = threading.Thread(target=lambda: slow.append(self.cache.get('slow')))
+        joining.start()
+
+        fast = self.cache.get('fast')
+        self.assertEqual(fast.connection_str, 'fast')
+        fast.close()
+        self.assertEqual(slow, [])
+
+        released.set()
+        creating.join(10)
+        joining.join(10)
+        self.assertEqual(len(slow), 2)
+        self.assertEqual([connection.connection_str for connection in self.factory.created],
+                         ['fast', 'slow'])
+
+    def test_failed_creation_is_not_cached(self):
+        self.factory.failing.add('down')
+        with self.assertRaises(ConnectionError):
+            self.cache.get('down')
+        self.assertEqual(len(self.cache), 0)
+        self.factory.failing.clear()
+        self.assertEqual(self.cache.get('down').connection_str, 'down')
+
+    def test_idle_connection_is_closed_on_next_get(self):
+        cache = OJAIConnectionCache(connection_factory=self.factory, idle_timeout=0)
+        cache.get('a').close()
+        connection = self.factory.created[0]
+        self.assertTrue(connection.closed)
+        self.assertEqual(len(cache), 0)
+
+    def test_clear_while_creating(self):
+        released = self.factory.block('slow')
+        handles = []
+        creating = threading.Thread(target=lambda: handles.append(self.cache.get('slow')))
+        creating.start()
+        while len(self.cache) == 0:
+            pass
+        self.cache.clear()
+        released.set()
+        creating.join(10)
+        connection = self.factory.created[0]
+        self.assertFalse(connection.closed)
+        handles[0].close()
+        self.assertTrue(connection.closed)
+
+
+if __name__ == '__main__':
+    unittest.main()
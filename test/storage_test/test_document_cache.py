@@ -0,0 +1,53 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+from future import standard_library
+
+standard_library.install_aliases()
+from builtins import *
+
+from mapr.ojai.storage.OJAIDocumentCache import OJAIDocumentCache
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+
+class DocumentCacheTest(unittest.TestCase):
+
+    def test_max_bytes_counts_utf8_bytes(self):
+        cache = OJAIDocumentCache(max_entries=10, max_bytes=20)
+        document = '{"a": "\u0436\u0436\u0436"}'
+        cache.put('id1', None, document, cache.generation)
+        self.assertEqual(cache.size_bytes, len(document) + 3)
+        cache.put('id2', None, document, cache.generation)
+        # 2 * 16 bytes do not fit, although 2 * 13 characters would
+        self.assertEqual(len(cache), 1)
+        self.assertIsNone(cache.get('id1'))
+        self.assertEqual(cache.get('id2'), document)
+        self.assertEqual(cache.evictions, 1)
+        cache.invalidate('id2')
+        self.assertEqual(cache.size_bytes, 0)
+
+    def test_projection_key(self):
+        cache = OJAIDocumentCache(max_entries=10)
+        cache.put('id1', 'a,b', '{"a": 1, "b": 2}', cache.generation)
+        self.assertEqual(cache.get('id1', ['a', 'b']), '{"a": 1, "b": 2}')
+        self.assertIsNone(cache.get('id1', ['a']))
+        self.assertIsNone(cache.get('id1'))
+        cache.put('id1', ['a'], '{"a": 1}', cache.generation)
+        self.assertEqual(cache.get('id1', 'a'), '{"a": 1}')
+
+    def test_stale_generation_is_not_stored(self):
+        cache = OJAIDocumentCache(max_entries=10)
+        generation = cache.generation
+        cache.invalidate('id1')
+        cache.put('id1', None, '{}', generation)
+        self.assertIsNone(cache.get('id1'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+from future import standard_library
+
+standard_library.install_aliases()
+from builtins import *
+from builtins import object
+
+from mapr.ojai.proto.gen.maprdb_server_pb2 import ErrorCode, FindByIdResponse, RpcError
+from mapr.ojai.storage.OJAIDocumentCache import OJAIDocumentCache
+from mapr.ojai.storage.OJAIDocumentStore import OJAIDocumentStore
+from mapr.ojai.utils.retry_utils import RetryPolicy
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+
+class _Stub(object):
+    """Answers FindById with the queued responses and records the timeouts."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.timeouts = []
+
+    def FindById(self, request, timeout=None):
+        self.timeouts.append(timeout)
+        return self.responses.pop(0)
+
+
+def find_by_id_response(json_document='', error_code='NO_ERROR'):
+    return FindByIdResponse(json_document=json_document,
+                            error=RpcError(err_code=ErrorCode.Value(error_code)))
+
+
+class DocumentStoreTest(unittest.TestCase):
+
+    @staticmethod
+    def __store(stub, **kwargs):
+        return OJAIDocumentStore(url='localhost:5678', store_path='/test-store', connection=stub,
+                                 retry_config=RetryPolicy(jitter=False, stop_max_attempt_number=1),
+                                 **kwargs)
+
+    def test_document_cache_skips_error_responses(self):
+        stub = _Stub([find_by_id_response(error_code='PATH_NOT_FOUND'),
+                      find_by_id_response('{"_id": "id1", "a": 1}'),
+                      find_by_id_response(error_code='DOCUMENT_NOT_FOUND')])
+        store = DocumentStoreTest.__store(stub, document_cache=OJAIDocumentCache(max_entries=10))
+        self.assertEqual(store.find_by_id('id1'), {})
+        self.assertEqual(store.find_by_id('id1'), {'_id': 'id1', 'a': 1})
+        self.assertEqual(store.find_by_id('id1'), {'_id': 'id1', 'a': 1})
+        self.assertEqual(store.find_by_id('id2'), {})
+        self.assertEqual(store.find_by_id('id2'), {})
+        self.assertEqual(len(stub.timeouts), 3)
+
+    def test_document_cache_keeps_error_behaviour(self):
+        for document_cache in (None, OJAIDocumentCache(max_entries=10)):
+            stub = _Stub([find_by_id_response(error_code='PATH_NOT_FOUND'),
+                          find_by_id_response(error_code='DOCUMENT_NOT_FOUND')])
+            store = DocumentStoreTest.__store(stub, document_cache=document_cache)
+            self.assertEqual(store.find_by_id('id1'), {})
+            self.assertEqual(store.find_by_id('id2', results_as_document=True).as_dictionary(),
+                             {})
+
+
+if __name__ == '__main__':
+    unittest.main()
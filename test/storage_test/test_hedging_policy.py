@@ -0,0 +1,134 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+from future import standard_library
+
+standard_library.install_aliases()
+from builtins import *
+import threading
+import time
+from concurrent.futures import Future
+
+import grpc
+
+from mapr.ojai.storage.OJAIHedgingPolicy import OJAIHedgingPolicy
+from test.test_utils.rpc_errors import FakeRpcError
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+
+class _Function(object):
+    """Fake non-blocking request, attempt n completes after delays[n] seconds
+    with n or errors[n]."""
+
+    def __init__(self, delays, errors=()):
+        self.delays = delays
+        self.errors = list(errors) + [None] * (len(delays) - len(errors))
+        self.timeouts = []
+        self.threads = []
+        self.futures = []
+
+    def __call__(self, timeout):
+        attempt = len(self.timeouts)
+        self.timeouts.append(timeout)
+        self.threads.append(threading.current_thread())
+        future = Future()
+        self.futures.append(future)
+        timer = threading.Timer(self.delays[attempt], self.__complete, (future, attempt))
+        timer.daemon = True
+        timer.start()
+        return future
+
+    def __complete(self, future, attempt):
+        if not future.set_running_or_notify_cancel():
+            return
+        if self.errors[attempt] is not None:
+            future.set_exception(self.errors[attempt])
+        else:
+            future.set_result(attempt)
+
+
+class HedgingPolicyTest(unittest.TestCase):
+
+    def setUp(self):
+        self.policy = OJAIHedgingPolicy(delay=0.05)
+
+    def test_fast_call_not_hedged(self):
+        function = _Function([0])
+        self.assertEqual(self.policy.call(function), 0)
+        self.assertEqual(function.timeouts, [None])
+        self.assertEqual(function.threads, [threading.current_thread()])
+        self.assertEqual((self.policy.hedged, self.policy.hedges_won), (0, 0))
+
+    def test_slow_call_beaten_by_hedge(self):
+        function = _Function([1, 0])
+        self.assertEqual(self.policy.call(function), 1)
+        self.assertEqual((self.policy.hedged, self.policy.hedges_won), (1, 1))
+        # both requests are sent from the caller's thread, the slower one is cancelled
+        self.assertEqual(function.threads, [threading.current_thread()] * 2)
+        self.assertTrue(function.futures[0].cancelled())
+
+    def test_concurrent_calls(self):
+        results = []
+        calls = [threading.Thread(target=lambda: results.append(
+            self.policy.call(_Function([0.2, 0.01])))) for _ in range(100)]
+        started = time.time()
+        for call in calls:
+            call.start()
+        for call in calls:
+            call.join()
+        self.assertEqual(results, [1] * 100)
+        self.assertLess(time.time() - started, 1)
+        self.assertEqual(self.policy.hedges_won, 100)
+
+    def test_slow_call_answers_first(self):
+        function = _Function([0.1, 1])
+        self.assertEqual(self.policy.call(function), 0)
+        self.assertEqual((self.policy.hedged, self.policy.hedges_won), (1, 0))
+
+    def test_failed_call_hedged(self):
+        function = _Function([0.1, 0.2], [FakeRpcError(grpc.StatusCode.UNAVAILABLE)])
+        self.assertEqual(self.policy.call(function), 1)
+        self.assertEqual((self.policy.hedged, self.policy.hedges_won), (1, 1))
+
+    def test_both_failed(self):
+        error = FakeRpcError(grpc.StatusCode.DEADLINE_EXCEEDED)
+        function = _Function([0.1, 0.2], [FakeRpcError(grpc.StatusCode.UNAVAILABLE), error])
+        with self.assertRaises(grpc.RpcError) as context:
+            self.policy.call(function)
+        self.assertIs(context.exception, error)
+
+    def test_fast_failure_not_hedged(self):
+        function = _Function([0], [FakeRpcError(grpc.StatusCode.UNAVAILABLE)])
+        with self.assertRaises(grpc.RpcError):
+            self.policy.call(function)
+        self.assertEqual(self.policy.hedged, 0)
+
+    def test_hedge_gets_remaining_timeout(self):
+        function = _Function([1, 0])
+        self.assertEqual(self.policy.call(function, 0.5), 1)
+        self.assertEqual(function.timeouts[0], 0.5)
+        self.assertLessEqual(function.timeouts[1], 0.45)
+        self.assertGreater(function.timeouts[1], 0.3)
+
+    def test_no_hedge_after_timeout(self):
+        function = _Function([0.1])
+        self.assertEqual(self.policy.call(function, 0.01), 0)
+        self.assertEqual(function.timeouts, [0.01])
+        self.assertEqual(self.policy.hedged, 0)
+
+    def test_percentile_delay(self):
+        policy = OJAIHedgingPolicy(percentile=50)
+        for _ in range(20):
+            policy.call(_Function([0.01]))
+        self.assertGreaterEqual(policy.delay, 0.01)
+        self.assertLess(policy.delay, 0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()
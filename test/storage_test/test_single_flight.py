@@ -0,0 +1,86 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+from future import standard_library
+
+standard_library.install_aliases()
+from builtins import *
+import threading
+
+import grpc
+
+from mapr.ojai.storage.OJAISingleFlight import OJAISingleFlight
+from test.test_utils.rpc_errors import FakeRpcError
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+
+def failing_stream():
+    yield 1
+    yield 2
+    raise FakeRpcError(grpc.StatusCode.UNAVAILABLE)
+
+
+class SingleFlightTest(unittest.TestCase):
+
+    def setUp(self):
+        self.single_flight = OJAISingleFlight(streams=True)
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.calls = []
+
+    def __slow(self):
+        self.calls.append(1)
+        self.started.set()
+        self.release.wait(10)
+        return 'result'
+
+    def __start_leader(self, results):
+        leader = threading.Thread(target=lambda: results.append(
+            self.single_flight.do('key', self.__slow)))
+        leader.start()
+        self.started.wait(10)
+        return leader
+
+    def test_joined_call(self):
+        results = []
+        leader = self.__start_leader(results)
+        joined = threading.Thread(target=lambda: results.append(
+            self.single_flight.do('key', self.__slow, timeout=10)))
+        joined.start()
+        while self.single_flight.coalesced == 0:
+            self.release.wait(0.001)
+        self.release.set()
+        leader.join(10)
+        joined.join(10)
+        self.assertEqual(results, ['result', 'result'])
+        self.assertEqual(len(self.calls), 1)
+
+    def test_joined_call_respects_its_timeout(self):
+        results = []
+        leader = self.__start_leader(results)
+        with self.assertRaises(grpc.RpcError) as context:
+            self.single_flight.do('key', self.__slow, timeout=0.01)
+        self.assertEqual(context.exception.code(), grpc.StatusCode.DEADLINE_EXCEEDED)
+        self.release.set()
+        leader.join(10)
+        self.assertEqual(results, ['result'])
+
+    def test_stream_error_is_raised_after_received_responses(self):
+        stream = self.single_flight.do_stream('key', failing_stream)
+        self.assertEqual(next(stream), 1)
+        self.assertEqual(next(stream), 2)
+        with self.assertRaises(FakeRpcError):
+            next(stream)
+
+    def test_streams_are_off_by_default(self):
+        self.assertFalse(OJAISingleFlight().streams)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,23 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+from future import standard_library
+standard_library.install_aliases()
+from builtins import *
+import grpc
+
+
+class FakeRpcError(grpc.RpcError):
+    """grpc.RpcError with a status code, as raised by failed calls."""
+
+    def __init__(self, code, details=None):
+        super(FakeRpcError, self).__init__()
+        self.__code = code
+        self.__details = details if details is not None else code.name
+
+    def code(self):
+        return self.__code
+
+    def details(self):
+        return self.__details
@@ -0,0 +1,160 @@
+from __future__ import unicode_literals
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+from future import standard_library
+
+standard_library.install_aliases()
+from builtins import *
+import time
+
+import grpc
+
+from mapr.ojai.exceptions.IllegalArgumentError import IllegalArgumentError
+from mapr.ojai.utils import retry_utils
+from mapr.ojai.utils.retry_utils import RetryPolicy, RetryBudget, policy_retry, call_timeout, \
+    get_retry_policy, get_rpc_deadlines
+from test.test_utils.rpc_errors import FakeRpcError
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+
+UNAVAILABLE = FakeRpcError(grpc.StatusCode.UNAVAILABLE)
+DEADLINE_EXCEEDED = FakeRpcError(grpc.StatusCode.DEADLINE_EXCEEDED)
+
+
+class RetryPolicyTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sleeps = []
+        self.sleep = time.sleep
+        retry_utils.time.sleep = self.sleeps.append
+
+    def tearDown(self):
+        retry_utils.time.sleep = self.sleep
+
+    def test_jitter_range(self):
+        policy = RetryPolicy(wait_exponential_multiplier=100, wait_exponential_max=1000)
+        started = time.time()
+        for attempt, upper in ((1, 0.2), (2, 0.4), (3, 0.8), (4, 1.0), (5, 1.0)):
+            delays = [policy.next_delay(UNAVAILABLE, attempt, started) for _ in range(200)]
+            self.assertTrue(all(0 <= delay <= upper for delay in delays), attempt)
+            self.assertGreater(max(delays) - min(delays), upper / 4)
+        policy.jitter = False
+        self.assertEqual(policy.next_delay(UNAVAILABLE, 2, started), 0.4)
+
+    def test_retry_refused_when_budget_empty(self):
+        budget = RetryBudget(ratio=0.5, min_per_second=0, max_tokens=2)
+        self.assertEqual(budget.tokens, 1.0)
+        policy = RetryPolicy(wait_exponential_multiplier=1, budget=budget)
+        started = time.time()
+        self.assertIsNotNone(policy.next_delay(UNAVAILABLE, 1, started))
+        self.assertIsNone(policy.next_delay(UNAVAILABLE, 1, started))
+        self.assertEqual(budget.refused, 1)
+        budget.deposit()
+        budget.deposit()
+        self.assertIsNotNone(policy.next_delay(UNAVAILABLE, 1, started))
+
+    def test_policy_retry_deposits_and_withdraws(self):
+        budget = RetryBudget(ratio=0, min_per_second=0, max_tokens=2)
+        calls = []
+
+        @policy_retry(RetryPolicy(wait_exponential_multiplier=1, budget=budget))
+        def failing():
+            calls.append(1)
+            raise UNAVAILABLE
+
+        with self.assertRaises(grpc.RpcError):
+            failing()
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(budget.refused, 1)
+
+    def test_no_retry_after_deadline(self):
+        now = time.time()
+        self.assertIsNone(RetryPolicy(wait_exponential_multiplier=1000, jitter=False,
+                                      deadline=1500).next_delay(UNAVAILABLE, 1, now))
+        self.assertEqual(RetryPolicy(wait_exponential_multiplier=100, jitter=False,
+                                     deadline=1500).next_delay(UNAVAILABLE, 1, now), 0.2)
+        self.assertIsNone(RetryPolicy(wait_exponential_multiplier=100, jitter=False)
+                          .next_delay(UNAVAILABLE, 1, now, expires=now + 0.1))
+        self.assertEqual(RetryPolicy(wait_exponential_multiplier=100, jitter=False)
+                         .next_delay(UNAVAILABLE, 1, now, expires=now + 10), 0.2)
+
+    def test_status_code_attempts_override_default_rule(self):
+        policy = RetryPolicy(wait_exponential_multiplier=1, stop_max_attempt_number=7,
+                             status_code_attempts={grpc.StatusCode.DEADLINE_EXCEEDED: 3,
+                                                   grpc.StatusCode.UNAVAILABLE: 0})
+        started = time.time()
+        # not retried by default, allowed up to 3 attempts
+        self.assertIsNotNone(policy.next_delay(DEADLINE_EXCEEDED, 2, started))
+        self.assertIsNone(policy.next_delay(DEADLINE_EXCEEDED, 3, started))
+        # retried by default, disabled
+        self.assertIsNone(policy.next_delay(UNAVAILABLE, 1, started))
+        self.assertIsNone(RetryPolicy().next_delay(DEADLINE_EXCEEDED, 1, started))
+        self.assertIsNotNone(RetryPolicy().next_delay(
+            FakeRpcError(grpc.StatusCode.RESOURCE_EXHAUSTED), 1, started))
+
+    def test_retries_share_the_remaining_timeout(self):
+        timeouts = []
+        clock = [1000.0]
+        time_function = retry_utils.time.time
+        retry_utils.time.time = lambda: clock[0]
+        retry_utils.time.sleep = lambda delay: clock.__setitem__(0, clock[0] + delay)
+        try:
+            @policy_retry(RetryPolicy(wait_exponential_multiplier=500, jitter=False))
+            def call():
+                timeouts.append(call_timeout(3.0))
+                clock[0] += 0.5
+                raise UNAVAILABLE
+
+            with self.assertRaises(grpc.RpcError):
+                call()
+        finally:
+            retry_utils.time.time = time_function
+        # attempt at 0, waits 1s, attempt at 1.5, waits 2s: the next would start after 3s
+        self.assertEqual(timeouts, [3.0, 1.5])
+        self.assertEqual(call_timeout(3.0), 3.0)
+        self.assertIsNone(call_timeout(None))
+
+    def test_retry_deadline_caps_the_attempt_timeout(self):
+        timeouts = []
+        clock = [1000.0]
+        time_function = retry_utils.time.time
+        retry_utils.time.time = lambda: clock[0]
+        retry_utils.time.sleep = lambda delay: clock.__setitem__(0, clock[0] + delay)
+        try:
+            @policy_retry(RetryPolicy(wait_exponential_multiplier=500, jitter=False,
+                                      deadline=2000))
+            def call():
+                timeouts.append((call_timeout(None), call_timeout(3.0)))
+                clock[0] += 0.5
+                raise UNAVAILABLE
+
+            with self.assertRaises(grpc.RpcError):
+                call()
+        finally:
+            retry_utils.time.time = time_function
+        # the earlier of the RPC timeout and the retry deadline wins
+        self.assertEqual(timeouts, [(2.0, 2.0), (0.5, 0.5)])
+
+    def test_options(self):
+        policy = get_retry_policy({'ojai.mapr.rpc.retry-status-codes': {'ABORTED': 2},
+                                   'ojai.mapr.rpc.retry-budget': False})
+        self.assertIsNone(policy.budget)
+        self.assertEqual(policy.status_code_attempts, {grpc.StatusCode.ABORTED: 2})
+        deadlines = get_rpc_deadlines({'ojai.mapr.rpc.write-timeout-milliseconds': 1500})
+        self.assertEqual((deadlines.read, deadlines.write), (None, 1.5))
+        for options in ({'ojai.mapr.rpc.retry-deadline-milliseconds': 0},
+                        {'ojai.mapr.rpc.retry-status-codes': {'UNKNOWN_CODE': 1}}):
+            with self.assertRaises(IllegalArgumentError):
+                get_retry_policy(options)
+        with self.assertRaises(IllegalArgumentError):
+            get_rpc_deadlines({'ojai.mapr.rpc.scan-timeout-milliseconds': -1})
+
+
+if __name__ == '__main__':
+    unittest.main()